@@ -0,0 +1,311 @@
+"""
+Stage-level benchmarks for prepare_disruption_tables.py and export_bq_table.py.
+
+Each stage runs against synthetic fixtures (see generate_synthetic_sciscinet.py) loaded into
+a local BigQuery emulator, and the export runs against a local GCS stand-in. Start both first:
+
+    docker run -p 9050:9050 ghcr.io/goccy/bigquery-emulator --project=scisci-cssai-usf
+    docker run -p 4443:4443 fsouza/fake-gcs-server -scheme http
+
+Every stage runs in its own process, so its wall time and peak RSS are isolated. The work of
+a stage happens in BigQuery jobs, so the peak RSS (client_peak_rss_mb) only covers the Python
+client: result downloads, pandas frames and the export. The server-side cost comes from the
+statistics of the stage's query jobs: bytes_processed (total_bytes_processed) and
+slot_millis. The emulator may not report slot time, in which case it is 0.
+
+The results are written to benchmarks/results/ and compared with benchmarks/baseline.json. Any
+metric worse than the baseline by more than --tolerance is reported as a regression, and the
+script exits with status 1.
+
+Usage:
+    python benchmark_pipeline.py --sizes 0.001 0.01 0.1
+    python benchmark_pipeline.py --sizes 0.001 0.01 0.1 --update-baseline
+"""
+
+import argparse
+import datetime
+import json
+import multiprocessing
+import os
+import resource
+import subprocess
+import time
+
+BIGQUERY_EMULATOR_HOST = "http://localhost:9050"
+STORAGE_EMULATOR_HOST = "http://localhost:4443"
+FIXTURES_DIR = "fixtures"
+BASELINE_PATH = "benchmarks/baseline.json"
+RESULTS_DIR = "benchmarks/results"
+BENCHMARK_BUCKET = "sciscinet-bench"
+DEFAULT_TOLERANCE = 0.2  # allowed relative slowdown / memory growth before flagging
+COMPARED_METRICS = ("wall_seconds", "client_peak_rss_mb", "bytes_processed", "slot_millis")
+
+FIXTURE_TABLES = {
+    "sciscinet_authors.parquet": "SciSciNet_Authors",
+    "sciscinet_papers.parquet": "SciSciNet_Papers",
+    "sciscinet_paperfields.parquet": "SciSciNet_PaperFields",
+    "sciscinet_fields.parquet": "SciSciNet_Fields",
+    "sciscinet_paper_author_affiliation.parquet": "SciSciNet_PaperAuthorAffiliations",
+    "sciscinet_paperrefs.parquet": "SciSciNet_PaperReferences",
+}
+
+
+def _table_rows(pipeline, table_name):
+    """Row count of a Disruption table, read from table metadata."""
+    table_id = f"{pipeline.BIGQUERY_PROJECT}.{pipeline.DISRUPTION_DATASET}.{table_name}"
+    return pipeline.client.get_table(table_id).num_rows
+
+
+def stage_authorships(pipeline):
+    pipeline.create_authorships_table()
+    return _table_rows(pipeline, "Authorships")
+
+
+def stage_profile_building(pipeline):
+    pipeline.create_citation_year_index()
+    pipeline.create_author_prefix_sums()
+    pipeline.create_institution_profiles()
+    pipeline.create_year_partitioned_tables()
+    return pipeline.create_all_author_profiles()["row_count"]
+
+
+def stage_paper_author_details(pipeline):
+    pipeline.create_all_paper_author_details()
+    return _table_rows(pipeline, "paper_author_details")
+
+
+def stage_combined_table(pipeline):
+    pipeline.create_combined_data_table()
+    return _table_rows(pipeline, "disruption_analysis")
+
+
+def stage_reference_metrics(pipeline):
+    pipeline.add_reference_metrics()
+    return _table_rows(pipeline, "paper_reference_metrics")
+
+
+def stage_field_name(pipeline):
+    pipeline.add_field_name()
+    return _table_rows(pipeline, "disruption_analysis")
+
+
+def stage_clean_data(pipeline):
+    rows = _table_rows(pipeline, "disruption_analysis")
+    pipeline.clean_data()
+    return rows
+
+
+def stage_export(pipeline):
+    import export_bq_table
+
+    export_bq_table.export_bq_table_to_csv(
+        "disruption_analysis",
+        project_id=pipeline.BIGQUERY_PROJECT,
+        dataset_id=pipeline.DISRUPTION_DATASET,
+        bucket_name=BENCHMARK_BUCKET,
+        cleanup_intermediate=True,
+        local_mirror=False,
+        force=True,
+    )
+    return _table_rows(pipeline, "disruption_analysis")
+
+
+# Stages in pipeline order; each one depends on the tables written by the previous ones
+STAGES = {
+    "authorships": stage_authorships,
+    "profile_building": stage_profile_building,
+    "paper_author_details": stage_paper_author_details,
+    "combined_table": stage_combined_table,
+    "reference_metrics": stage_reference_metrics,
+    "field_name": stage_field_name,
+    "clean_data": stage_clean_data,
+    "export": stage_export,
+}
+
+
+def _job_statistics(client, since):
+    """Bytes processed and slot milliseconds of the query jobs created since `since`."""
+    bytes_processed = 0
+    slot_millis = 0
+    for job in client.list_jobs(min_creation_time=since):
+        # Statements of a script are child jobs, already counted in the script's statistics
+        if job.job_type != "query" or job.parent_job_id:
+            continue
+        bytes_processed += job.total_bytes_processed or 0
+        slot_millis += job.slot_millis or 0
+    return bytes_processed, slot_millis
+
+
+def _run_stage(stage_name, results):
+    """Child process entry point: run one stage and report its measurements."""
+    import prepare_disruption_tables as pipeline
+
+    started_at = datetime.datetime.now(datetime.timezone.utc)
+    start_time = time.perf_counter()
+    rows = STAGES[stage_name](pipeline)
+    wall_seconds = time.perf_counter() - start_time
+    # ru_maxrss is reported in kilobytes on Linux; it covers this client process only
+    client_peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    bytes_processed, slot_millis = _job_statistics(pipeline.client, started_at)
+    results.put(
+        {
+            "wall_seconds": round(wall_seconds, 3),
+            "client_peak_rss_mb": round(client_peak_rss_mb, 1),
+            "bytes_processed": bytes_processed,
+            "slot_millis": slot_millis,
+            "rows": rows,
+            "rows_per_second": round(rows / wall_seconds, 1) if wall_seconds > 0 else None,
+        }
+    )
+
+
+def run_stage(stage_name):
+    """Run a stage in a fresh process so that the client's peak RSS is measured per stage."""
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    process = context.Process(target=_run_stage, args=(stage_name, results))
+    process.start()
+    process.join()
+    if process.exitcode != 0:
+        raise RuntimeError(f"Stage {stage_name} failed with exit code {process.exitcode}")
+    return results.get()
+
+
+def load_fixtures(scale_factor):
+    """Generate the fixture for `scale_factor` if needed and load it into the emulator."""
+    from gcp_clients import bigquery_client, storage_client
+    from google.cloud import bigquery
+
+    import generate_synthetic_sciscinet
+    import prepare_disruption_tables as pipeline
+
+    fixture_dir = os.path.join(FIXTURES_DIR, f"sf{scale_factor}")
+    if not os.path.exists(os.path.join(fixture_dir, "sciscinet_papers.parquet")):
+        generate_synthetic_sciscinet.generate(scale_factor, fixture_dir)
+
+    client = bigquery_client(pipeline.BIGQUERY_PROJECT)
+    for dataset in (pipeline.SCISCINET_DATASET, pipeline.DISRUPTION_DATASET):
+        client.delete_dataset(dataset, delete_contents=True, not_found_ok=True)
+        client.create_dataset(dataset)
+
+    for parquet_file, table_name in FIXTURE_TABLES.items():
+        print(f"Loading {parquet_file} into {table_name}...")
+        job_config = bigquery.LoadJobConfig(
+            source_format=bigquery.SourceFormat.PARQUET,
+            write_disposition=bigquery.WriteDisposition.WRITE_TRUNCATE,
+        )
+        with open(os.path.join(fixture_dir, parquet_file), "rb") as source:
+            client.load_table_from_file(
+                source,
+                f"{pipeline.BIGQUERY_PROJECT}.{pipeline.SCISCINET_DATASET}.{table_name}",
+                job_config=job_config,
+            ).result()
+
+    # The fixture follows the raw release schema; apply load_perquate_to_bq.py's post-load
+    # steps (P_gf_ rename and debut_year) in one statement
+    print("Renaming P_gf_ and adding debut_year to SciSciNet_Authors...")
+    source = f"{pipeline.BIGQUERY_PROJECT}.{pipeline.SCISCINET_DATASET}"
+    client.query(f"""
+    CREATE OR REPLACE TABLE `{source}.SciSciNet_Authors` AS
+    SELECT authors.* EXCEPT (P_gf_), authors.P_gf_ AS P_gf, debut.debut_year
+    FROM `{source}.SciSciNet_Authors` AS authors
+    LEFT JOIN (
+        SELECT affiliations.authorid, MIN(papers.year) AS debut_year
+        FROM `{source}.SciSciNet_PaperAuthorAffiliations` AS affiliations
+        JOIN `{source}.SciSciNet_Papers` AS papers
+        ON affiliations.paperid = papers.paperid
+        WHERE papers.year IS NOT NULL
+        GROUP BY affiliations.authorid
+    ) AS debut
+    ON authors.authorid = debut.authorid
+    """).result()
+
+    gcs_client = storage_client()
+    if gcs_client.lookup_bucket(BENCHMARK_BUCKET) is None:
+        gcs_client.create_bucket(BENCHMARK_BUCKET)
+
+
+def run_benchmarks(sizes, stages):
+    """Run `stages` at every scale factor in `sizes` and return the nested results dict."""
+    results = {}
+    for scale_factor in sizes:
+        print(f"\n{'=' * 60}\nScale factor {scale_factor}\n{'=' * 60}")
+        load_fixtures(scale_factor)
+        results[str(scale_factor)] = {}
+        for stage_name in stages:
+            print(f"Running stage {stage_name}...")
+            measurement = run_stage(stage_name)
+            results[str(scale_factor)][stage_name] = measurement
+            print(
+                f"  {stage_name}: {measurement['wall_seconds']}s, "
+                f"{measurement['bytes_processed']:,} bytes processed, {measurement['slot_millis']:,} slot ms, "
+                f"{measurement['client_peak_rss_mb']} MB client peak RSS, {measurement['rows_per_second']} rows/s"
+            )
+    return results
+
+
+def compare_with_baseline(results, baseline, tolerance):
+    """Return a list of regression messages for measurements worse than the baseline."""
+    regressions = []
+    for size, stages in results.items():
+        for stage_name, measurement in stages.items():
+            reference = baseline.get(size, {}).get(stage_name)
+            if reference is None:
+                continue
+            for metric in COMPARED_METRICS:
+                # Baselines recorded before a metric existed, or with a zero value, are not compared
+                if not reference.get(metric):
+                    continue
+                if measurement[metric] > reference[metric] * (1 + tolerance):
+                    change = measurement[metric] / reference[metric] - 1
+                    regressions.append(
+                        f"SF {size} {stage_name} {metric}: {reference[metric]} -> "
+                        f"{measurement[metric]} (+{change:.0%})"
+                    )
+    return regressions
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], text=True).strip()
+    except Exception:
+        return None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the disruption pipeline stages.")
+    parser.add_argument("--sizes", type=float, nargs="+", default=[0.001, 0.01, 0.1])
+    parser.add_argument("--stages", nargs="+", choices=list(STAGES), default=list(STAGES))
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args()
+
+    os.environ.setdefault("BIGQUERY_EMULATOR_HOST", BIGQUERY_EMULATOR_HOST)
+    os.environ.setdefault("STORAGE_EMULATOR_HOST", STORAGE_EMULATOR_HOST)
+
+    results = run_benchmarks(args.sizes, args.stages)
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    results_path = os.path.join(RESULTS_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}.json")
+    with open(results_path, "w") as f:
+        json.dump({"commit": _git_commit(), "results": results}, f, indent=2)
+    print(f"\nResults written to {results_path}")
+
+    if args.update_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Baseline updated: {args.baseline}")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare_with_baseline(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) against {args.baseline}:")
+            for message in regressions:
+                print(f"  {message}")
+            raise SystemExit(1)
+        print(f"No regressions against {args.baseline} (tolerance {args.tolerance:.0%}).")
+    else:
+        print(f"No baseline at {args.baseline}; run with --update-baseline to record one.")
@@ -0,0 +1,162 @@
+"""
+In-memory citation-year index for "citations as of year" lookups.
+
+This is an offline tool for ad-hoc lookups and analysis; it is not part of the build, and
+no pipeline stage reads citation_year_index.npz. The author profiles get their as-of
+citation counts from Author_Yearly_Prefix_Sums in BigQuery.
+
+Paper_Citation_Counts_By_Year (see create_citation_year_index in prepare_disruption_tables.py)
+holds one row per (cited paper, citing year). This module packs it into sorted arrays:
+- paper_hashes: FARM_FINGERPRINT of each cited paper, sorted, one entry per paper
+- offsets: start of each paper's rows (CSR layout, len(paper_hashes) + 1 entries)
+- keys: paper code * year_span + (year - first_year), ascending
+- cum_citations: citations received up to and including that year, accumulated locally
+  from the per-year counts
+
+Because keys are globally sorted, a whole array of (paper, year) queries is answered with
+two np.searchsorted calls: one to find the paper, one to find its last year <= the query
+year. There is no Python loop, so billions of lookups can be answered in chunks.
+
+Usage:
+    python citation_index.py  # builds citation_year_index.npz from BigQuery
+"""
+
+import time
+
+import numpy as np
+
+from config import BIGQUERY_PROJECT, DISRUPTION_DATASET
+from gcp_clients import lazy_bigquery_client
+
+INDEX_PATH = "citation_year_index.npz"
+
+client = lazy_bigquery_client(BIGQUERY_PROJECT)
+
+
+class CitationYearIndex:
+    """Cumulative citation counts per cited paper and citing year, in sorted-array form."""
+
+    def __init__(self, paper_hashes, offsets, keys, cum_citations, first_year, year_span):
+        self.paper_hashes = paper_hashes
+        self.offsets = offsets
+        self.keys = keys
+        self.cum_citations = cum_citations
+        self.first_year = int(first_year)
+        self.year_span = int(year_span)
+
+    def __len__(self):
+        return len(self.keys)
+
+    @classmethod
+    def from_counts(cls, paper_hashes, years, citations):
+        """
+        Build the index from (paper hash, citing year, citations) rows in any order.
+
+        Args:
+            paper_hashes (np.ndarray): uint64 hash of the cited paper per row
+            years (np.ndarray): Citing year per row
+            citations (np.ndarray): Citations received in that year (rows may repeat a pair)
+
+        Returns:
+            CitationYearIndex
+        """
+        paper_hashes = np.asarray(paper_hashes, np.uint64)
+        years = np.asarray(years, np.int64)
+        citations = np.asarray(citations, np.int64)
+        first_year = int(years.min()) if len(years) else 0
+        year_span = int(years.max()) - first_year + 1 if len(years) else 1
+
+        order = np.lexsort((years, paper_hashes))
+        paper_hashes, years, citations = paper_hashes[order], years[order], citations[order]
+
+        unique_hashes, codes = np.unique(paper_hashes, return_inverse=True)
+        keys = codes.astype(np.int64) * year_span + (years - first_year)
+        # Merge duplicate (paper, year) rows
+        unique_keys, first = np.unique(keys, return_index=True)
+        citations = np.add.reduceat(citations, first) if len(first) else citations
+        codes = codes[first]
+
+        offsets = np.searchsorted(codes, np.arange(len(unique_hashes) + 1))
+        cum_citations = np.cumsum(citations)
+        # Restart the running total at the start of every paper
+        paper_base = np.r_[0, cum_citations][offsets[:-1]]
+        cum_citations -= np.repeat(paper_base, np.diff(offsets))
+        return cls(unique_hashes, offsets, unique_keys, cum_citations, first_year, year_span)
+
+    def as_of(self, paper_hashes, years):
+        """
+        Citations received up to and including `years` for each queried paper.
+
+        Args:
+            paper_hashes (np.ndarray): uint64 hash of each queried paper
+            years (np.ndarray): As-of year per query (scalar or same length)
+
+        Returns:
+            np.ndarray: int64 counts, 0 for unknown papers and years before the first citation
+        """
+        paper_hashes = np.asarray(paper_hashes, np.uint64)
+        years = np.broadcast_to(np.asarray(years, np.int64), paper_hashes.shape)
+        if len(self.paper_hashes) == 0:
+            return np.zeros(len(paper_hashes), np.int64)
+
+        codes = np.minimum(np.searchsorted(self.paper_hashes, paper_hashes), len(self.paper_hashes) - 1)
+        found = self.paper_hashes[codes] == paper_hashes
+        # Years before first_year map to -1, i.e. just below the paper's first key
+        relative_years = np.clip(years - self.first_year, -1, self.year_span - 1)
+        positions = np.searchsorted(self.keys, codes * self.year_span + relative_years, side="right") - 1
+        valid = found & (positions >= self.offsets[codes])
+        return np.where(valid, self.cum_citations[np.maximum(positions, 0)], 0)
+
+    def save(self, path=INDEX_PATH):
+        np.savez(
+            path,
+            paper_hashes=self.paper_hashes,
+            offsets=self.offsets,
+            keys=self.keys,
+            cum_citations=self.cum_citations,
+            first_year=self.first_year,
+            year_span=self.year_span,
+        )
+
+    @classmethod
+    def load(cls, path=INDEX_PATH):
+        with np.load(path) as data:
+            return cls(
+                data["paper_hashes"],
+                data["offsets"],
+                data["keys"],
+                data["cum_citations"],
+                data["first_year"],
+                data["year_span"],
+            )
+
+
+def read_bigquery_citation_counts():
+    """Download (paper_hash, year, citations) arrays from Paper_Citation_Counts_By_Year."""
+    query = f"""
+    SELECT
+        FARM_FINGERPRINT(cited_paperid) AS paper_hash,
+        year,
+        citations
+    FROM `{BIGQUERY_PROJECT}.{DISRUPTION_DATASET}.Paper_Citation_Counts_By_Year`
+    """
+    hashes, years, citations = [], [], []
+    for batch in client.query(query).result().to_arrow_iterable():
+        # FARM_FINGERPRINT is a signed INT64; reinterpret the bits as uint64
+        hashes.append(batch.column("paper_hash").to_numpy().view(np.uint64))
+        years.append(batch.column("year").to_numpy())
+        citations.append(batch.column("citations").to_numpy())
+    if not hashes:
+        return np.empty(0, np.uint64), np.empty(0, np.int64), np.empty(0, np.int64)
+    return np.concatenate(hashes), np.concatenate(years), np.concatenate(citations)
+
+
+if __name__ == "__main__":
+    start_time = time.time()
+    print("Downloading citation counts by year...")
+    index = CitationYearIndex.from_counts(*read_bigquery_citation_counts())
+    index.save(INDEX_PATH)
+    print(
+        f"Saved {INDEX_PATH}: {len(index.paper_hashes):,} cited papers, {len(index):,} (paper, year) rows "
+        f"in {round((time.time() - start_time) / 60, 2)} minutes."
+    )
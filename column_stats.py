@@ -0,0 +1,233 @@
+"""
+Local catalog of per-column statistics for the BigQuery tables written by the pipeline.
+
+The row count of a table is read from its metadata (num_rows), which costs no query.
+Column statistics and tracked predicates are only collected for the columns and predicates
+that a caller asks for, in one aggregate scan. The callers are the clean_data rules and the
+selectivity estimate of its quality filter. Per column, the scan collects the null count, an
+HLL++ distinct-count sketch and its estimate, min/max, an equi-depth histogram
+(APPROX_QUANTILES boundaries) and the most frequent values. Tracked predicates are counted
+exactly. The results go into a small JSON catalog (CATALOG_PATH), so later validation and
+funnel numbers are read locally instead of issuing COUNT(*) queries. fresh_table_entry reuses
+an entry while the table is unmodified and the entry covers the requested columns and
+predicates; otherwise it collects the statistics again. estimate_selectivity uses the
+histograms to predict how many rows an ad-hoc predicate will match before an expensive DML
+statement is run.
+"""
+
+import base64
+import json
+import os
+import time
+
+import numpy as np
+
+CATALOG_PATH = "column_stats_catalog.json"
+HISTOGRAM_BUCKETS = 20
+TOP_VALUES = 10
+
+_ORDERED_TYPES = {"INTEGER", "INT64", "FLOAT", "FLOAT64", "NUMERIC", "BIGNUMERIC", "DATE", "TIMESTAMP", "DATETIME"}
+_NUMERIC_TYPES = {"INTEGER", "INT64", "FLOAT", "FLOAT64", "NUMERIC", "BIGNUMERIC"}
+_HLL_TYPES = {"INTEGER", "INT64", "NUMERIC", "BIGNUMERIC", "STRING", "BYTES"}
+_TOP_COUNT_TYPES = {"INTEGER", "INT64", "STRING", "BOOLEAN", "BOOL", "DATE"}
+
+
+def load_catalog(path=CATALOG_PATH):
+    """Return the catalog dict, empty if no statistics have been recorded yet."""
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_catalog(catalog, path=CATALOG_PATH):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(catalog, f, indent=1, default=str)
+    os.replace(tmp_path, path)
+
+
+def _column_expressions(name, field_type):
+    """Aggregate expressions collected for one column, keyed by statistic name."""
+    column = f"`{name}`"
+    expressions = {"null_count": f"COUNTIF({column} IS NULL)"}
+    hll_input = column if field_type in _HLL_TYPES else f"CAST({column} AS STRING)"
+    expressions["hll_sketch"] = f"HLL_COUNT.INIT({hll_input})"
+    expressions["distinct_count"] = f"HLL_COUNT.EXTRACT(HLL_COUNT.INIT({hll_input}))"
+    if field_type in _ORDERED_TYPES or field_type == "STRING":
+        expressions["min"] = f"MIN({column})"
+        expressions["max"] = f"MAX({column})"
+    if field_type in _NUMERIC_TYPES:
+        expressions["histogram"] = f"APPROX_QUANTILES({column}, {HISTOGRAM_BUCKETS})"
+    if field_type in _TOP_COUNT_TYPES:
+        expressions["top_values"] = f"APPROX_TOP_COUNT({column}, {TOP_VALUES})"
+    return expressions
+
+
+def collect_table_stats(client, table_id, tracked_predicates=None, columns=()):
+    """
+    Compute catalog statistics for `table_id`. The row count comes from the table metadata;
+    the requested columns and predicates are computed with a single aggregate query, which is
+    skipped when there are none.
+
+    Args:
+        client (bigquery.Client): BigQuery client
+        table_id (str): Fully qualified table id
+        tracked_predicates (dict): Optional {name: SQL boolean expression} counted exactly
+        columns (iterable): Names of the columns to collect statistics for
+
+    Returns:
+        dict: Catalog entry for the table
+    """
+    table = client.get_table(table_id)
+    fields = {field.name: field for field in table.schema}
+    selected = {}
+    selects = []
+    for name in columns:
+        field = fields[name]
+        if field.mode == "REPEATED" or field.field_type in ("RECORD", "STRUCT", "JSON", "GEOGRAPHY"):
+            raise ValueError(f"Column statistics are not supported for {table_id}.{name}")
+        expressions = _column_expressions(name, field.field_type)
+        selected[name] = (field.field_type, list(expressions))
+        for statistic, expression in expressions.items():
+            selects.append(f"{expression} AS `{name}__{statistic}`")
+    for name, predicate in (tracked_predicates or {}).items():
+        selects.append(f"COUNTIF({predicate}) AS `predicate__{name}`")
+
+    row = {}
+    if selects:
+        query = f"SELECT {', '.join(selects)} FROM `{table_id}`"
+        row = list(client.query(query).result())[0]
+
+    entry = {
+        "row_count": table.num_rows,
+        "collected_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "last_modified": str(table.modified),
+        "columns": {},
+        "predicates": {name: row[f"predicate__{name}"] for name in (tracked_predicates or {})},
+    }
+    for name, (field_type, statistics) in selected.items():
+        stats = {"type": field_type}
+        for statistic in statistics:
+            value = row[f"{name}__{statistic}"]
+            if statistic == "hll_sketch":
+                stats["hll_sketch"] = base64.b64encode(value).decode() if value else None
+            elif statistic == "top_values":
+                stats["top_values"] = [[item["value"], item["count"]] for item in value or []]
+            else:
+                stats[statistic] = value
+        entry["columns"][name] = stats
+    return entry
+
+
+def record_table_stats(client, table_id, tracked_predicates=None, columns=(), path=CATALOG_PATH):
+    """Collect statistics for `table_id`, store them in the catalog and return the entry."""
+    print(f"Recording column statistics for {table_id}...")
+    entry = collect_table_stats(client, table_id, tracked_predicates, columns)
+    catalog = load_catalog(path)
+    catalog[table_id] = entry
+    save_catalog(catalog, path)
+    print(
+        f"Recorded statistics for {len(entry['columns'])} columns and {len(entry['predicates'])} "
+        f"predicates ({entry['row_count']:,} rows)."
+    )
+    return entry
+
+
+def fresh_table_entry(client, table_id, tracked_predicates=None, columns=(), path=CATALOG_PATH):
+    """
+    Return the catalog entry for `table_id`, re-collecting it first if it is missing, lacks
+    one of `tracked_predicates` or `columns`, or the table was modified after it was recorded.
+    """
+    entry = load_catalog(path).get(table_id)
+    if (
+        entry is not None
+        and entry["last_modified"] == str(client.get_table(table_id).modified)
+        and set(tracked_predicates or ()) <= set(entry["predicates"])
+        and set(columns) <= set(entry["columns"])
+    ):
+        return entry
+    print(f"Column statistics for {table_id} are missing or out of date.")
+    return record_table_stats(client, table_id, tracked_predicates, columns, path)
+
+
+def table_entry(table_id, path=CATALOG_PATH):
+    catalog = load_catalog(path)
+    if table_id not in catalog:
+        raise KeyError(f"No column statistics recorded for {table_id}")
+    return catalog[table_id]
+
+
+def catalog_row_count(table_id, path=CATALOG_PATH):
+    return table_entry(table_id, path)["row_count"]
+
+
+def tracked_count(table_id, predicate_name, path=CATALOG_PATH):
+    """Exact number of rows matching a tracked predicate when the statistics were recorded."""
+    return table_entry(table_id, path)["predicates"][predicate_name]
+
+
+def _fraction_at_most(histogram, value, strict=False):
+    """Fraction of non-null values <= value (< value if strict) from equi-depth boundaries."""
+    boundaries = np.asarray(histogram, dtype=np.float64)
+    buckets = len(boundaries) - 1
+    if buckets <= 0:
+        return 0.0
+    if value < boundaries[0] or (strict and value == boundaries[0]):
+        return 0.0
+    if value > boundaries[-1] or (not strict and value == boundaries[-1]):
+        return 1.0
+    side = "left" if strict else "right"
+    i = min(int(np.searchsorted(boundaries, value, side=side)) - 1, buckets - 1)
+    width = boundaries[i + 1] - boundaries[i]
+    within = (value - boundaries[i]) / width if width > 0 else (0.0 if strict else 1.0)
+    return (i + within) / buckets
+
+
+def _equality_fraction(stats, value, non_null):
+    for top_value, count in stats.get("top_values") or []:
+        if top_value == value:
+            return count / non_null
+    distinct = stats.get("distinct_count") or 1
+    return 1.0 / distinct
+
+
+def estimate_selectivity(table_id, predicates, combine="or", path=CATALOG_PATH):
+    """
+    Estimate the fraction of rows matching simple column predicates.
+
+    Args:
+        table_id (str): Fully qualified table id with recorded statistics
+        predicates (list): (column, op, value) tuples with op one of
+            "is_null", "eq", "ne", "lt", "le", "gt", "ge"
+        combine (str): "or" or "and", combined assuming independent predicates
+
+    Returns:
+        float: Estimated fraction of matching rows
+    """
+    entry = table_entry(table_id, path)
+    rows = entry["row_count"] or 1
+    fractions = []
+    for column, op, value in predicates:
+        stats = entry["columns"][column]
+        null_fraction = stats["null_count"] / rows
+        non_null = max(rows - stats["null_count"], 1)
+        if op == "is_null":
+            fractions.append(null_fraction)
+            continue
+        if op in ("eq", "ne"):
+            fraction = _equality_fraction(stats, value, non_null)
+            if op == "ne":
+                fraction = 1.0 - fraction
+        elif stats.get("histogram"):
+            if op in ("lt", "le"):
+                fraction = _fraction_at_most(stats["histogram"], value, strict=op == "lt")
+            else:
+                fraction = 1.0 - _fraction_at_most(stats["histogram"], value, strict=op == "gt")
+        else:
+            fraction = 1.0 / 3  # textbook default for ranges without a histogram
+        fractions.append(fraction * (1.0 - null_fraction))
+
+    if combine == "and":
+        return float(np.prod(fractions))
+    return float(1.0 - np.prod([1.0 - f for f in fractions]))
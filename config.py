@@ -0,0 +1,13 @@
+"""
+Project-wide constants shared by the pipeline and the analysis modules.
+
+Kept free of client construction, so modules that only work on local exports can import
+them without GCP credentials.
+"""
+
+BIGQUERY_PROJECT = "scisci-cssai-usf"  # replace this with your GCP project name
+SCISCINET_DATASET = "SciSciNet"
+DISRUPTION_DATASET = "Disruption"
+
+MIN_YEAR = 1961
+MAX_YEAR = 2020
@@ -0,0 +1,342 @@
+"""
+Out-of-core OLS with fixed effects over the disruption_analysis table.
+
+The table is streamed in Arrow record batches, either from a local Parquet/CSV export or from
+BigQuery through the Storage Read API. Parquet sources are split into one read task per row
+group and CSV files into byte ranges, so a single exported file is still read by all
+workers. Worker processes accumulate sufficient statistics
+(Z'Z for Z = [X, y], plus per-group sums), so memory depends on the number of regressors
+and groups, not on the number of rows.
+
+High-cardinality fixed effects (`absorb`, default field_name) are removed by the within
+transformation. This is exact in one pass, because the demeaned cross-products equal
+Z'Z - sum_g s_g s_g' / n_g, where s_g is the sum of Z over group g. Low-cardinality fixed
+effects (`dummies`, default year) enter as indicator columns. A second streamed pass
+computes the residual-based sandwich meat for heteroskedasticity-robust (HC1) and
+cluster-robust (CR1) standard errors.
+
+Usage:
+    python disruption_regression.py exported_data/disruption_analysis.csv  # export_bq_table.py
+    python disruption_regression.py bigquery
+"""
+
+import argparse
+import io
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as csv
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from scipy import stats
+
+from config import BIGQUERY_PROJECT, DISRUPTION_DATASET, MAX_YEAR, MIN_YEAR
+
+OUTCOME = "disruption"
+REGRESSORS = (
+    "first_time_author_ratio",
+    "early_career_author_ratio",
+    "mid_career_author_ratio",
+    "team_size",
+    "institution_count",
+    "avg_career_age",
+    "avg_reference_age",
+)
+ABSORB = "field_name"
+DUMMIES = {"year": list(range(MIN_YEAR, MAX_YEAR + 1))}
+CLUSTER = "field_name"
+BATCH_SIZE = 500_000
+CSV_BLOCK_BYTES = 64 * 1024**2  # CSV bytes parsed at a time
+
+
+# --- Data sources -------------------------------------------------------------
+
+
+def source_tasks(source, columns, workers):
+    """
+    Split a source into independent read tasks, one or more per worker.
+
+    Args:
+        source (str): Path to a Parquet/CSV file or directory, or "bigquery" to read
+            disruption_analysis through the Storage Read API
+        columns (list): Columns to read
+        workers (int): Desired parallelism
+
+    Returns:
+        list: Picklable task descriptions for read_batches
+    """
+    if source == "bigquery":
+        from google.cloud.bigquery_storage import BigQueryReadClient, types
+
+        read_client = BigQueryReadClient()
+        table = (
+            f"projects/{BIGQUERY_PROJECT}/datasets/{DISRUPTION_DATASET}/tables/disruption_analysis"
+        )
+        session = read_client.create_read_session(
+            parent=f"projects/{BIGQUERY_PROJECT}",
+            read_session=types.ReadSession(
+                table=table,
+                data_format=types.DataFormat.ARROW,
+                read_options=types.ReadSession.TableReadOptions(selected_fields=columns),
+            ),
+            max_stream_count=workers,
+        )
+        session_bytes = types.ReadSession.serialize(session)
+        return [("bigquery", stream.name, session_bytes) for stream in session.streams]
+
+    file_format = "csv" if source.endswith(".csv") else "parquet"
+    fragments = list(ds.dataset(source, format=file_format).get_fragments())
+    if file_format == "parquet":
+        return [
+            ("parquet", piece.path, piece.row_groups[0].id)
+            for fragment in fragments
+            for piece in fragment.split_by_row_group()
+        ]
+
+    # Byte ranges; each range reads the lines that start inside it
+    tasks = []
+    ranges_per_file = math.ceil(workers / max(len(fragments), 1))
+    for fragment in fragments:
+        size = os.path.getsize(fragment.path)
+        bounds = np.linspace(0, size, ranges_per_file + 1).astype(np.int64)
+        tasks += [
+            ("csv", fragment.path, int(start), int(end))
+            for start, end in zip(bounds[:-1], bounds[1:])
+            if end > start
+        ]
+    return tasks
+
+
+def _read_csv_range(path, start, end, columns):
+    """
+    Yield DataFrames of the CSV lines of `path` that start in [start, end).
+    Assumes no quoted field spans lines, which holds for the numeric and name columns of the
+    BigQuery CSV export.
+    """
+    convert_options = csv.ConvertOptions(include_columns=columns)
+    with open(path, "rb") as f:
+        header = f.readline()
+        position = max(start, len(header))
+        # Skip the rest of a line that started in the previous range
+        f.seek(position - 1)
+        position += len(f.readline()) - 1
+        while position < end:
+            lines = f.readlines(CSV_BLOCK_BYTES)
+            if not lines:
+                break
+            sizes = np.array([len(line) for line in lines])
+            line_starts = position + np.cumsum(sizes) - sizes
+            keep = int(np.searchsorted(line_starts, end))
+            if keep:
+                block = io.BytesIO(header + b"".join(lines[:keep]))
+                yield csv.read_csv(block, convert_options=convert_options).to_pandas()
+            if keep < len(lines):
+                break
+            position = int(line_starts[-1] + sizes[-1])
+
+
+def read_batches(task, columns):
+    """Yield pandas DataFrames of at most BATCH_SIZE rows for one read task."""
+    if task[0] == "bigquery":
+        from google.cloud.bigquery_storage import BigQueryReadClient, types
+
+        _, stream_name, session_bytes = task
+        session = types.ReadSession.deserialize(session_bytes)
+        reader = BigQueryReadClient().read_rows(stream_name)
+        for page in reader.rows(session).pages:
+            yield page.to_arrow().to_pandas()
+        return
+
+    if task[0] == "csv":
+        _, path, start, end = task
+        yield from _read_csv_range(path, start, end, columns)
+        return
+
+    _, path, row_group = task
+    parquet_file = pq.ParquetFile(path)
+    for batch in parquet_file.iter_batches(batch_size=BATCH_SIZE, row_groups=[row_group], columns=columns):
+        yield pa.Table.from_batches([batch]).to_pandas()
+
+
+# --- Design matrix --------------------------------------------------------------
+
+
+def design_columns(regressors, dummies, absorb):
+    """Names of the columns of X: regressors, dummies (first level dropped), intercept if needed."""
+    names = list(regressors)
+    for column, levels in dummies.items():
+        names += [f"{column}_{level}" for level in levels[1:]]
+    if absorb is None:
+        names.append("const")
+    return names
+
+
+def build_design(df, outcome, regressors, dummies, absorb):
+    """Return (Z, groups) for a batch: Z = [X, y] as float64, after listwise deletion."""
+    required = [outcome, *regressors, *dummies] + ([absorb] if absorb else [])
+    df = df.dropna(subset=required)
+    blocks = [df[list(regressors)].to_numpy(np.float64)]
+    for column, levels in dummies.items():
+        codes = pd.Categorical(df[column], categories=levels).codes
+        blocks.append((codes[:, None] == np.arange(1, len(levels))[None, :]).astype(np.float64))
+    if absorb is None:
+        blocks.append(np.ones((len(df), 1)))
+    blocks.append(df[[outcome]].to_numpy(np.float64))
+    return df, np.hstack(blocks)
+
+
+def _group_sums(keys, values):
+    """Per-key row counts and column sums as a DataFrame indexed by key."""
+    sums = pd.DataFrame(values).groupby(keys.to_numpy()).sum()
+    sums.insert(0, "n", pd.Series(keys.to_numpy()).value_counts())
+    return sums
+
+
+# --- Streaming passes -------------------------------------------------------------
+
+
+def _first_pass(task, spec):
+    """Accumulate n, Z'Z and per-group sums of Z for one read task."""
+    n = 0
+    width = len(design_columns(spec["regressors"], spec["dummies"], spec["absorb"])) + 1
+    zz = np.zeros((width, width))
+    groups = []
+    for df in read_batches(task, spec["columns"]):
+        df, z = build_design(df, spec["outcome"], spec["regressors"], spec["dummies"], spec["absorb"])
+        n += len(z)
+        zz += z.T @ z
+        if spec["absorb"]:
+            groups.append(_group_sums(df[spec["absorb"]], z))
+    group_sums = pd.concat(groups).groupby(level=0).sum() if groups else None
+    return n, zz, group_sums
+
+
+def _second_pass(task, spec, beta, group_means):
+    """Accumulate the HC meat and per-cluster score sums for one read task."""
+    k = len(beta)
+    meat = np.zeros((k, k))
+    scores = []
+    for df in read_batches(task, spec["columns"]):
+        df, z = build_design(df, spec["outcome"], spec["regressors"], spec["dummies"], spec["absorb"])
+        if spec["absorb"]:
+            z = z - group_means.reindex(df[spec["absorb"]].to_numpy()).to_numpy()
+        x, y = z[:, :-1], z[:, -1]
+        residual = y - x @ beta
+        score = x * residual[:, None]
+        meat += score.T @ score
+        if spec["cluster"]:
+            scores.append(pd.DataFrame(score).groupby(df[spec["cluster"]].to_numpy()).sum())
+    cluster_scores = pd.concat(scores).groupby(level=0).sum() if scores else None
+    return meat, cluster_scores
+
+
+def fit(
+    source,
+    outcome=OUTCOME,
+    regressors=REGRESSORS,
+    absorb=ABSORB,
+    dummies=None,
+    cluster=CLUSTER,
+    workers=None,
+):
+    """
+    Fit y = X b + alpha_absorb + e in bounded memory and return a coefficient table.
+
+    Args:
+        source (str): Parquet/CSV path or "bigquery" (see source_tasks)
+        outcome (str): Dependent variable
+        regressors (tuple): Continuous regressors
+        absorb (str): Fixed effect removed by the within transformation (None for an intercept)
+        dummies (dict): Low-cardinality fixed effects as {column: levels}, defaults to year
+        cluster (str): Column to cluster standard errors on (None to skip)
+        workers (int): Number of reader processes
+
+    Returns:
+        pd.DataFrame: coef, se, se_robust, se_cluster and the cluster-robust t / p-values
+    """
+    dummies = DUMMIES if dummies is None else dummies
+    workers = workers or os.cpu_count() or 1
+    columns = sorted({outcome, *regressors, *dummies, *filter(None, [absorb, cluster])})
+    spec = {
+        "outcome": outcome,
+        "regressors": list(regressors),
+        "dummies": dummies,
+        "absorb": absorb,
+        "cluster": cluster,
+        "columns": columns,
+    }
+    names = design_columns(regressors, dummies, absorb)
+    tasks = source_tasks(source, columns, workers)
+    print(f"Fitting {outcome} on {len(names)} columns from {len(tasks)} read tasks with {workers} workers")
+
+    with ProcessPoolExecutor(workers) as pool:
+        partials = list(pool.map(_first_pass, tasks, [spec] * len(tasks)))
+
+        n = sum(p[0] for p in partials)
+        zz = sum(p[1] for p in partials)
+        n_groups = 0
+        group_means = None
+        if absorb:
+            group_sums = pd.concat([p[2] for p in partials if p[2] is not None]).groupby(level=0).sum()
+            counts = group_sums.pop("n").to_numpy(np.float64)
+            sums = group_sums.to_numpy()
+            zz = zz - sums.T @ (sums / counts[:, None])
+            group_means = pd.DataFrame(sums / counts[:, None], index=group_sums.index)
+            n_groups = len(counts)
+        print(f"First pass done: {n:,} rows, {n_groups:,} absorbed groups")
+
+        xx, xy, yy = zz[:-1, :-1], zz[:-1, -1], zz[-1, -1]
+        bread = np.linalg.inv(xx)
+        beta = bread @ xy
+        k = len(beta)
+        dof = n - k - n_groups
+        sigma2 = (yy - beta @ xy) / dof
+        se = np.sqrt(np.diag(bread) * sigma2)
+
+        partials = list(
+            pool.map(
+                _second_pass, tasks, [spec] * len(tasks), [beta] * len(tasks), [group_means] * len(tasks)
+            )
+        )
+
+    meat = sum(p[0] for p in partials)
+    se_robust = np.sqrt(np.diag(bread @ meat @ bread) * n / dof)
+
+    result = pd.DataFrame({"coef": beta, "se": se, "se_robust": se_robust}, index=names)
+    if cluster:
+        cluster_scores = pd.concat([p[1] for p in partials if p[1] is not None]).groupby(level=0).sum()
+        n_clusters = len(cluster_scores)
+        u = cluster_scores.to_numpy()
+        # CR1 small-sample correction; fixed effects nested in clusters do not count towards k
+        correction = n_clusters / (n_clusters - 1) * (n - 1) / (n - k)
+        result["se_cluster"] = np.sqrt(np.diag(bread @ (u.T @ u) @ bread) * correction)
+        result["t_cluster"] = result["coef"] / result["se_cluster"]
+        result["p_cluster"] = 2 * stats.t.sf(np.abs(result["t_cluster"]), n_clusters - 1)
+        print(f"Second pass done: {n_clusters:,} clusters")
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Out-of-core fixed-effects OLS on disruption_analysis.")
+    parser.add_argument("source", help='Parquet/CSV export path, or "bigquery"')
+    parser.add_argument("--outcome", default=OUTCOME)
+    parser.add_argument("--regressors", nargs="+", default=list(REGRESSORS))
+    parser.add_argument("--absorb", default=ABSORB)
+    parser.add_argument("--cluster", default=CLUSTER)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    result = fit(
+        args.source,
+        outcome=args.outcome,
+        regressors=args.regressors,
+        absorb=args.absorb,
+        cluster=args.cluster,
+        workers=args.workers,
+    )
+    with pd.option_context("display.max_rows", None, "display.width", 120):
+        print(result.loc[args.regressors])
@@ -1,5 +1,80 @@
-from google.cloud import bigquery, storage
+import base64
+import hashlib
 import io
+import json
+import os
+
+from gcp_clients import bigquery_client, storage_client
+
+MANIFEST_PATH = "export_manifest.json"  # table version -> exported object, per source table
+LOCAL_CACHE_DIR = "exported_data"
+LOCAL_CACHE_MAX_BYTES = 20 * 1024**3  # least recently used mirrors are evicted above this
+
+
+def load_manifest(path=MANIFEST_PATH):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_manifest(manifest, path=MANIFEST_PATH):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def table_version(table):
+    """Identify a table's contents by last-modified time, row count and schema hash."""
+    schema = [(field.name, field.field_type, field.mode) for field in table.schema]
+    return {
+        "last_modified": table.modified.isoformat() if table.modified else None,
+        "num_rows": table.num_rows,
+        "schema_hash": hashlib.sha256(json.dumps(schema).encode()).hexdigest(),
+    }
+
+
+def _file_md5(path):
+    md5 = hashlib.md5()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            md5.update(chunk)
+    return base64.b64encode(md5.digest()).decode()
+
+
+def evict_local_cache(cache_dir=LOCAL_CACHE_DIR, max_bytes=LOCAL_CACHE_MAX_BYTES, keep=()):
+    """Delete the least recently used files in `cache_dir` until it fits in `max_bytes`."""
+    files = [os.path.join(cache_dir, name) for name in os.listdir(cache_dir)]
+    files = sorted((path for path in files if os.path.isfile(path)), key=os.path.getatime)
+    total = sum(os.path.getsize(path) for path in files)
+    for path in files:
+        if total <= max_bytes:
+            break
+        if path in keep:
+            continue
+        total -= os.path.getsize(path)
+        os.remove(path)
+        print(f"Evicted {path} from local export cache")
+
+
+def mirror_to_local(blob, checksum, cache_dir=LOCAL_CACHE_DIR, max_bytes=LOCAL_CACHE_MAX_BYTES):
+    """
+    Keep a local copy of an exported object, downloading it only if the checksum changed.
+
+    Returns:
+        str: Path of the local copy
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    local_path = os.path.join(cache_dir, os.path.basename(blob.name))
+    if os.path.exists(local_path) and _file_md5(local_path) == checksum:
+        os.utime(local_path)  # mark as recently used
+        print(f"Local mirror is up to date: {local_path}")
+    else:
+        print(f"Downloading {blob.name} to {local_path}...")
+        blob.download_to_filename(local_path)
+    evict_local_cache(cache_dir, max_bytes, keep=(local_path,))
+    return local_path
 
 
 def export_bq_table_to_csv(
@@ -8,11 +83,19 @@ def export_bq_table_to_csv(
     dataset_id="Disruption",
     bucket_name="sciscinet-data",
     output_folder="exported_data",
-    cleanup_intermediate=False,
+    cleanup_intermediate=True,
+    local_mirror=True,
+    force=False,
+    manifest_path=MANIFEST_PATH,
 ):
     """
     Export a BigQuery table to a CSV file in GCS.
 
+    The export is skipped when the manifest shows that the table version (last-modified time,
+    row count and schema hash) has already been exported and the object is still in place
+    with the recorded checksum. The version is read again after the extract, and an export
+    of a table that changed in the meantime is not recorded in the manifest.
+
     Args:
         bq_table_name (str): Name of the BigQuery table to export
         project_id (str): GCP project ID
@@ -20,14 +103,18 @@ def export_bq_table_to_csv(
         bucket_name (str): GCS bucket name for storage
         output_folder (str): Folder in GCS bucket to store the final CSV
         cleanup_intermediate (bool): Whether to delete intermediate CSV files after combining
+        local_mirror (bool): Whether to keep a copy in LOCAL_CACHE_DIR
+        force (bool): Export even if the manifest has a matching entry
+        manifest_path (str): Local manifest of previous exports
 
     Returns:
         str: GCS URI of the combined CSV file
     """
 
     # Initialize clients
-    bq_client = bigquery.Client(project=project_id)
-    gcs_client = storage.Client()
+    bq_client = bigquery_client(project_id)
+    gcs_client = storage_client()
+    bucket = gcs_client.bucket(bucket_name)
 
     # Define URIs and paths
     intermediate_prefix = f"intermediate/{bq_table_name}/"
@@ -37,8 +124,28 @@ def export_bq_table_to_csv(
     output_path = f"{output_folder}/{output_filename}"
     output_uri = f"gs://{bucket_name}/{output_path}"
 
+    # Return the previous export if the table has not changed since
+    version = table_version(bq_client.get_table(full_table_id))
+    manifest = load_manifest(manifest_path)
+    cached = manifest.get(full_table_id)
+    if not force and cached and cached["output_uri"] == output_uri:
+        if {key: cached[key] for key in version} == version:
+            output_blob = bucket.get_blob(output_path)
+            if output_blob is not None and output_blob.md5_hash == cached["checksum"]:
+                print(f"{full_table_id} is unchanged since its last export: {output_uri}")
+                if local_mirror:
+                    mirror_to_local(output_blob, cached["checksum"])
+                return output_uri
+
     print(f"Starting export of table: {full_table_id}")
 
+    # Remove shards left over from earlier exports so they are not combined into this one
+    stale_blobs = list(bucket.list_blobs(prefix=intermediate_prefix))
+    if stale_blobs:
+        print(f"Deleting {len(stale_blobs)} stale intermediate files...")
+        for blob in stale_blobs:
+            blob.delete()
+
     # Extract table to GCS intermediate location
     extract_job = bq_client.extract_table(
         full_table_id,
@@ -49,8 +156,13 @@ def export_bq_table_to_csv(
     extract_job.result()  # Wait for the job to complete
     print("Export to GCS intermediate location completed.")
 
+    # A write during the extract makes the export a mix of two versions, so it is not cached
+    extracted_version = table_version(bq_client.get_table(full_table_id))
+    cacheable = extracted_version == version
+    if not cacheable:
+        print(f"Warning: {full_table_id} changed during the export; it will not be cached.")
+
     # Get list of intermediate files
-    bucket = gcs_client.bucket(bucket_name)
     intermediate_blobs = list(bucket.list_blobs(prefix=intermediate_prefix))
 
     if not intermediate_blobs:
@@ -97,8 +209,24 @@ def export_bq_table_to_csv(
                 print(f"Warning: Could not delete {blob.name}: {e}")
 
     combined_content.close()
+
+    output_blob.reload()
+    if cacheable:
+        manifest[full_table_id] = {
+            **version,
+            "output_uri": output_uri,
+            "checksum": output_blob.md5_hash,
+        }
+    else:
+        # The previous entry no longer describes the object that was just overwritten
+        manifest.pop(full_table_id, None)
+    save_manifest(manifest, manifest_path)
+
+    if local_mirror:
+        mirror_to_local(output_blob, output_blob.md5_hash)
     return output_uri
 
 
-gcs_uri = export_bq_table_to_csv("disruption_analysis")
-print(f"Table exported to: {gcs_uri}")
+if __name__ == "__main__":
+    gcs_uri = export_bq_table_to_csv("disruption_analysis")
+    print(f"Table exported to: {gcs_uri}")
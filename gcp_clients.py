@@ -0,0 +1,50 @@
+"""
+Client factories shared by the pipeline scripts.
+
+When BIGQUERY_EMULATOR_HOST or STORAGE_EMULATOR_HOST is set (benchmark_pipeline.py does
+this), the clients talk to a local BigQuery emulator or object-store stand-in instead of GCP.
+"""
+
+import os
+
+from google.auth.credentials import AnonymousCredentials
+from google.cloud import bigquery, storage
+
+
+def bigquery_client(project):
+    """Return a BigQuery client for `project`, pointed at the emulator if one is configured."""
+    emulator_host = os.environ.get("BIGQUERY_EMULATOR_HOST")
+    if emulator_host:
+        return bigquery.Client(
+            project=project,
+            client_options={"api_endpoint": emulator_host},
+            credentials=AnonymousCredentials(),
+        )
+    return bigquery.Client(project=project)
+
+
+class LazyBigQueryClient:
+    """
+    BigQuery client that is only created on first use, so modules can define one at import
+    time and still be imported without credentials.
+    """
+
+    def __init__(self, project):
+        self.project = project
+        self._client = None
+
+    def __getattr__(self, name):
+        if self._client is None:
+            self._client = bigquery_client(self.project)
+        return getattr(self._client, name)
+
+
+def lazy_bigquery_client(project):
+    return LazyBigQueryClient(project)
+
+
+def storage_client(project=None):
+    """Return a GCS client, using anonymous credentials against STORAGE_EMULATOR_HOST."""
+    if os.environ.get("STORAGE_EMULATOR_HOST"):
+        return storage.Client(project=project or "local", credentials=AnonymousCredentials())
+    return storage.Client(project=project)
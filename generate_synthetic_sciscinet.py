@@ -0,0 +1,661 @@
+"""
+Generate a synthetic SciSciNet release with the schemas of the raw Parquet release.
+
+Schema.md lists the tables after load_perquate_to_bq.py, which renames the authors' P_gf_
+column to P_gf and adds debut_year; the generated files have P_gf_ and no debut_year.
+
+The six sciscinet_*.parquet files are written at a chosen scale factor, similar to
+the TPC-H SF knob. Scale factor 1 corresponds to PAPERS_PER_SCALE_FACTOR papers and
+roughly 30M rows across all tables (references dominate), so a ~100M-row fixture is
+about --scale-factor 3.
+
+Papers are generated in chunks by a process pool and streamed into one Parquet file
+per table, so memory stays bounded by a few chunks plus a few counters per paper.
+The marginals are skewed the way the real release is: heavy-tailed author
+productivity, team sizes, citation counts and reference ages, and duplicate
+(paper, author) rows for authors that list several institutions.
+
+citation_count, C3, C5, C10 and cited_by_count are the in-degrees of the generated
+references (C<k>: citations from papers at most k years younger), so the citation tables
+agree with the paper metrics. Citing papers are generated after the papers they cite, so
+the papers file is first written with placeholder counts and then rewritten once all
+references are known. disruption stays synthetic, but is NULL exactly when a paper has no
+references or no citations.
+
+Usage:
+    python generate_synthetic_sciscinet.py --scale-factor 0.1 --output-dir fixtures/sf0.1
+"""
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+## Constants
+PAPERS_PER_SCALE_FACTOR = 1_000_000
+AUTHORS_PER_SCALE_FACTOR = 600_000
+INSTITUTIONS_PER_SCALE_FACTOR = 20_000
+CHUNK_SIZE = 200_000  # papers per generated chunk
+CITATION_WINDOWS = {"C3": 3, "C5": 5, "C10": 10}  # years after publication
+
+FIRST_YEAR = 1950
+LAST_YEAR = 2022
+PUBLICATION_GROWTH_RATE = 0.045  # yearly growth of paper and author counts
+NEW_AUTHOR_SHARE = 0.15  # share of author slots filled by authors debuting that year
+MAX_TEAM_SIZE = 3000
+
+LEVEL0_FIELDS = [
+    "Medicine",
+    "Biology",
+    "Chemistry",
+    "Computer science",
+    "Physics",
+    "Materials science",
+    "Psychology",
+    "Mathematics",
+    "Engineering",
+    "Sociology",
+    "Political science",
+    "Economics",
+    "Business",
+    "Geography",
+    "Environmental science",
+    "Geology",
+    "Art",
+    "History",
+    "Philosophy",
+]
+LEVEL1_PER_PARENT = 15
+LEVEL2_PER_PARENT = 10
+
+DOCTYPES = ["article", "proceedings-article", "book-chapter", "review", "preprint", "other"]
+DOCTYPE_WEIGHTS = [0.72, 0.1, 0.07, 0.05, 0.04, 0.02]
+
+TABLE_FILES = {
+    "authors": "sciscinet_authors.parquet",
+    "papers": "sciscinet_papers.parquet",
+    "paperfields": "sciscinet_paperfields.parquet",
+    "fields": "sciscinet_fields.parquet",
+    "paper_author_affiliation": "sciscinet_paper_author_affiliation.parquet",
+    "paperrefs": "sciscinet_paperrefs.parquet",
+}
+
+SCHEMAS = {
+    "authors": pa.schema(
+        [
+            ("authorid", pa.string()),
+            ("avg_c10", pa.float64()),
+            ("avg_logc10", pa.float64()),
+            ("productivity", pa.int64()),
+            ("h_index", pa.int64()),
+            ("display_name", pa.string()),
+            ("inference_sources", pa.int64()),
+            ("inference_counts", pa.int64()),
+            ("P_gf_", pa.float64()),
+        ]
+    ),
+    "papers": pa.schema(
+        [
+            ("paperid", pa.string()),
+            ("doi", pa.string()),
+            ("year", pa.int64()),
+            ("date", pa.string()),
+            ("doctype", pa.string()),
+            ("cited_by_count", pa.int64()),
+            ("is_retracted", pa.bool_()),
+            ("reference_count", pa.int64()),
+            ("citation_count", pa.int64()),
+            ("C3", pa.int64()),
+            ("C5", pa.int64()),
+            ("C10", pa.int64()),
+            ("disruption", pa.float64()),
+            ("Atyp_Median_Z", pa.float64()),
+            ("Atyp_10pct_Z", pa.float64()),
+            ("Atyp_Pairs", pa.int64()),
+            ("WSB_mu", pa.float64()),
+            ("WSB_sigma", pa.float64()),
+            ("WSB_Cinf", pa.float64()),
+            ("SB_B", pa.float64()),
+            ("SB_T", pa.int64()),
+            ("team_size", pa.int64()),
+            ("institution_count", pa.int64()),
+            ("patent_count", pa.int64()),
+            ("newsfeed_count", pa.int64()),
+            ("nct_count", pa.int64()),
+            ("nih_count", pa.int64()),
+            ("nsf_count", pa.int64()),
+        ]
+    ),
+    "paperfields": pa.schema(
+        [
+            ("paperid", pa.string()),
+            ("fieldid", pa.string()),
+            ("score_openalex", pa.float64()),
+        ]
+    ),
+    "fields": pa.schema(
+        [
+            ("id", pa.string()),
+            ("wikidata", pa.string()),
+            ("display_name", pa.string()),
+            ("level", pa.int64()),
+            ("description", pa.string()),
+            ("works_count", pa.int64()),
+            ("cited_by_count", pa.int64()),
+            ("image_url", pa.string()),
+            ("image_thumbnail_url", pa.string()),
+            ("works_api_url", pa.string()),
+            ("updated_date", pa.string()),
+            ("fieldid", pa.string()),
+        ]
+    ),
+    "paper_author_affiliation": pa.schema(
+        [
+            ("paperid", pa.string()),
+            ("author_position", pa.string()),
+            ("authorid", pa.string()),
+            ("institutionid", pa.string()),
+            ("raw_affiliation_string", pa.string()),
+        ]
+    ),
+    "paperrefs": pa.schema(
+        [
+            ("citing_paperid", pa.string()),
+            ("cited_paperid", pa.string()),
+            ("year", pa.int64()),
+            ("ref_year", pa.int64()),
+            ("year_diff", pa.int64()),
+        ]
+    ),
+}
+
+# Per-process state, set once by _init_worker so chunks do not re-send it
+_STATE = {}
+
+
+def _prefixed_ids(prefix, values, mask=None):
+    """Format integer ids as strings such as W123, using Arrow kernels for speed."""
+    ids = pc.binary_join_element_wise(prefix, pa.array(values).cast(pa.string()), "")
+    if mask is not None:
+        ids = pc.if_else(pa.array(mask), pa.nulls(len(ids), pa.string()), ids)
+    return ids
+
+
+def _growth_offsets(total):
+    """
+    Split `total` consecutive ids across FIRST_YEAR..LAST_YEAR with exponential growth.
+    Returns an array of length n_years + 1 with the first id of each year.
+    """
+    years = np.arange(FIRST_YEAR, LAST_YEAR + 1)
+    weights = np.exp(PUBLICATION_GROWTH_RATE * (years - FIRST_YEAR))
+    shares = np.concatenate([[0.0], np.cumsum(weights) / weights.sum()])
+    offsets = np.round(shares * total).astype(np.int64)
+    offsets[-1] = total
+    return offsets
+
+
+def _field_hierarchy():
+    """Return (fieldid, level, parent_index, display_name) arrays for all fields."""
+    n0 = len(LEVEL0_FIELDS)
+    n1 = n0 * LEVEL1_PER_PARENT
+    n2 = n1 * LEVEL2_PER_PARENT
+    level = np.concatenate(
+        [np.zeros(n0, np.int64), np.ones(n1, np.int64), np.full(n2, 2, np.int64)]
+    )
+    parent = np.concatenate(
+        [
+            np.full(n0, -1, np.int64),
+            np.arange(n1) // LEVEL1_PER_PARENT,
+            n0 + np.arange(n2) // LEVEL2_PER_PARENT,
+        ]
+    )
+    names = list(LEVEL0_FIELDS)
+    for i in range(n1):
+        names.append(f"{LEVEL0_FIELDS[i // LEVEL1_PER_PARENT]} topic {i % LEVEL1_PER_PARENT + 1}")
+    for i in range(n2):
+        names.append(f"{names[n0 + i // LEVEL2_PER_PARENT]}.{i % LEVEL2_PER_PARENT + 1}")
+    fieldid = 10_000_000 + np.arange(len(level))
+    return fieldid, level, parent, names
+
+
+def _init_worker(config):
+    """Rebuild the shared lookup arrays deterministically in each worker process."""
+    rng = np.random.default_rng([config["seed"], 0])
+    n_authors = config["n_authors"]
+    n_institutions = config["n_institutions"]
+
+    # Pareto weights give a heavy-tailed number of papers per author
+    author_weights = rng.pareto(1.3, n_authors) + 1.0
+    institution_weights = rng.pareto(1.1, n_institutions) + 1.0
+
+    _STATE.update(config)
+    _STATE["paper_offsets"] = _growth_offsets(config["n_papers"])
+    _STATE["author_offsets"] = _growth_offsets(n_authors)
+    _STATE["author_cum_weights"] = np.cumsum(author_weights)
+    _STATE["institution_cum_weights"] = np.cumsum(institution_weights)
+    _STATE["field_hierarchy"] = _field_hierarchy()
+
+
+def _sample_authors(rng, slot_years):
+    """Pick one author per slot among authors whose nominal debut is <= the paper year."""
+    offsets = _STATE["author_offsets"]
+    cum_weights = _STATE["author_cum_weights"]
+    year_index = slot_years - FIRST_YEAR
+    year_start = offsets[year_index]
+    year_end = np.maximum(offsets[year_index + 1], 1)
+
+    # Established authors: weighted draw from the eligible prefix of the author list
+    draw = rng.random(len(slot_years)) * cum_weights[year_end - 1]
+    authors = np.searchsorted(cum_weights, draw, side="right")
+
+    # Newcomers: uniform draw among the authors debuting that year
+    is_new = (rng.random(len(slot_years)) < NEW_AUTHOR_SHARE) & (year_end > year_start)
+    span = year_end - year_start
+    newcomers = year_start + (rng.random(len(slot_years)) * span).astype(np.int64)
+    authors[is_new] = newcomers[is_new]
+    return np.minimum(authors, len(cum_weights) - 1)
+
+
+def _generate_paper_chunk(chunk_index):
+    """
+    Generate papers [chunk_index * chunk_size, ...) and every row that hangs off them.
+
+    Returns a dict of Arrow tables for papers, paperfields, paper_author_affiliation and
+    paperrefs, plus the per-author (ids, counts, first_year) needed for the authors table.
+    """
+    rng = np.random.default_rng([_STATE["seed"], 1, chunk_index])
+    n_papers = _STATE["n_papers"]
+    start = chunk_index * _STATE["chunk_size"]
+    stop = min(start + _STATE["chunk_size"], n_papers)
+    n = stop - start
+    paper_idx = np.arange(start, stop, dtype=np.int64)
+    paper_offsets = _STATE["paper_offsets"]
+    year = np.searchsorted(paper_offsets, paper_idx, side="right") - 1 + FIRST_YEAR
+
+    # --- Authorships ---------------------------------------------------------
+    # Geometric body (mean ~3) with a rare Zipf tail for large collaborations
+    team = rng.geometric(0.33, n)
+    big = rng.random(n) < 0.005
+    team[big] += np.minimum(rng.zipf(1.6, big.sum()) * 5, MAX_TEAM_SIZE - 1)
+    team = np.minimum(team, MAX_TEAM_SIZE)
+
+    slot_paper = np.repeat(np.arange(n), team)
+    slot_author = _sample_authors(rng, year[slot_paper])
+    n_authors = len(_STATE["author_cum_weights"])
+    pair_key = np.unique(slot_paper * n_authors + slot_author)
+    auth_paper = pair_key // n_authors
+    auth_author = pair_key % n_authors
+    team_size = np.bincount(auth_paper, minlength=n)
+
+    rank = np.arange(len(auth_paper)) - np.searchsorted(auth_paper, auth_paper)
+    position = np.where(
+        rank == 0, "first", np.where(rank == team_size[auth_paper] - 1, "last", "middle")
+    )
+
+    # 1 institution for most authorships, 2-3 for some (the duplicate rows)
+    r = rng.random(len(auth_paper))
+    n_inst = 1 + (r > 0.85) + (r > 0.97)
+    aff_row = np.repeat(np.arange(len(auth_paper)), n_inst)
+    inst_cum = _STATE["institution_cum_weights"]
+    institution = np.searchsorted(
+        inst_cum, rng.random(len(aff_row)) * inst_cum[-1], side="right"
+    )
+    institution = np.minimum(institution, len(inst_cum) - 1)
+    no_inst = (rng.random(len(aff_row)) < 0.05) & (n_inst[aff_row] == 1)
+
+    inst_key = np.unique(auth_paper[aff_row][~no_inst] * len(inst_cum) + institution[~no_inst])
+    institution_count = np.bincount(inst_key // len(inst_cum), minlength=n)
+
+    affiliations = pa.table(
+        {
+            "paperid": _prefixed_ids("W", paper_idx[auth_paper[aff_row]]),
+            "author_position": pa.array(position[aff_row]),
+            "authorid": _prefixed_ids("A", auth_author[aff_row]),
+            "institutionid": _prefixed_ids("I", institution, no_inst),
+            "raw_affiliation_string": _prefixed_ids("Institution ", institution, no_inst),
+        },
+        schema=SCHEMAS["paper_author_affiliation"],
+    )
+
+    # Per-author productivity, reduced across chunks by the parent
+    author_ids, author_counts = np.unique(auth_author, return_counts=True)
+
+    # --- References ----------------------------------------------------------
+    mean_refs = np.clip(8 + 0.35 * (year - FIRST_YEAR), 8, 40)
+    ref_count = rng.negative_binomial(1.2, 1.2 / (1.2 + mean_refs))
+    ref_count[rng.random(n) < 0.1] = 0
+    ref_paper = np.repeat(np.arange(n), ref_count)
+    # Log-normal reference age, most references are a few years old
+    age = np.floor(rng.lognormal(np.log(6.0), 0.9, len(ref_paper))).astype(np.int64)
+    ref_year = year[ref_paper] - age
+    keep = ref_year >= FIRST_YEAR
+    ref_paper, age, ref_year = ref_paper[keep], age[keep], ref_year[keep]
+    block_start = paper_offsets[ref_year - FIRST_YEAR]
+    block_size = paper_offsets[ref_year - FIRST_YEAR + 1] - block_start
+    # Skewing the position inside each year's block concentrates citations on few papers
+    cited = block_start + (rng.random(len(ref_paper)) ** 2.5 * block_size).astype(np.int64)
+    keep = cited != paper_idx[ref_paper]
+    ref_key = np.unique(ref_paper[keep] * n_papers + cited[keep])
+    ref_paper = ref_key // n_papers
+    cited = ref_key % n_papers
+    ref_year = np.searchsorted(paper_offsets, cited, side="right") - 1 + FIRST_YEAR
+    reference_count = np.bincount(ref_paper, minlength=n)
+
+    references = pa.table(
+        {
+            "citing_paperid": _prefixed_ids("W", paper_idx[ref_paper]),
+            "cited_paperid": _prefixed_ids("W", cited),
+            "year": pa.array(year[ref_paper]),
+            "ref_year": pa.array(ref_year),
+            "year_diff": pa.array(year[ref_paper] - ref_year),
+        },
+        schema=SCHEMAS["paperrefs"],
+    )
+
+    # --- Papers --------------------------------------------------------------
+    # Citation counts are placeholders until _finalize_papers; columns that need citations
+    # are masked there
+    placeholder = np.zeros(n, np.int64)
+    disruption = np.clip(rng.laplace(0.0, 0.02, n), -1.0, 1.0)
+    extreme = rng.random(n) < 0.05
+    disruption[extreme] = rng.uniform(-1.0, 1.0, extreme.sum())
+
+    no_doi = rng.random(n) < 0.2
+    month = rng.integers(1, 13, n)
+    day = rng.integers(1, 29, n)
+    dates = pc.binary_join_element_wise(
+        pa.array(year).cast(pa.string()),
+        pc.utf8_lpad(pa.array(month).cast(pa.string()), 2, "0"),
+        pc.utf8_lpad(pa.array(day).cast(pa.string()), 2, "0"),
+        "-",
+    )
+
+    def sparse_counts(p, lam):
+        counts = rng.poisson(lam, n)
+        counts[rng.random(n) > p] = 0
+        return counts
+
+    papers = pa.table(
+        {
+            "paperid": _prefixed_ids("W", paper_idx),
+            "doi": _prefixed_ids("https://doi.org/10.5555/synth.", paper_idx, no_doi),
+            "year": pa.array(year),
+            "date": dates,
+            "doctype": pa.array(rng.choice(DOCTYPES, n, p=DOCTYPE_WEIGHTS)),
+            "cited_by_count": pa.array(placeholder),
+            "is_retracted": pa.array(rng.random(n) < 0.0005),
+            "reference_count": pa.array(reference_count),
+            "citation_count": pa.array(placeholder),
+            "C3": pa.array(placeholder),
+            "C5": pa.array(placeholder),
+            "C10": pa.array(placeholder),
+            "disruption": pa.array(disruption, mask=reference_count == 0),
+            "Atyp_Median_Z": pa.array(rng.normal(20.0, 15.0, n), mask=reference_count < 2),
+            "Atyp_10pct_Z": pa.array(rng.normal(-5.0, 10.0, n), mask=reference_count < 2),
+            "Atyp_Pairs": pa.array(reference_count * (reference_count - 1) // 2),
+            "WSB_mu": pa.array(rng.normal(7.0, 1.5, n)),
+            "WSB_sigma": pa.array(rng.lognormal(0.0, 0.5, n)),
+            "WSB_Cinf": pa.array(rng.lognormal(3.0, 1.2, n)),
+            "SB_B": pa.array(rng.lognormal(1.0, 1.0, n)),
+            "SB_T": pa.array(rng.integers(0, 20, n)),
+            "team_size": pa.array(team_size),
+            "institution_count": pa.array(institution_count),
+            "patent_count": pa.array(sparse_counts(0.03, 2.0)),
+            "newsfeed_count": pa.array(sparse_counts(0.01, 3.0)),
+            "nct_count": pa.array(sparse_counts(0.01, 1.0)),
+            "nih_count": pa.array(sparse_counts(0.05, 1.5)),
+            "nsf_count": pa.array(sparse_counts(0.03, 1.2)),
+        },
+        schema=SCHEMAS["papers"],
+    )
+
+    # --- Paper fields --------------------------------------------------------
+    fieldid, level, parent, _ = _STATE["field_hierarchy"]
+    n0 = len(LEVEL0_FIELDS)
+    discipline = np.minimum(rng.zipf(1.8, n) - 1, n0 - 1)
+    n_sub = rng.integers(1, 4, n)
+    sub_paper = np.repeat(np.arange(n), n_sub)
+    sub = n0 + discipline[sub_paper] * LEVEL1_PER_PARENT + rng.integers(
+        0, LEVEL1_PER_PARENT, len(sub_paper)
+    )
+    n_leaf = rng.integers(0, 3, n)
+    leaf_paper = np.repeat(np.arange(n), n_leaf)
+    leaf_parent = sub[np.searchsorted(sub_paper, leaf_paper)]
+    leaf = (
+        n0
+        + n0 * LEVEL1_PER_PARENT
+        + (leaf_parent - n0) * LEVEL2_PER_PARENT
+        + rng.integers(0, LEVEL2_PER_PARENT, len(leaf_paper))
+    )
+    pf_paper = np.concatenate([np.arange(n), sub_paper, leaf_paper])
+    pf_field = np.concatenate([discipline, sub, leaf])
+    pf_key = np.unique(pf_paper * len(fieldid) + pf_field)
+    pf_paper = pf_key // len(fieldid)
+    pf_field = pf_key % len(fieldid)
+    score = rng.beta(2.0, 2.0 + level[pf_field], len(pf_field))
+
+    paperfields = pa.table(
+        {
+            "paperid": _prefixed_ids("W", paper_idx[pf_paper]),
+            "fieldid": pa.array(fieldid[pf_field]).cast(pa.string()),
+            "score_openalex": pa.array(score),
+        },
+        schema=SCHEMAS["paperfields"],
+    )
+
+    return {
+        "papers": papers,
+        "paperfields": paperfields,
+        "paper_author_affiliation": affiliations,
+        "paperrefs": references,
+        "authors": (author_ids, author_counts),
+        # Global index and age of every cited paper, for the citation counts
+        "citations": (cited, year[ref_paper] - ref_year),
+    }
+
+
+def _fields_table():
+    """Build the SciSciNet_Fields table for the fixed synthetic hierarchy."""
+    fieldid, level, parent, names = _field_hierarchy()
+    ids = pa.array(fieldid).cast(pa.string())
+    n = len(fieldid)
+    return pa.table(
+        {
+            "id": pc.binary_join_element_wise("https://openalex.org/C", ids, ""),
+            "wikidata": pc.binary_join_element_wise("https://www.wikidata.org/wiki/Q", ids, ""),
+            "display_name": pa.array(names),
+            "level": pa.array(level),
+            "description": pa.array([f"synthetic level {l} field" for l in level]),
+            "works_count": pa.array(np.zeros(n, np.int64)),
+            "cited_by_count": pa.array(np.zeros(n, np.int64)),
+            "image_url": pa.nulls(n, pa.string()),
+            "image_thumbnail_url": pa.nulls(n, pa.string()),
+            "works_api_url": pc.binary_join_element_wise(
+                "https://api.openalex.org/works?filter=concepts.id:C", ids, ""
+            ),
+            "updated_date": pa.array(["2023-01-01T00:00:00"] * n),
+            "fieldid": ids,
+        },
+        schema=SCHEMAS["fields"],
+    )
+
+
+def _finalize_papers(draft_path, output_path, citation_counts, rng, batch_size=CHUNK_SIZE):
+    """
+    Rewrite the draft papers file with the citation columns from `citation_counts`.
+
+    Args:
+        draft_path (str): Papers file written with placeholder citation counts, in paper order
+        output_path (str): Final papers file
+        citation_counts (dict): citation_count, C3, C5 and C10 arrays indexed by paper
+        rng (np.random.Generator): Random source for cited_by_count noise
+        batch_size (int): Rows rewritten at a time
+    """
+    citation_columns = ("cited_by_count", "citation_count", *CITATION_WINDOWS)
+    schema = SCHEMAS["papers"]
+    start = 0
+    with pq.ParquetWriter(output_path, schema) as writer:
+        for batch in pq.ParquetFile(draft_path).iter_batches(batch_size=batch_size):
+            table = pa.Table.from_batches([batch], schema)
+            stop = start + table.num_rows
+            citations = citation_counts["citation_count"][start:stop]
+            values = {column: citation_counts[column][start:stop] for column in ("citation_count", *CITATION_WINDOWS)}
+            # cited_by_count is OpenAlex's count, which includes a few citing works outside the release
+            values["cited_by_count"] = citations + rng.poisson(0.2, len(citations))
+            masks = {
+                "disruption": citations == 0,
+                "WSB_mu": citations < 5,
+                "WSB_sigma": citations < 5,
+                "WSB_Cinf": citations < 5,
+                "SB_B": citations == 0,
+                "SB_T": citations == 0,
+            }
+            for column in citation_columns:
+                table = table.set_column(schema.get_field_index(column), column, pa.array(values[column]))
+            for column, mask in masks.items():
+                index = schema.get_field_index(column)
+                masked = pc.if_else(pa.array(mask), pa.nulls(len(mask), schema.field(column).type), table[column])
+                table = table.set_column(index, column, masked)
+            writer.write_table(table)
+            start = stop
+    os.remove(draft_path)
+
+
+def _authors_table(rng, productivity, start, stop):
+    """Build SciSciNet_Authors rows for author indices [start, stop) that have papers."""
+    idx = np.arange(start, stop, dtype=np.int64)
+    idx = idx[productivity[start:stop] > 0]
+    prod = productivity[idx]
+    n = len(idx)
+    avg_c10 = rng.lognormal(1.5, 1.2, n)
+    h_index = np.maximum(1, np.floor(np.sqrt(prod) * rng.uniform(0.3, 1.0, n))).astype(np.int64)
+    return pa.table(
+        {
+            "authorid": _prefixed_ids("A", idx),
+            "avg_c10": pa.array(avg_c10),
+            "avg_logc10": pa.array(np.log1p(avg_c10)),
+            "productivity": pa.array(prod),
+            "h_index": pa.array(h_index),
+            "display_name": _prefixed_ids("Author ", idx),
+            "inference_sources": pa.array(rng.integers(0, 4, n)),
+            "inference_counts": pa.array(rng.integers(0, 10, n)),
+            "P_gf_": pa.array(rng.beta(0.5, 0.5, n), mask=rng.random(n) < 0.3),
+        },
+        schema=SCHEMAS["authors"],
+    )
+
+
+def generate(scale_factor, output_dir, workers=None, seed=42, chunk_size=CHUNK_SIZE):
+    """
+    Write the six sciscinet_*.parquet files for the given scale factor.
+
+    Args:
+        scale_factor (float): Size multiplier, 1.0 = PAPERS_PER_SCALE_FACTOR papers
+        output_dir (str): Local directory for the Parquet files
+        workers (int): Number of generator processes (defaults to the CPU count)
+        seed (int): Seed for a reproducible release
+        chunk_size (int): Papers per generated chunk
+
+    Returns:
+        dict: Number of rows written per table
+    """
+    start_time = time.time()
+    os.makedirs(output_dir, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+
+    config = {
+        "seed": seed,
+        "chunk_size": chunk_size,
+        "n_papers": max(int(PAPERS_PER_SCALE_FACTOR * scale_factor), 1000),
+        "n_authors": max(int(AUTHORS_PER_SCALE_FACTOR * scale_factor), 600),
+        "n_institutions": max(int(INSTITUTIONS_PER_SCALE_FACTOR * scale_factor), 100),
+    }
+    n_chunks = -(-config["n_papers"] // chunk_size)
+    print(
+        f"Generating SF {scale_factor}: {config['n_papers']:,} papers, "
+        f"{config['n_authors']:,} candidate authors in {n_chunks} chunks on {workers} workers"
+    )
+
+    rows = {name: 0 for name in TABLE_FILES}
+    papers_path = os.path.join(output_dir, TABLE_FILES["papers"])
+    draft_papers_path = f"{papers_path}.draft"
+    writers = {
+        name: pq.ParquetWriter(
+            draft_papers_path if name == "papers" else os.path.join(output_dir, TABLE_FILES[name]),
+            SCHEMAS[name],
+        )
+        for name in ("papers", "paperfields", "paper_author_affiliation", "paperrefs")
+    }
+    productivity = np.zeros(config["n_authors"], np.int64)
+    citation_counts = {
+        column: np.zeros(config["n_papers"], np.int64) for column in ("citation_count", *CITATION_WINDOWS)
+    }
+
+    # Keep at most 2 chunks per worker in flight so memory stays bounded
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(config,)) as pool:
+        pending = []
+        next_chunk = 0
+        for done in range(n_chunks):
+            while next_chunk < n_chunks and len(pending) < 2 * workers:
+                pending.append(pool.submit(_generate_paper_chunk, next_chunk))
+                next_chunk += 1
+            result = pending.pop(0).result()
+
+            for name, writer in writers.items():
+                writer.write_table(result[name])
+                rows[name] += result[name].num_rows
+
+            author_ids, author_counts = result["authors"]
+            productivity[author_ids] += author_counts
+            cited, age = result["citations"]
+            citation_counts["citation_count"] += np.bincount(cited, minlength=config["n_papers"])
+            for column, window in CITATION_WINDOWS.items():
+                citation_counts[column] += np.bincount(cited[age <= window], minlength=config["n_papers"])
+            print(f"Chunk {done + 1}/{n_chunks} written")
+
+    for writer in writers.values():
+        writer.close()
+
+    print("Writing citation counts into the papers table...")
+    _finalize_papers(
+        draft_papers_path, papers_path, citation_counts, np.random.default_rng([seed, 3]), chunk_size
+    )
+
+    print("Writing authors and fields tables...")
+    rng = np.random.default_rng([seed, 2])
+    with pq.ParquetWriter(
+        os.path.join(output_dir, TABLE_FILES["authors"]), SCHEMAS["authors"]
+    ) as writer:
+        for start in range(0, config["n_authors"], chunk_size):
+            table = _authors_table(rng, productivity, start, min(start + chunk_size, config["n_authors"]))
+            writer.write_table(table)
+            rows["authors"] += table.num_rows
+
+    fields = _fields_table()
+    pq.write_table(fields, os.path.join(output_dir, TABLE_FILES["fields"]))
+    rows["fields"] = fields.num_rows
+
+    for name, count in rows.items():
+        print(f"  {TABLE_FILES[name]}: {count:,} rows")
+    print(
+        f"Wrote {sum(rows.values()):,} rows to {output_dir} in "
+        f"{round((time.time() - start_time) / 60, 2)} minutes."
+    )
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--scale-factor", type=float, default=0.01)
+    parser.add_argument("--output-dir", default="fixtures/sf0.01")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    args = parser.parse_args()
+
+    generate(args.scale_factor, args.output_dir, args.workers, args.seed, args.chunk_size)
@@ -0,0 +1,629 @@
+"""
+Delta ingestion of a new SciSciNet release with incremental maintenance of the derived tables.
+
+A full load (load_perquate_to_bq.py) replaces the six source tables and requires the whole
+prepare_disruption_tables.py derivation to run again. `python load_perquate_to_bq.py --delta`
+instead calls ingest_release:
+
+1. stage_release loads the new Parquet release into STAGING_DATASET.
+2. diff_table compares each staged table with the loaded one per key (TABLE_KEYS), using a
+   fingerprint of all rows with that key. Changed keys go into a `<table>_changes` table in
+   DELTA_DATASET as 'insert', 'update' or 'delete'. It holds the old rows (row_version 'old')
+   and the new rows (row_version 'new') of every changed key.
+3. merge_changes applies the change set to the source table in one transaction.
+4. The affected keys are collected into small tables in DELTA_DATASET, and each derived table
+   has only those rows deleted and re-inserted. The new rows are built in a scratch table in
+   DELTA_DATASET first, so each table is swapped in one short transaction with two statements:
+   - Authorships: papers whose Papers or PaperAuthorAffiliations rows changed
+   - Paper_Citation_Counts_By_Year: cited papers of changed references
+   - Author_Yearly_Prefix_Sums and All_Yearly_Author_Profiles: authors of those papers, plus
+     changed authors and authors of changed authorships
+   - Institution_Yearly_Profiles: institutions of those papers and of changed authorships
+   - paper_author_details: the changed papers and all papers of the affected authors and
+     institutions
+   - paper_reference_metrics: papers with changed references or citing a changed paper
+   - paper_top_fields: papers with changed PaperFields rows, plus the papers of every field
+     whose ancestors changed when Field_Ancestors is rebuilt after a PaperFields change
+   - disruption_analysis: the union of the above
+5. CLEANING_RULES and PROBLEMATIC_AUTHOR_RULES are re-applied to the rewritten rows.
+6. disruption_histograms is rebuilt from the updated disruption_analysis. It only has one
+   row per group and bin, so rebuilding it costs one scan of the analysis columns it reads.
+
+The per-key fingerprint covers all rows with the key, so tables without a unique row key
+(affiliations, references) are compared and replaced a whole key group at a time. Rows with
+a NULL key are not compared. Field_Ancestors, the top fields and the field columns of
+disruption_analysis depend on the whole field hierarchy, so a release that changes
+SciSciNet_Fields is not merged; ingest_release drops Field_Ancestors and raises, and a full
+load is needed instead. Field_Ancestors also depends on the co-occurrence of fields in
+SciSciNet_PaperFields, so it is rebuilt after a PaperFields merge (refresh_field_ancestors).
+"""
+
+import time
+
+from google.cloud import bigquery
+
+from column_stats import fresh_table_entry
+from distribution_sketches import create_distribution_sketches
+from prepare_disruption_tables import (
+    APPROXIMATE,
+    BIGQUERY_PROJECT,
+    CLEANING_RULES,
+    DISRUPTION_DATASET,
+    FIELD_COLUMNS,
+    FIELD_TOP_K,
+    MAX_YEAR,
+    MIN_YEAR,
+    PROBLEMATIC_AUTHOR_RULES,
+    PROBLEMATIC_AUTHORS_TABLE,
+    SCISCINET_DATASET,
+    _author_prefix_sums_query,
+    _author_profiles_query,
+    _authorships_query,
+    _citation_year_index_query,
+    create_field_ancestor_index,
+    _institution_profiles_query,
+    _disruption_analysis_base_query,
+    _paper_author_details_query,
+    _reference_metric_columns,
+    _reference_metrics_query,
+    _top_fields_query,
+    client,
+    key_condition,
+)
+from team_familiarity import TEAM_FAMILIARITY_COLUMNS
+
+STAGING_DATASET = "SciSciNet_Staging"
+DELTA_DATASET = "Disruption_Delta"
+
+# Column that identifies a group of rows in each source table; groups are compared and
+# replaced as a whole
+TABLE_KEYS = {
+    "SciSciNet_Authors": "authorid",
+    "SciSciNet_Papers": "paperid",
+    "SciSciNet_PaperFields": "paperid",
+    "SciSciNet_Fields": "fieldid",
+    "SciSciNet_PaperAuthorAffiliations": "paperid",
+    "SciSciNet_PaperReferences": "citing_paperid",
+}
+# Columns added by the loader rather than read from the release
+DERIVED_COLUMNS = {"SciSciNet_Authors": ("debut_year",)}
+
+
+def _source_table(table):
+    return f"{BIGQUERY_PROJECT}.{SCISCINET_DATASET}.{table}"
+
+
+def _staging_table(table):
+    return f"{BIGQUERY_PROJECT}.{STAGING_DATASET}.{table}"
+
+
+def _delta_table(name):
+    return f"{BIGQUERY_PROJECT}.{DELTA_DATASET}.{name}"
+
+
+def _derived_table(name):
+    return f"{BIGQUERY_PROJECT}.{DISRUPTION_DATASET}.{name}"
+
+
+def _run(query):
+    job = client.query(query)
+    job.result()
+    return job
+
+
+def stage_release(bucket_path, tables):
+    """
+    Load the Parquet files of a release into STAGING_DATASET, with the same settings and
+    P_gf_ rename as the full load.
+
+    Args:
+        bucket_path (str): GCS folder of the release
+        tables (dict): {parquet file name: table name}, as in load_perquate_to_bq.py
+    """
+    for parquet_file, table in tables.items():
+        print(f"Staging {parquet_file} into {_staging_table(table)}...")
+        job_config = bigquery.LoadJobConfig(
+            source_format=bigquery.SourceFormat.PARQUET,
+            write_disposition=bigquery.WriteDisposition.WRITE_TRUNCATE,
+            autodetect=True,
+            column_name_character_map="V2",
+        )
+        client.load_table_from_uri(
+            f"{bucket_path}/{parquet_file}", _staging_table(table), job_config=job_config
+        ).result()
+
+    authors_table = _staging_table("SciSciNet_Authors")
+    _run(f"""
+    CREATE OR REPLACE TABLE `{authors_table}` AS
+    SELECT * EXCEPT (P_gf_), P_gf_ AS P_gf
+    FROM `{authors_table}`
+    """)
+    print("Staged release.")
+
+
+def _compared_columns(table):
+    """Columns of `table` present in the release, checked against the staged copy."""
+    derived = DERIVED_COLUMNS.get(table, ())
+    loaded = {f.name: f.field_type for f in client.get_table(_source_table(table)).schema if f.name not in derived}
+    staged = {f.name: f.field_type for f in client.get_table(_staging_table(table)).schema}
+    if loaded != staged:
+        raise ValueError(
+            f"Schema of the new {table} differs from the loaded table "
+            f"(loaded: {loaded}, staged: {staged}). Run a full load instead."
+        )
+    return list(loaded)
+
+
+def diff_table(table):
+    """
+    Write `<table>_changes` with the old and new rows of every key whose rows differ
+    between the loaded and the staged table.
+
+    Returns:
+        dict: Number of changed keys per change type
+    """
+    key = TABLE_KEYS[table]
+    columns = ", ".join(f"`{column}`" for column in _compared_columns(table))
+    changes_table = _delta_table(f"{table}_changes")
+    print(f"Comparing {table} with the new release...")
+
+    def group_hashes(table_id):
+        return f"""
+        SELECT
+            {key} AS group_key,
+            FARM_FINGERPRINT(STRING_AGG(row_json, '\\n' ORDER BY row_json)) AS group_hash
+        FROM (
+            SELECT {key}, TO_JSON_STRING(STRUCT({columns})) AS row_json
+            FROM `{table_id}`
+            WHERE {key} IS NOT NULL
+        )
+        GROUP BY {key}"""
+
+    _run(f"""
+    CREATE OR REPLACE TABLE `{changes_table}` AS
+    WITH Old AS ({group_hashes(_source_table(table))}
+    ),
+    New AS ({group_hashes(_staging_table(table))}
+    ),
+    ChangedKeys AS (
+        SELECT
+            COALESCE(n.group_key, o.group_key) AS group_key,
+            CASE
+                WHEN o.group_key IS NULL THEN 'insert'
+                WHEN n.group_key IS NULL THEN 'delete'
+                ELSE 'update'
+            END AS change_type
+        FROM New n
+        FULL OUTER JOIN Old o
+            ON n.group_key = o.group_key
+        WHERE o.group_hash IS DISTINCT FROM n.group_hash
+    )
+    SELECT c.change_type, 'old' AS row_version, {columns}
+    FROM `{_source_table(table)}` t
+    JOIN ChangedKeys c ON t.{key} = c.group_key
+    WHERE c.change_type != 'insert'
+    UNION ALL
+    SELECT c.change_type, 'new' AS row_version, {columns}
+    FROM `{_staging_table(table)}` t
+    JOIN ChangedKeys c ON t.{key} = c.group_key
+    WHERE c.change_type != 'delete'
+    """)
+
+    counts = {"insert": 0, "update": 0, "delete": 0}
+    rows = client.query(f"""
+    SELECT change_type, COUNT(DISTINCT {key}) AS keys
+    FROM `{changes_table}`
+    GROUP BY change_type
+    """).result()
+    for row in rows:
+        counts[row["change_type"]] = row["keys"]
+    print(
+        f"{table}: {counts['insert']:,} inserted, {counts['update']:,} updated, "
+        f"{counts['delete']:,} deleted {key} values"
+    )
+    return counts
+
+
+def _replace_rows(table_id, condition, inserts):
+    """
+    Replace the rows of `table_id` matching `condition` with the rows of the INSERT
+    statements, so readers never see a half-updated table.
+
+    The INSERTs run one job at a time into a scratch copy of the table in DELTA_DATASET, and
+    only the DELETE and a single INSERT from the scratch table run in the transaction. This
+    keeps the transaction within BigQuery's DML and script limits however many statements
+    build the rows (60 per-year queries for the profile tables).
+    """
+    scratch_table = _delta_table(f"{table_id.split('.')[-1]}_new_rows")
+    _run(f"""
+    CREATE OR REPLACE TABLE `{scratch_table}` AS
+    SELECT * FROM `{table_id}` WHERE FALSE
+    """)
+    for insert in inserts:
+        _run(f"INSERT INTO `{scratch_table}`{insert}")
+    _run(f"""
+    BEGIN TRANSACTION;
+    DELETE FROM `{table_id}` WHERE {condition};
+    INSERT INTO `{table_id}` SELECT * FROM `{scratch_table}`;
+    COMMIT TRANSACTION;
+    """)
+    client.delete_table(scratch_table, not_found_ok=True)
+
+
+def merge_changes(table):
+    """Apply `<table>_changes` to the loaded source table."""
+    key = TABLE_KEYS[table]
+    changes_table = _delta_table(f"{table}_changes")
+    columns = ", ".join(
+        f"`{field.name}`"
+        for field in client.get_table(changes_table).schema
+        if field.name not in ("change_type", "row_version")
+    )
+    print(f"Merging changes into {table}...")
+    _replace_rows(
+        _source_table(table),
+        f"{key} IN (SELECT {key} FROM `{changes_table}` WHERE change_type != 'insert')",
+        [f" ({columns})\n    SELECT {columns} FROM `{changes_table}` WHERE row_version = 'new'"],
+    )
+
+
+def _create_key_table(name, key, query):
+    """Create a DELTA_DATASET table with the distinct `key` values returned by `query`."""
+    table_id = _delta_table(name)
+    _run(f"""
+    CREATE OR REPLACE TABLE `{table_id}` AS
+    SELECT DISTINCT {key} FROM ({query})
+    WHERE {key} IS NOT NULL
+    """)
+    count = client.get_table(table_id).num_rows
+    print(f"{name}: {count:,} {key} values")
+    return table_id
+
+
+def _changed_keys(table, column):
+    """Values of `column` in the old and new rows of `table`'s change set."""
+    return f"SELECT {column} FROM `{_delta_table(f'{table}_changes')}`"
+
+
+def refresh_field_ancestors():
+    """
+    Rebuild Field_Ancestors after a SciSciNet_PaperFields merge.
+
+    Returns:
+        str: Key table with the fields whose row in Field_Ancestors changed
+    """
+    index_table = _derived_table("Field_Ancestors")
+    previous_index = _delta_table("Field_Ancestors_previous")
+    _run(f"""
+    CREATE OR REPLACE TABLE `{previous_index}` AS
+    SELECT * FROM `{index_table}`
+    """)
+    create_field_ancestor_index(rebuild=True)
+    return _create_key_table(
+        "changed_fields",
+        "fieldid",
+        f"""
+        SELECT COALESCE(n.fieldid, o.fieldid) AS fieldid
+        FROM `{index_table}` n
+        FULL OUTER JOIN `{previous_index}` o
+            ON n.fieldid = o.fieldid
+        WHERE TO_JSON_STRING(n) IS DISTINCT FROM TO_JSON_STRING(o)""",
+    )
+
+
+def collect_affected_keys(changed_fields=None):
+    """
+    Create the affected-key tables. Run after the source tables are merged, but before
+    Authorships is rewritten, so the old authors of changed papers are still found.
+
+    Args:
+        changed_fields (str): Key table of fields whose ancestors changed (see
+            refresh_field_ancestors); their papers get new top fields
+
+    Returns:
+        dict: Key table ids by name
+    """
+    authorships = _derived_table("Authorships")
+    keys = {}
+    keys["authorship_papers"] = _create_key_table(
+        "authorship_papers",
+        "paperid",
+        f"""
+        {_changed_keys("SciSciNet_Papers", "paperid")}
+        UNION ALL {_changed_keys("SciSciNet_PaperAuthorAffiliations", "paperid")}""",
+    )
+    keys["citation_papers"] = _create_key_table(
+        "citation_papers",
+        "paperid",
+        _changed_keys("SciSciNet_PaperReferences", "cited_paperid AS paperid"),
+    )
+    keys["affected_authors"] = _create_key_table(
+        "affected_authors",
+        "authorid",
+        f"""
+        SELECT authorid FROM `{authorships}`
+        WHERE {key_condition("paperid", keys["authorship_papers"])}
+            OR {key_condition("paperid", keys["citation_papers"])}
+        UNION ALL {_changed_keys("SciSciNet_PaperAuthorAffiliations", "authorid")}
+        UNION ALL {_changed_keys("SciSciNet_Authors", "authorid")}""",
+    )
+    keys["affected_institutions"] = _create_key_table(
+        "affected_institutions",
+        "institutionid",
+        f"""
+        SELECT institutionid FROM `{authorships}`, UNNEST(institutionids) AS institutionid
+        WHERE {key_condition("paperid", keys["authorship_papers"])}
+        UNION ALL {_changed_keys("SciSciNet_PaperAuthorAffiliations", "institutionid")}""",
+    )
+    keys["reference_papers"] = _create_key_table(
+        "reference_papers",
+        "paperid",
+        f"""
+        {_changed_keys("SciSciNet_PaperReferences", "citing_paperid AS paperid")}
+        UNION ALL
+        SELECT citing_paperid AS paperid
+        FROM `{_source_table("SciSciNet_PaperReferences")}`
+        WHERE cited_paperid IN ({_changed_keys("SciSciNet_Papers", "paperid")})""",
+    )
+    field_papers = _changed_keys("SciSciNet_PaperFields", "paperid")
+    if changed_fields is not None:
+        field_papers += f"""
+        UNION ALL
+        SELECT paperid FROM `{_source_table("SciSciNet_PaperFields")}`
+        WHERE {key_condition("fieldid", changed_fields, "fieldid")}"""
+    keys["field_papers"] = _create_key_table("field_papers", "paperid", field_papers)
+    return keys
+
+
+def update_debut_years(author_filter):
+    """Recompute debut_year of the affected authors, as the full load does for all authors."""
+    print("Updating debut_year for affected authors...")
+    job = _run(f"""
+    UPDATE `{_source_table("SciSciNet_Authors")}` AS authors
+    SET debut_year = (
+        SELECT MIN(papers.year)
+        FROM `{_source_table("SciSciNet_PaperAuthorAffiliations")}` AS affiliations
+        JOIN `{_source_table("SciSciNet_Papers")}` AS papers
+        ON affiliations.paperid = papers.paperid
+        WHERE affiliations.authorid = authors.authorid
+        AND papers.year IS NOT NULL
+    )
+    WHERE {key_condition("authors.authorid", author_filter, "authorid")}
+    """)
+    print(f"Updated debut_year for {job.num_dml_affected_rows or 0:,} authors")
+
+
+def _has_column(table_id, column):
+    return any(field.name == column for field in client.get_table(table_id).schema)
+
+
+def update_derived_tables(keys):
+    """Rewrite the affected rows of every derived table, in dependency order."""
+    authorships = _derived_table("Authorships")
+    profiles = _derived_table("All_Yearly_Author_Profiles")
+    details = _derived_table("paper_author_details")
+    reference_metrics = _derived_table("paper_reference_metrics")
+    analysis = _derived_table("disruption_analysis")
+    authors = keys["affected_authors"]
+
+    print("Updating Authorships...")
+    _replace_rows(
+        authorships,
+        key_condition("paperid", keys["authorship_papers"]),
+        [_authorships_query(keys["authorship_papers"])],
+    )
+
+    print("Updating Paper_Citation_Counts_By_Year...")
+    _replace_rows(
+        _derived_table("Paper_Citation_Counts_By_Year"),
+        key_condition("cited_paperid", keys["citation_papers"]),
+        [_citation_year_index_query(keys["citation_papers"])],
+    )
+
+    print("Updating Author_Yearly_Prefix_Sums...")
+    _replace_rows(
+        _derived_table("Author_Yearly_Prefix_Sums"),
+        key_condition("authorid", authors, "authorid"),
+        [_author_prefix_sums_query(authors)],
+    )
+
+    print("Updating Institution_Yearly_Profiles...")
+    institutions = keys["affected_institutions"]
+    _replace_rows(
+        _derived_table("Institution_Yearly_Profiles"),
+        key_condition("institutionid", institutions, "institutionid"),
+        [_institution_profiles_query(institutions)],
+    )
+
+    print("Updating All_Yearly_Author_Profiles...")
+    _replace_rows(
+        profiles,
+        key_condition("authorid", authors, "authorid"),
+        [_author_profiles_query(year, authors) for year in range(MIN_YEAR, MAX_YEAR + 1)],
+    )
+
+    # Every paper of an affected author or institution has new profiles; the affected papers
+    # are collected now that Authorships holds the new authorships
+    keys["detail_papers"] = _create_key_table(
+        "detail_papers",
+        "paperid",
+        f"""
+        SELECT paperid FROM `{keys["authorship_papers"]}`
+        UNION ALL
+        SELECT paperid FROM `{authorships}`
+        WHERE {key_condition("authorid", authors, "authorid")}
+        UNION ALL
+        SELECT paperid FROM `{authorships}`, UNNEST(institutionids) AS institutionid
+        WHERE {key_condition("institutionid", institutions, "institutionid")}""",
+    )
+    # Profiles of problematic authors outside the affected set were removed by clean_data, so
+    # their co-authored papers get partial details here; clean_updated_rows removes those
+    # papers from disruption_analysis again
+    print("Updating paper_author_details...")
+    _replace_rows(
+        details,
+        key_condition("paperid", keys["detail_papers"]),
+        [
+            _paper_author_details_query(year, keys["detail_papers"])
+            for year in range(MIN_YEAR, MAX_YEAR + 1)
+        ],
+    )
+
+    # Run with the same DISRUPTION_APPROXIMATE setting as the full build
+    print("Updating paper_reference_metrics...")
+    _replace_rows(
+        reference_metrics,
+        key_condition("citing_paperid", keys["reference_papers"]),
+        [_reference_metrics_query(APPROXIMATE, keys["reference_papers"])],
+    )
+
+    print("Updating paper_top_fields...")
+    _replace_rows(
+        _derived_table("paper_top_fields"),
+        key_condition("paperid", keys["field_papers"]),
+        [_top_fields_query(FIELD_TOP_K, keys["field_papers"])],
+    )
+
+    keys["analysis_papers"] = _create_key_table(
+        "analysis_papers",
+        "paperid",
+        f"""
+        SELECT paperid FROM `{keys["detail_papers"]}`
+        UNION ALL SELECT paperid FROM `{keys["reference_papers"]}`
+        UNION ALL SELECT paperid FROM `{keys["field_papers"]}`
+        UNION ALL {_changed_keys("SciSciNet_Papers", "paperid")}""",
+    )
+    print("Updating disruption_analysis...")
+    # Team familiarity of the rewritten papers is copied from the last team_familiarity.py run
+    team_familiarity_columns = ""
+    team_familiarity_join = ""
+    if _has_column(analysis, TEAM_FAMILIARITY_COLUMNS[0]):
+        team_familiarity_columns = "".join(f",\n        tf.{column}" for column in TEAM_FAMILIARITY_COLUMNS)
+        team_familiarity_join = f"""
+    LEFT JOIN `{_derived_table("team_familiarity")}` tf
+        ON da.paperid = tf.paperid"""
+    columns = ", ".join(f"`{field.name}`" for field in client.get_table(analysis).schema)
+    rows_query = f""" ({columns})
+    SELECT {columns} FROM (
+    SELECT
+        da.*,
+{_reference_metric_columns()},{FIELD_COLUMNS}{team_familiarity_columns}
+    FROM ({_disruption_analysis_base_query(keys["analysis_papers"])}) da
+    LEFT JOIN `{reference_metrics}` rm
+        ON da.paperid = rm.citing_paperid
+    LEFT JOIN `{_derived_table("paper_top_fields")}` ptf
+        ON da.paperid = ptf.paperid{team_familiarity_join}
+    )"""
+    _replace_rows(analysis, key_condition("paperid", keys["analysis_papers"]), [rows_query])
+
+
+def clean_updated_rows(keys):
+    """
+    Re-apply clean_data to the rewritten rows: CLEANING_RULES to the rewritten
+    disruption_analysis rows, and PROBLEMATIC_AUTHOR_RULES to the affected authors, whose
+    entries in the problematic_authors table are replaced.
+    """
+    profiles = _derived_table("All_Yearly_Author_Profiles")
+    analysis = _derived_table("disruption_analysis")
+    authors = keys["affected_authors"]
+    papers = keys["analysis_papers"]
+    try:
+        client.get_table(PROBLEMATIC_AUTHORS_TABLE)
+    except Exception:
+        raise RuntimeError(
+            f"{PROBLEMATIC_AUTHORS_TABLE} does not exist. Run prepare_disruption_tables.py once "
+            "before incremental updates."
+        )
+
+    print("Re-applying cleaning rules to updated rows...")
+    cleaning_condition = " OR ".join(f"({predicate})" for predicate in CLEANING_RULES.values())
+    job = _run(f"""
+    DELETE FROM `{analysis}`
+    WHERE {key_condition("paperid", papers)} AND ({cleaning_condition})
+    """)
+    print(f"Removed {job.num_dml_affected_rows or 0:,} entries by the cleaning rules")
+
+    problematic_condition = " OR ".join(f"({predicate})" for predicate in PROBLEMATIC_AUTHOR_RULES.values())
+    _run(f"""
+    BEGIN TRANSACTION;
+    DELETE FROM `{PROBLEMATIC_AUTHORS_TABLE}`
+    WHERE {key_condition("authorid", authors, "authorid")};
+    INSERT INTO `{PROBLEMATIC_AUTHORS_TABLE}` (authorid)
+    SELECT DISTINCT authorid
+    FROM `{profiles}`
+    WHERE {key_condition("authorid", authors, "authorid")} AND ({problematic_condition});
+    DELETE FROM `{profiles}`
+    WHERE {key_condition("authorid", authors, "authorid")}
+        AND authorid IN (SELECT authorid FROM `{PROBLEMATIC_AUTHORS_TABLE}`);
+    DELETE FROM `{analysis}`
+    WHERE {key_condition("paperid", papers)}
+        AND paperid IN (
+            SELECT au.paperid
+            FROM `{_derived_table("Authorships")}` au
+            INNER JOIN `{PROBLEMATIC_AUTHORS_TABLE}` prob
+            ON au.authorid = prob.authorid
+        );
+    COMMIT TRANSACTION;
+    """)
+    print(f"Problematic authors: {client.get_table(PROBLEMATIC_AUTHORS_TABLE).num_rows:,}")
+
+
+def ingest_release(bucket_path, tables):
+    """
+    Bring the loaded SciSciNet tables and the Disruption tables up to date with a new
+    release, rewriting only the rows that depend on changed keys.
+
+    Args:
+        bucket_path (str): GCS folder of the new release
+        tables (dict): {parquet file name: table name}, as in load_perquate_to_bq.py
+    """
+    start_time = time.time()
+    for dataset in (STAGING_DATASET, DELTA_DATASET):
+        client.create_dataset(f"{BIGQUERY_PROJECT}.{dataset}", exists_ok=True)
+
+    stage_release(bucket_path, tables)
+    counts = {table: diff_table(table) for table in tables.values()}
+    for table in tables.values():
+        client.delete_table(_staging_table(table), not_found_ok=True)
+    if not any(sum(table_counts.values()) for table_counts in counts.values()):
+        print("The new release has no changes.")
+        return
+    if sum(counts.get("SciSciNet_Fields", {}).values()):
+        # The index must not outlive the field tables it was built from
+        client.delete_table(_derived_table("Field_Ancestors"), not_found_ok=True)
+        raise ValueError(
+            "SciSciNet_Fields differs from the loaded table, and the field-dependent tables "
+            "(Field_Ancestors, paper_top_fields, disruption_analysis) cannot be updated "
+            "incrementally. Nothing was merged and Field_Ancestors was dropped. Run load_perquate_to_bq.py without --delta and "
+            "prepare_disruption_tables.py for a full rebuild."
+        )
+
+    for table, table_counts in counts.items():
+        if sum(table_counts.values()):
+            merge_changes(table)
+
+    changed_fields = None
+    if sum(counts.get("SciSciNet_PaperFields", {}).values()):
+        changed_fields = refresh_field_ancestors()
+    keys = collect_affected_keys(changed_fields)
+    update_debut_years(keys["affected_authors"])
+    update_derived_tables(keys)
+    clean_updated_rows(keys)
+    create_distribution_sketches()
+
+    # Row counts from table metadata only; clean_data re-collects the predicate counts and
+    # column statistics it needs on its next run
+    for table, table_counts in counts.items():
+        if sum(table_counts.values()):
+            fresh_table_entry(client, _source_table(table))
+    for table in ("Authorships", "paper_reference_metrics", "disruption_analysis", "All_Yearly_Author_Profiles"):
+        fresh_table_entry(client, _derived_table(table))
+
+    print(
+        f"Incremental update completed in {round((time.time() - start_time) / 60, 2)} minutes. "
+        f"The change sets are kept in {DELTA_DATASET}."
+    )
+    print(
+        "Team familiarity of new papers stays NULL until team_familiarity.py is rerun after a "
+        "full build."
+    )
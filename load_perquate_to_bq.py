@@ -1,5 +1,9 @@
+import argparse
+
 from google.cloud import bigquery
 
+from column_stats import fresh_table_entry
+
 GCP_PROJECT_NAME = "scisci-cssai-usf"  # replace this with your GCP project name
 DATASET_NAME = "SciSciNet"
 BUCKET_PATH = "gs://sciscinet-neo/v2"
@@ -13,11 +17,30 @@ tables = {
     "sciscinet_paperrefs.parquet": "SciSciNet_PaperReferences",
 }
 
+parser = argparse.ArgumentParser(description="Load a SciSciNet release into BigQuery.")
+parser.add_argument(
+    "--delta",
+    action="store_true",
+    help="Merge only the changes of a new release and update the derived tables incrementally",
+)
+parser.add_argument(
+    "--release-path",
+    default=BUCKET_PATH,
+    help=f"GCS folder with the sciscinet_*.parquet files of the release (default: {BUCKET_PATH})",
+)
+args = parser.parse_args()
+
+if args.delta:
+    from incremental_update import ingest_release
+
+    ingest_release(args.release_path, tables)
+    raise SystemExit
+
 print(f"BigQuery version: {bigquery.__version__}")
 client = bigquery.Client(project=GCP_PROJECT_NAME)
 
 for parquet_file, bq_table_name in tables.items():
-    uri = f"{BUCKET_PATH}/{parquet_file}"
+    uri = f"{args.release_path}/{parquet_file}"
     print(f"Submitting load job for {parquet_file} into {bq_table_name}...")
 
     job_config = bigquery.LoadJobConfig(
@@ -99,6 +122,13 @@ try:
 except Exception as e:
     print(f"Error updating debut_year: {e}")
 
+# Record the row counts of the loaded tables from their metadata; no column is scanned
+for bq_table_name in tables.values():
+    try:
+        fresh_table_entry(client, f"{GCP_PROJECT_NAME}.{DATASET_NAME}.{bq_table_name}")
+    except Exception as e:
+        print(f"Error recording statistics for {bq_table_name}: {e}")
+
 # Schema display section
 print("\n" + "=" * 80)
 print("TABLE SCHEMAS")
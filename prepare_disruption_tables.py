@@ -1,60 +1,524 @@
 import os
 import time
+
 from google.cloud import bigquery
 
-## Constants
-BIGQUERY_PROJECT = "scisci-cssai-usf"  # replace this with your GCP project name
-SCISCINET_DATASET = "SciSciNet"
-DISRUPTION_DATASET = "Disruption"
+from column_stats import (
+    catalog_row_count,
+    estimate_selectivity,
+    fresh_table_entry,
+    tracked_count,
+)
+from config import BIGQUERY_PROJECT, DISRUPTION_DATASET, MAX_YEAR, MIN_YEAR, SCISCINET_DATASET
+from distribution_sketches import create_distribution_sketches
+from gcp_clients import lazy_bigquery_client
 
-MIN_YEAR = 1961
-MAX_YEAR = 2020
+## Constants
+FIELD_TOP_K = 3  # number of fields kept per paper in paper_top_fields
+ROLLING_WINDOWS = (3, 5, 10)  # trailing windows (in years) for author profile metrics
+AUTHORSHIP_FIRST_YEAR = 1800  # first yearly partition of the Authorships table
+
+# Approximate mode, enabled with DISRUPTION_APPROXIMATE=1: the per-paper reference medians use
+# APPROX_QUANTILES in the reference GROUP BY instead of a PERCENTILE_CONT window over every
+# reference. All other stages are exact in both modes, so the mode only saves the window sort in
+# add_reference_metrics. Mergeable distributions of disruption, citation_count and C10 come from
+# disruption_histograms (distribution_sketches.py) in both modes.
+APPROXIMATE = os.environ.get("DISRUPTION_APPROXIMATE", "0") == "1"
+
+# Columns that add_reference_metrics adds to disruption_analysis
+REFERENCE_METRIC_COLUMNS = (
+    "avg_reference_age",
+    "median_reference_age",
+    "std_reference_age",
+    "avg_reference_popularity",
+    "median_reference_popularity",
+    "std_reference_popularity",
+)
+
+# Row filters applied by clean_data, in order. They are also tracked in the column statistics
+# catalog, so their counts are known before the DELETE statements run.
+CLEANING_RULES = {
+    "quality": "disruption IS NULL OR doi IS NULL OR team_size IS NULL OR team_size = 0",
+    "author_counts": "first_time_author_count + early_career_author_count + mid_career_author_count + senior_author_count != team_size",
+    "author_ratios": "ABS((first_time_author_ratio + early_career_author_ratio + mid_career_author_ratio + senior_author_ratio) - 1.0) >= 0.001",
+}
+# Author-year profiles that mark an author as problematic
+PROBLEMATIC_AUTHOR_RULES = {
+    "new_author_over_10_papers": "is_new_author = TRUE AND paper_count_in_year > 10",
+    "over_50_papers_in_year": "paper_count_in_year > 50",
+    "career_age_over_80": "career_age > 80",
+    "over_1000_prior_papers": "paper_count_in_prev_years > 1000",
+}
+# Column predicates of the quality rule, used by clean_data to cross-check the catalog's
+# selectivity estimate. Column statistics are only collected for these columns.
+QUALITY_ESTIMATE_PREDICATES = [
+    ("disruption", "is_null", None),
+    ("doi", "is_null", None),
+    ("team_size", "is_null", None),
+    ("team_size", "eq", 0),
+]
+QUALITY_ESTIMATE_COLUMNS = tuple(dict.fromkeys(column for column, _, _ in QUALITY_ESTIMATE_PREDICATES))
+
+# Authors removed by clean_data, kept for incremental updates (see incremental_update.py)
+PROBLEMATIC_AUTHORS_TABLE = f"{BIGQUERY_PROJECT}.{DISRUPTION_DATASET}.problematic_authors"
 
 os.environ["GOOGLE_CLOUD_PROJECT"] = BIGQUERY_PROJECT
-client = bigquery.Client()
+client = lazy_bigquery_client(BIGQUERY_PROJECT)
 
 
-def create_author_profiles(year):
+def key_condition(column, key_table, key="paperid"):
     """
-    This function creates a new table called temp_author_profile_{year} which stores each authors
-    previous track record.
+    SQL condition restricting `column` to the `key` values in `key_table`, used by the
+    incremental updates (see incremental_update.py). Without a key table it is TRUE.
     """
-    print(f"Creating author profiles for papers before {year}...")
+    if key_table is None:
+        return "TRUE"
+    return f"{column} IN (SELECT {key} FROM `{key_table}`)"
+
+
+def _authorships_query(paper_filter=None):
+    return f"""
+    SELECT 
+        pa.paperid,
+        pa.authorid,
+        p.year,
+        ANY_VALUE(pa.author_position) AS author_position,
+        ARRAY_AGG(DISTINCT pa.institutionid IGNORE NULLS) AS institutionids,
+        ANY_VALUE(p.citation_count) AS citation_count,
+        ANY_VALUE(p.C5) AS C5,
+        ANY_VALUE(p.disruption) AS disruption
+    FROM `{BIGQUERY_PROJECT}.{SCISCINET_DATASET}.SciSciNet_PaperAuthorAffiliations` pa
+    JOIN `{BIGQUERY_PROJECT}.{SCISCINET_DATASET}.SciSciNet_Papers` p 
+        ON p.paperid = pa.paperid
+    WHERE {key_condition("pa.paperid", paper_filter)}
+    GROUP BY pa.paperid, pa.authorid, p.year
+    """
+
+
+def create_authorships_table():
+    """
+    Create the Authorships fact table with one row per (paperid, authorid).
+    Each row holds the paper year, the author position, the author's distinct institutions
+    on that paper, and the paper metrics used by the profiles. Multiple institutions per
+    authorship are folded into the institutionids array, so downstream stages no longer
+    need COUNT(DISTINCT ...) or a join back to SciSciNet_Papers. The table is partitioned
+    by year and clustered by authorid.
+    """
+    print("Creating Authorships table...")
+
+    query = f"""
+    CREATE OR REPLACE TABLE `{BIGQUERY_PROJECT}.{DISRUPTION_DATASET}.Authorships`
+    PARTITION BY RANGE_BUCKET(year, GENERATE_ARRAY({AUTHORSHIP_FIRST_YEAR}, {MAX_YEAR + 1}, 1))
+    CLUSTER BY authorid AS{_authorships_query()}"""
+
+    print("Executing BigQuery query for creating Authorships...")
+    query_job = client.query(query)
+    query_job.result()
+    print(f"Table {BIGQUERY_PROJECT}.{DISRUPTION_DATASET}.Authorships created successfully.")
+
+    fresh_table_entry(client, f"{BIGQUERY_PROJECT}.{DISRUPTION_DATASET}.Authorships")
 
-    temp_table_name = (
-        f"{BIGQUERY_PROJECT}.{DISRUPTION_DATASET}.temp_author_profile_{year}"
+
+def _citation_year_index_query(paper_filter=None):
+    return f"""
+    SELECT 
+        cited_paperid,
+        GREATEST(year, COALESCE(ref_year, year)) AS year,
+        COUNT(*) AS citations
+    FROM `{BIGQUERY_PROJECT}.{SCISCINET_DATASET}.SciSciNet_PaperReferences`
+    WHERE year IS NOT NULL
+        AND {key_condition("cited_paperid", paper_filter)}
+    GROUP BY cited_paperid, GREATEST(year, COALESCE(ref_year, year))
+    """
+
+
+def create_citation_year_index():
+    """
+    Create Paper_Citation_Counts_By_Year with one row per (cited paper, citing year), holding
+    the citations received in that year. Citing years earlier than the cited paper's year
+    (data errors) are counted in the cited paper's year, so running totals are non-decreasing
+    from publication onwards. Author_Yearly_Prefix_Sums accumulates the per-year counts, and
+    the offline citation_index.py tool computes its own cumulative counts from them.
+    """
+    print("Creating Paper_Citation_Counts_By_Year table...")
+
+    query = f"""
+    CREATE OR REPLACE TABLE `{BIGQUERY_PROJECT}.{DISRUPTION_DATASET}.Paper_Citation_Counts_By_Year`
+    CLUSTER BY cited_paperid AS{_citation_year_index_query()}"""
+
+    print("Executing BigQuery query for creating Paper_Citation_Counts_By_Year...")
+    query_job = client.query(query)
+    query_job.result()
+    print(
+        f"Table {BIGQUERY_PROJECT}.{DISRUPTION_DATASET}.Paper_Citation_Counts_By_Year created successfully."
     )
 
-    client = bigquery.Client(project=BIGQUERY_PROJECT)
-    try:
-        client.get_table(temp_table_name)
-        print(f"Temporary table {temp_table_name} already exists. Deleting it...")
-        client.delete_table(temp_table_name)
-        print(f"Temporary table {temp_table_name} deleted.")
-    except Exception:
-        print(f"Temporary table {temp_table_name} does not exist. Creating it...")
+
+def _author_prefix_sums_query(author_filter=None):
+    first_lookup_year = MIN_YEAR - 1 - max(ROLLING_WINDOWS)
+    return f"""
+    WITH AuthorYearStats AS (
+        SELECT 
+            authorid,
+            year,
+            COUNT(*) AS paper_count,
+            COALESCE(SUM(citation_count), 0) AS citation_sum,
+            COUNT(citation_count) AS citation_n,
+            COALESCE(SUM(C5), 0) AS c5_sum,
+            COUNT(C5) AS c5_n,
+            COALESCE(SUM(disruption), 0) AS disruption_sum,
+            COUNT(disruption) AS disruption_n,
+            0 AS citations_as_of,
+            0 AS c5_as_of
+        FROM `{BIGQUERY_PROJECT}.{DISRUPTION_DATASET}.Authorships`
+        WHERE year < {MAX_YEAR}
+            AND {key_condition("authorid", author_filter, "authorid")}
+        GROUP BY authorid, year
+    ),
+    -- Citations to each author's papers by the year they were received;
+    -- C5 only counts those received within 5 years of publication
+    AuthorCitationYears AS (
+        SELECT 
+            au.authorid,
+            c.year,
+            0 AS paper_count, 0 AS citation_sum, 0 AS citation_n, 0 AS c5_sum, 0 AS c5_n,
+            0 AS disruption_sum, 0 AS disruption_n,
+            SUM(c.citations) AS citations_as_of,
+            SUM(IF(c.year <= au.year + 5, c.citations, 0)) AS c5_as_of
+        FROM `{BIGQUERY_PROJECT}.{DISRUPTION_DATASET}.Authorships` au
+        JOIN `{BIGQUERY_PROJECT}.{DISRUPTION_DATASET}.Paper_Citation_Counts_By_Year` c
+            ON c.cited_paperid = au.paperid
+        WHERE c.year < {MAX_YEAR}
+            AND {key_condition("au.authorid", author_filter, "authorid")}
+        GROUP BY au.authorid, c.year
+    ),
+    -- Zero rows for every looked-up year so that each (author, year) has a prefix row
+    Grid AS (
+        SELECT 
+            authorid,
+            year,
+            0 AS paper_count, 0 AS citation_sum, 0 AS citation_n, 0 AS c5_sum, 0 AS c5_n,
+            0 AS disruption_sum, 0 AS disruption_n, 0 AS citations_as_of, 0 AS c5_as_of
+        FROM (
+            SELECT authorid, MIN(year) AS first_year 
+            FROM AuthorYearStats 
+            GROUP BY authorid
+        ),
+        UNNEST(GENERATE_ARRAY(GREATEST(first_year, {first_lookup_year}), {MAX_YEAR - 1})) AS year
+    ),
+    Combined AS (
+        SELECT 
+            authorid,
+            year,
+            SUM(paper_count) AS paper_count,
+            SUM(citation_sum) AS citation_sum,
+            SUM(citation_n) AS citation_n,
+            SUM(c5_sum) AS c5_sum,
+            SUM(c5_n) AS c5_n,
+            SUM(disruption_sum) AS disruption_sum,
+            SUM(disruption_n) AS disruption_n,
+            SUM(citations_as_of) AS citations_as_of,
+            SUM(c5_as_of) AS c5_as_of
+        FROM (
+            SELECT * FROM AuthorYearStats
+            UNION ALL SELECT * FROM AuthorCitationYears
+            UNION ALL SELECT * FROM Grid
+        )
+        GROUP BY authorid, year
+    )
+    SELECT * FROM (
+        SELECT 
+            authorid,
+            year,
+            SUM(paper_count) OVER w AS cum_paper_count,
+            SUM(citation_sum) OVER w AS cum_citation_sum,
+            SUM(citation_n) OVER w AS cum_citation_n,
+            SUM(c5_sum) OVER w AS cum_c5_sum,
+            SUM(c5_n) OVER w AS cum_c5_n,
+            SUM(disruption_sum) OVER w AS cum_disruption_sum,
+            SUM(disruption_n) OVER w AS cum_disruption_n,
+            SUM(citations_as_of) OVER w AS cum_citations_as_of,
+            SUM(c5_as_of) OVER w AS cum_c5_as_of
+        FROM Combined
+        WINDOW w AS (PARTITION BY authorid ORDER BY year ROWS UNBOUNDED PRECEDING)
+    )
+    WHERE year >= {first_lookup_year}
+    """
+
+
+def create_author_prefix_sums():
+    """
+    Create Author_Yearly_Prefix_Sums, which holds each author's running totals of papers,
+    citations, C5 and disruption up to and including each year. Rows are dense from
+    MIN_YEAR - 1 - max(ROLLING_WINDOWS) to MAX_YEAR - 1, so the total over any trailing
+    window is one subtraction of two rows: prefix(year - 1) - prefix(year - 1 - N).
+    cum_citations_as_of and cum_c5_as_of count only citations received up to each year,
+    from Paper_Citation_Counts_By_Year (see create_citation_year_index), instead of
+    today's citation_count and C5 snapshot. The table is partitioned by year and clustered by
+    authorid, so each profile year reads one partition per prefix row it joins.
+    """
+    print("Creating Author_Yearly_Prefix_Sums table...")
 
     query = f"""
-    CREATE OR REPLACE TABLE `{temp_table_name}` AS
-    WITH AuthorPaperCount AS (
+    CREATE OR REPLACE TABLE `{BIGQUERY_PROJECT}.{DISRUPTION_DATASET}.Author_Yearly_Prefix_Sums`
+    PARTITION BY RANGE_BUCKET(year, GENERATE_ARRAY({AUTHORSHIP_FIRST_YEAR}, {MAX_YEAR + 1}, 1))
+    CLUSTER BY authorid AS{_author_prefix_sums_query()}"""
+
+    print("Executing BigQuery query for creating Author_Yearly_Prefix_Sums...")
+    query_job = client.query(query)
+    query_job.result()
+    print(
+        f"Table {BIGQUERY_PROJECT}.{DISRUPTION_DATASET}.Author_Yearly_Prefix_Sums created successfully."
+    )
+
+
+def _institution_profiles_query(institution_filter=None):
+    return f"""
+    WITH InstitutionPapers AS (
+        SELECT 
+            institutionid,
+            paperid,
+            ANY_VALUE(year) AS year,
+            ANY_VALUE(citation_count) AS citation_count,
+            ANY_VALUE(disruption) AS disruption
+        FROM `{BIGQUERY_PROJECT}.{DISRUPTION_DATASET}.Authorships`,
+            UNNEST(institutionids) AS institutionid
+        WHERE year < {MAX_YEAR}
+            AND {key_condition("institutionid", institution_filter, "institutionid")}
+        GROUP BY institutionid, paperid
+    ),
+    InstitutionYearStats AS (
+        SELECT 
+            institutionid,
+            year,
+            COUNT(*) AS paper_count,
+            COALESCE(SUM(citation_count), 0) AS citation_sum,
+            COUNT(citation_count) AS citation_n,
+            COALESCE(SUM(disruption), 0) AS disruption_sum,
+            COUNT(disruption) AS disruption_n
+        FROM InstitutionPapers
+        GROUP BY institutionid, year
+    ),
+    ActiveAuthors AS (
+        SELECT 
+            institutionid,
+            year,
+            COUNT(DISTINCT authorid) AS active_author_count
+        FROM `{BIGQUERY_PROJECT}.{DISRUPTION_DATASET}.Authorships`,
+            UNNEST(institutionids) AS institutionid
+        WHERE year BETWEEN {MIN_YEAR - 1} AND {MAX_YEAR - 1}
+            AND {key_condition("institutionid", institution_filter, "institutionid")}
+        GROUP BY institutionid, year
+    ),
+    -- Zero rows for every looked-up year so that each (institution, year) has a prefix row
+    Grid AS (
+        SELECT 
+            institutionid,
+            year,
+            0 AS paper_count, 0 AS citation_sum, 0 AS citation_n, 0 AS disruption_sum, 0 AS disruption_n
+        FROM (
+            SELECT institutionid, MIN(year) AS first_year 
+            FROM InstitutionYearStats 
+            GROUP BY institutionid
+        ),
+        UNNEST(GENERATE_ARRAY(GREATEST(first_year, {MIN_YEAR - 1}), {MAX_YEAR - 1})) AS year
+    ),
+    PrefixSums AS (
+        SELECT 
+            institutionid,
+            year,
+            SUM(SUM(paper_count)) OVER w AS cum_paper_count,
+            SUM(SUM(citation_sum)) OVER w AS cum_citation_sum,
+            SUM(SUM(citation_n)) OVER w AS cum_citation_n,
+            SUM(SUM(disruption_sum)) OVER w AS cum_disruption_sum,
+            SUM(SUM(disruption_n)) OVER w AS cum_disruption_n
+        FROM (
+            SELECT * FROM InstitutionYearStats
+            UNION ALL SELECT * FROM Grid
+        )
+        GROUP BY institutionid, year
+        WINDOW w AS (PARTITION BY institutionid ORDER BY year ROWS UNBOUNDED PRECEDING)
+    )
+    -- The profile of `year` is the prefix row of `year - 1`
+    SELECT 
+        ps.institutionid,
+        ps.year + 1 AS year,
+        ps.cum_paper_count AS prior_paper_count,
+        SAFE_DIVIDE(ps.cum_citation_sum, ps.cum_citation_n) AS prior_avg_citation_count,
+        SAFE_DIVIDE(ps.cum_disruption_sum, ps.cum_disruption_n) AS prior_avg_disruption,
+        COALESCE(aa.active_author_count, 0) AS active_author_count
+    FROM PrefixSums ps
+    LEFT JOIN ActiveAuthors aa
+        ON ps.institutionid = aa.institutionid AND ps.year = aa.year
+    WHERE ps.year >= {MIN_YEAR - 1}
+    """
+
+
+def create_institution_profiles():
+    """
+    Create Institution_Yearly_Profiles, which holds each institution's track record before
+    each year from MIN_YEAR to MAX_YEAR:
+    - prior_paper_count: distinct papers affiliated with the institution in earlier years
+    - prior_avg_citation_count / prior_avg_disruption: means over those papers
+    - active_author_count: distinct authors affiliated with it in the previous year
+    Like Author_Yearly_Prefix_Sums, the totals come from one running sum over Authorships,
+    so the paper stage looks up an institution's profile with one equality join.
+    """
+    print("Creating Institution_Yearly_Profiles table...")
+
+    query = f"""
+    CREATE OR REPLACE TABLE `{BIGQUERY_PROJECT}.{DISRUPTION_DATASET}.Institution_Yearly_Profiles`
+    PARTITION BY RANGE_BUCKET(year, GENERATE_ARRAY({MIN_YEAR}, {MAX_YEAR + 1}, 1))
+    CLUSTER BY institutionid AS{_institution_profiles_query()}"""
+
+    print("Executing BigQuery query for creating Institution_Yearly_Profiles...")
+    query_job = client.query(query)
+    query_job.result()
+    print(
+        f"Table {BIGQUERY_PROJECT}.{DISRUPTION_DATASET}.Institution_Yearly_Profiles created successfully."
+    )
+
+    fresh_table_entry(client, f"{BIGQUERY_PROJECT}.{DISRUPTION_DATASET}.Institution_Yearly_Profiles")
+
+
+def rolling_window_columns():
+    """Names of the trailing-window profile columns, e.g. avg_c5_last_5y."""
+    columns = []
+    for window in ROLLING_WINDOWS:
+        columns += [
+            f"paper_count_last_{window}y",
+            f"avg_citation_count_last_{window}y",
+            f"avg_c5_last_{window}y",
+            f"avg_disruption_last_{window}y",
+        ]
+    return columns
+
+
+def _rolling_windows_cte(year):
+    """
+    SQL for a RollingWindows CTE with one row per author who published before `year`.
+    The all-time prior metrics come from the prefix row for `year - 1`, and each trailing
+    window costs one extra equality join on Author_Yearly_Prefix_Sums. Every side filters the
+    year partitioning column on a constant before the join, so it reads a single partition.
+    """
+    prefix_table = f"{BIGQUERY_PROJECT}.{DISRUPTION_DATASET}.Author_Yearly_Prefix_Sums"
+    selects = []
+    joins = []
+    for window in ROLLING_WINDOWS:
+        w = f"w{window}"
+
+        def diff(column):
+            return f"cur.{column} - COALESCE({w}.{column}, 0)"
+
+        selects.append(
+            f"""
+            {diff('cum_paper_count')} AS paper_count_last_{window}y,
+            SAFE_DIVIDE({diff('cum_citation_sum')}, {diff('cum_citation_n')}) AS avg_citation_count_last_{window}y,
+            SAFE_DIVIDE({diff('cum_c5_sum')}, {diff('cum_c5_n')}) AS avg_c5_last_{window}y,
+            SAFE_DIVIDE({diff('cum_disruption_sum')}, {diff('cum_disruption_n')}) AS avg_disruption_last_{window}y"""
+        )
+        joins.append(
+            f"""
+        LEFT JOIN (
+            SELECT * FROM `{prefix_table}` WHERE year = {year - 1 - window}
+        ) {w}
+            ON {w}.authorid = cur.authorid"""
+        )
+
+    return f"""
+    RollingWindows AS (
         SELECT 
-            a.authorid,
-            COUNT(DISTINCT CASE WHEN p.year = {year} THEN p.paperid ELSE NULL END) AS paper_count_in_year
-        FROM `{BIGQUERY_PROJECT}.{SCISCINET_DATASET}.SciSciNet_Authors` a
-        LEFT JOIN `{BIGQUERY_PROJECT}.{SCISCINET_DATASET}.SciSciNet_PaperAuthorAffiliations` pa
-            ON a.authorid = pa.authorid 
-        LEFT JOIN `{BIGQUERY_PROJECT}.{SCISCINET_DATASET}.SciSciNet_Papers` p 
-            ON p.paperid = pa.paperid
-        GROUP BY a.authorid
+            cur.authorid,
+            cur.cum_paper_count AS paper_count_in_prev_years,
+            SAFE_DIVIDE(cur.cum_citation_sum, cur.cum_citation_n) AS avg_citation_count,
+            SAFE_DIVIDE(cur.cum_c5_sum, cur.cum_c5_n) AS avg_c5,
+            SAFE_DIVIDE(cur.cum_disruption_sum, cur.cum_disruption_n) AS avg_disruption,
+            SAFE_DIVIDE(cur.cum_citations_as_of, cur.cum_paper_count) AS avg_citation_count_as_of,
+            SAFE_DIVIDE(cur.cum_c5_as_of, cur.cum_paper_count) AS avg_c5_as_of,{','.join(selects)}
+        FROM `{prefix_table}` cur{''.join(joins)}
+        WHERE cur.year = {year - 1}
+    )"""
+
+
+def year_partition(table_name, year):
+    """Partition decorator of `year` in a year-partitioned Disruption table."""
+    return f"{BIGQUERY_PROJECT}.{DISRUPTION_DATASET}.{table_name}${year}"
+
+
+def _write_year_partition(table_name, year, query):
+    """
+    Start a query that replaces the `year` partition of `table_name` with its result.
+    WRITE_TRUNCATE on a partition decorator swaps the partition atomically, so a year can be
+    recomputed on its own without touching the other years.
+    """
+    job_config = bigquery.QueryJobConfig(
+        destination=year_partition(table_name, year),
+        write_disposition=bigquery.WriteDisposition.WRITE_TRUNCATE,
+    )
+    return client.query(query, job_config=job_config)
+
+
+def _create_year_partitioned_table(table_name, query, clustering_fields):
+    """(Re)create an empty table partitioned by year, with the schema of `query` from a dry run."""
+    table_id = f"{BIGQUERY_PROJECT}.{DISRUPTION_DATASET}.{table_name}"
+    dry_run = client.query(query, job_config=bigquery.QueryJobConfig(dry_run=True))
+    table = bigquery.Table(table_id, schema=dry_run.schema)
+    table.range_partitioning = bigquery.RangePartitioning(
+        field="year",
+        range_=bigquery.PartitionRange(start=MIN_YEAR, end=MAX_YEAR + 1, interval=1),
     )
+    table.clustering_fields = clustering_fields
+    client.delete_table(table_id, not_found_ok=True)
+    client.create_table(table)
+    print(f"Table {table_id} created with one partition per year.")
+
+
+def create_year_partitioned_tables():
+    """
+    Create the empty year-partitioned All_Yearly_Author_Profiles and paper_author_details
+    tables. The per-year jobs then write straight into their own partitions.
+    """
+    _create_year_partitioned_table(
+        "All_Yearly_Author_Profiles", _author_profiles_query(MIN_YEAR), ["authorid"]
+    )
+    _create_year_partitioned_table(
+        "paper_author_details", _paper_author_details_query(MIN_YEAR), ["paperid"]
+    )
+
+
+def _author_profiles_query(year, author_filter=None):
+    """SELECT statement for the author profiles of `year`, i.e. each author's previous track record."""
+    # Window paper counts and citation/C5 averages default to 0 like the all-time metrics,
+    # while disruption stays NULL for authors without papers in the window
+    rolling_window_selects = []
+    for column in rolling_window_columns():
+        if column.startswith("avg_disruption"):
+            rolling_window_selects.append(f"\n        rw.{column}")
+        else:
+            rolling_window_selects.append(f"\n        COALESCE(rw.{column}, 0) AS {column}")
+    rolling_window_selects = ",".join(rolling_window_selects)
+
+    # Authorships has one row per (paperid, authorid), so plain COUNT(*) counts papers
+    return f"""
+    WITH AuthorPaperCount AS (
+        SELECT 
+            authorid,
+            COUNT(*) AS paper_count_in_year
+        FROM `{BIGQUERY_PROJECT}.{DISRUPTION_DATASET}.Authorships`
+        WHERE year = {year}
+        GROUP BY authorid
+    ),{_rolling_windows_cte(year)}
     SELECT 
         a.authorid,
-        COUNT(DISTINCT p.paperid) AS paper_count_in_prev_years,
+        {year} AS year,
+        COALESCE(rw.paper_count_in_prev_years, 0) AS paper_count_in_prev_years,
         COALESCE(apc.paper_count_in_year, 0) AS paper_count_in_year,
         GREATEST({year} - a.debut_year, 0) AS career_age,
-        COALESCE(AVG(p.citation_count), 0) AS avg_citation_count,
-        COALESCE(AVG(p.C5), 0) AS avg_c5,
-        AVG(p.disruption) AS avg_disruption,
+        COALESCE(rw.avg_citation_count, 0) AS avg_citation_count,
+        COALESCE(rw.avg_c5, 0) AS avg_c5,
+        rw.avg_disruption,
+        COALESCE(rw.avg_citation_count_as_of, 0) AS avg_citation_count_as_of,
+        COALESCE(rw.avg_c5_as_of, 0) AS avg_c5_as_of,
         CASE 
             WHEN a.debut_year = {year} THEN TRUE 
             ELSE FALSE 
@@ -70,85 +534,67 @@ def create_author_profiles(year):
         CASE 
             WHEN ({year} - a.debut_year) >= 11 THEN TRUE 
             ELSE FALSE 
-        END AS is_senior_author
+        END AS is_senior_author,{rolling_window_selects}
     FROM `{BIGQUERY_PROJECT}.{SCISCINET_DATASET}.SciSciNet_Authors` a
-    LEFT JOIN `{BIGQUERY_PROJECT}.{SCISCINET_DATASET}.SciSciNet_PaperAuthorAffiliations` pa
-        ON a.authorid = pa.authorid 
-    LEFT JOIN `{BIGQUERY_PROJECT}.{SCISCINET_DATASET}.SciSciNet_Papers` p 
-        ON p.paperid = pa.paperid AND p.year < {year} -- Note: Only considering previous papers for career calculations
     LEFT JOIN AuthorPaperCount apc
         ON a.authorid = apc.authorid
-    GROUP BY a.authorid, a.debut_year, apc.paper_count_in_year
+    LEFT JOIN RollingWindows rw -- Note: Only previous papers count towards career metrics
+        ON a.authorid = rw.authorid
+    WHERE {key_condition("a.authorid", author_filter, "authorid")}
     """
 
-    print("Executing BigQuery query for creating author profiles...")
-    query_job = client.query(query)
-    return query_job, temp_table_name
-
 
-def create_all_yearly_author_profiles():
-    """
-    Create a table that combines all yearly author profiles into a single table
-    with AuthorID and Year as a composite key.
+def create_author_profiles(year):
     """
-    print("Creating All_Yearly_Author_Profiles table...")
-
-    # Start building the query
-    query = f"""
-    CREATE OR REPLACE TABLE `{BIGQUERY_PROJECT}.{DISRUPTION_DATASET}.All_Yearly_Author_Profiles` AS
+    Start the job that writes the `year` partition of All_Yearly_Author_Profiles, which stores
+    each author's previous track record.
     """
+    print(f"Creating author profiles for papers before {year}...")
+    job = _write_year_partition("All_Yearly_Author_Profiles", year, _author_profiles_query(year))
+    return job, year_partition("All_Yearly_Author_Profiles", year)
 
-    # Add UNION ALL for each year
-    for i, year in enumerate(range(MIN_YEAR, MAX_YEAR + 1)):
-        if i > 0:
-            query += "\nUNION ALL\n"
-
-        query += f"""
-        SELECT 
-            authorid,
-            {year} AS year,
-            paper_count_in_prev_years,
-            paper_count_in_year,
-            career_age,
-            avg_citation_count,
-            avg_c5,
-            avg_disruption,
-            is_new_author,
-            is_early_career_author,
-            is_mid_career_author,
-            is_senior_author
-        FROM `{BIGQUERY_PROJECT}.{DISRUPTION_DATASET}.temp_author_profile_{year}`
-        """
-
-    # Execute the query
-    print("Executing BigQuery query for creating All_Yearly_Author_Profiles...")
-    query_job = client.query(query)
-    query_job.result()
-
-    print(
-        f"Table {BIGQUERY_PROJECT}.{DISRUPTION_DATASET}.All_Yearly_Author_Profiles created successfully."
-    )
 
-    # Get row count for validation
-    count_query = f"""
-    SELECT COUNT(*) as row_count 
-    FROM `{BIGQUERY_PROJECT}.{DISRUPTION_DATASET}.All_Yearly_Author_Profiles`
+def create_all_author_profiles():
     """
-    count_job = client.query(count_query)
-    results = count_job.result()
-
-    for row in results:
-        print(f"Total rows in All_Yearly_Author_Profiles: {row.row_count}")
+    Write every year partition of All_Yearly_Author_Profiles with concurrent jobs, then record
+    its column statistics with the PROBLEMATIC_AUTHOR_RULES counts that clean_data reads.
 
+    Returns:
+        dict: Catalog entry of All_Yearly_Author_Profiles
+    """
+    # Start all author profile jobs concurrently, each writing its own year partition
+    print("Starting all author profile creation jobs...")
+    author_profile_jobs = {}
+    for year in range(MIN_YEAR, MAX_YEAR + 1):
+        author_profile_jobs[year] = create_author_profiles(year)
+        print(f"Started author profile job for year {year}")
 
-def create_paper_author_details(year):
-    """This function creates a table with details about paper's author level metrics for a specific year."""
-    temp_author_profile_table = (
-        f"{BIGQUERY_PROJECT}.{DISRUPTION_DATASET}.temp_author_profile_{year}"
+    # Wait for all author profile jobs to complete
+    print("Waiting for all author profile jobs to complete...")
+    for year, (job, partition) in author_profile_jobs.items():
+        job.result()  # Wait for completion
+        print(f"Author profile job for year {year} completed: {partition}")
+
+    # Row count (table metadata) and problematic-author counts for validation; the counts are
+    # reused by clean_data while the table is unchanged
+    entry = fresh_table_entry(
+        client,
+        f"{BIGQUERY_PROJECT}.{DISRUPTION_DATASET}.All_Yearly_Author_Profiles",
+        PROBLEMATIC_AUTHOR_RULES,
     )
+    print(f"Total rows in All_Yearly_Author_Profiles: {entry['row_count']}")
+    return entry
+
 
-    create_query = f"""
-    CREATE OR REPLACE TABLE `{BIGQUERY_PROJECT}.{DISRUPTION_DATASET}.paper_author_details_{year}` AS
+def _paper_author_details_query(year, paper_filter=None):
+    """
+    SELECT statement for the paper-level author metrics of papers published in `year`.
+    The institutional features (max/avg of the affiliated institutions' prior output) come
+    from one join on the `year` rows of Institution_Yearly_Profiles.
+    The institution list is deduplicated for the profile join anyway, so institution_count
+    is an exact row count.
+    """
+    return f"""
     WITH AuthorDetails AS (
         SELECT 
             pa.paperid,
@@ -158,19 +604,46 @@ def create_paper_author_details(year):
             COALESCE(ap.avg_citation_count, 0) AS avg_citation_count,
             COALESCE(ap.avg_c5, 0) AS avg_c5,
             COALESCE(ap.avg_disruption, 0) AS avg_disruption,
+            COALESCE(ap.avg_citation_count_as_of, 0) AS avg_citation_count_as_of,
+            COALESCE(ap.avg_c5_as_of, 0) AS avg_c5_as_of,
             COALESCE(ap.is_new_author, FALSE) AS is_new_author,
             COALESCE(ap.is_early_career_author, FALSE) AS is_early_career_author,
             COALESCE(ap.is_mid_career_author, FALSE) AS is_mid_career_author,
-            COALESCE(ap.is_senior_author, FALSE) AS is_senior_author,
-            pa.institutionid
-        FROM `{BIGQUERY_PROJECT}.{SCISCINET_DATASET}.SciSciNet_PaperAuthorAffiliations` pa
-        JOIN `{BIGQUERY_PROJECT}.{SCISCINET_DATASET}.SciSciNet_Papers` p 
-            ON p.paperid = pa.paperid AND p.year = {year}
-        LEFT JOIN `{temp_author_profile_table}` ap
-            ON pa.authorid = ap.authorid
+            COALESCE(ap.is_senior_author, FALSE) AS is_senior_author
+        FROM `{BIGQUERY_PROJECT}.{DISRUPTION_DATASET}.Authorships` pa
+        LEFT JOIN `{BIGQUERY_PROJECT}.{DISRUPTION_DATASET}.All_Yearly_Author_Profiles` ap
+            ON pa.authorid = ap.authorid AND ap.year = {year}
+        WHERE pa.year = {year}
+            AND {key_condition("pa.paperid", paper_filter)}
+    ),
+    PaperInstitutionList AS (
+        SELECT DISTINCT
+            paperid,
+            institutionid
+        FROM `{BIGQUERY_PROJECT}.{DISRUPTION_DATASET}.Authorships`,
+            UNNEST(institutionids) AS institutionid
+        WHERE year = {year}
+            AND {key_condition("paperid", paper_filter)}
+    ),
+    -- Team-level institutional features from the profiles of the affiliated institutions
+    PaperInstitutions AS (
+        SELECT 
+            pil.paperid,
+            COUNT(*) AS institution_count,
+            MAX(COALESCE(ip.prior_paper_count, 0)) AS max_institution_prior_paper_count,
+            AVG(COALESCE(ip.prior_paper_count, 0)) AS avg_institution_prior_paper_count,
+            AVG(ip.prior_avg_citation_count) AS avg_institution_citation_count,
+            AVG(ip.prior_avg_disruption) AS avg_institution_disruption,
+            MAX(COALESCE(ip.active_author_count, 0)) AS max_institution_active_authors,
+            AVG(COALESCE(ip.active_author_count, 0)) AS avg_institution_active_authors
+        FROM PaperInstitutionList pil
+        LEFT JOIN `{BIGQUERY_PROJECT}.{DISRUPTION_DATASET}.Institution_Yearly_Profiles` ip
+            ON pil.institutionid = ip.institutionid AND ip.year = {year}
+        GROUP BY pil.paperid
     )
     SELECT 
-        paperid,
+        ad.paperid,
+        {year} AS year,
         AVG(career_age) AS avg_career_age,
         STDDEV(career_age) AS std_career_age,
         MAX(career_age) AS max_career_age,
@@ -178,6 +651,8 @@ def create_paper_author_details(year):
         AVG(avg_citation_count) AS avg_citation_count,
         AVG(avg_c5) AS avg_c5,
         AVG(avg_disruption) AS avg_disruption,
+        AVG(avg_citation_count_as_of) AS avg_citation_count_as_of,
+        AVG(avg_c5_as_of) AS avg_c5_as_of,
         
         -- Calculate metrics for early career authors
         SAFE_DIVIDE(
@@ -237,59 +712,73 @@ def create_paper_author_details(year):
         COUNTIF(is_early_career_author) AS early_career_author_count,
         COUNTIF(is_mid_career_author) AS mid_career_author_count,
         COUNTIF(is_senior_author) AS senior_author_count,
-        -- Calculate author ratios
-        CASE 
-            WHEN COUNT(DISTINCT authorid) > 0 THEN 
-                COUNTIF(is_new_author) / COUNT(DISTINCT authorid)
-            ELSE 0
-        END AS first_time_author_ratio,
-        CASE 
-            WHEN COUNT(DISTINCT authorid) > 0 THEN 
-                COUNTIF(is_early_career_author) / COUNT(DISTINCT authorid)
-            ELSE 0
-        END AS early_career_author_ratio,
-        CASE 
-            WHEN COUNT(DISTINCT authorid) > 0 THEN 
-                COUNTIF(is_mid_career_author) / COUNT(DISTINCT authorid)
-            ELSE 0
-        END AS mid_career_author_ratio,
-        CASE 
-            WHEN COUNT(DISTINCT authorid) > 0 THEN 
-                COUNTIF(is_senior_author) / COUNT(DISTINCT authorid)
-            ELSE 0
-        END AS senior_author_ratio,
-        COUNT(DISTINCT institutionid) / NULLIF(COUNT(DISTINCT authorid), 0) AS affiliation_author_ratio
-    FROM AuthorDetails
-    GROUP BY paperid
+        -- Calculate author ratios (AuthorDetails has one row per author, so COUNT(*) is the team size)
+        COUNTIF(is_new_author) / COUNT(*) AS first_time_author_ratio,
+        COUNTIF(is_early_career_author) / COUNT(*) AS early_career_author_ratio,
+        COUNTIF(is_mid_career_author) / COUNT(*) AS mid_career_author_ratio,
+        COUNTIF(is_senior_author) / COUNT(*) AS senior_author_ratio,
+        COALESCE(ANY_VALUE(pi.institution_count), 0) / COUNT(*) AS affiliation_author_ratio,
+        ANY_VALUE(pi.max_institution_prior_paper_count) AS max_institution_prior_paper_count,
+        ANY_VALUE(pi.avg_institution_prior_paper_count) AS avg_institution_prior_paper_count,
+        ANY_VALUE(pi.avg_institution_citation_count) AS avg_institution_citation_count,
+        ANY_VALUE(pi.avg_institution_disruption) AS avg_institution_disruption,
+        ANY_VALUE(pi.max_institution_active_authors) AS max_institution_active_authors,
+        ANY_VALUE(pi.avg_institution_active_authors) AS avg_institution_active_authors
+    FROM AuthorDetails ad
+    LEFT JOIN PaperInstitutions pi
+        ON ad.paperid = pi.paperid
+    GROUP BY ad.paperid
     """
 
-    print(f"Creating paper_author_details_{year} table...")
-    create_job = client.query(create_query)
-    return create_job
 
+def create_paper_author_details(year):
+    """Start the job that writes the `year` partition of paper_author_details."""
+    print(f"Creating paper_author_details partition for {year}...")
+    return _write_year_partition("paper_author_details", year, _paper_author_details_query(year))
 
-def create_combined_data_table():
-    combine_author_details_query = f"""
-    CREATE OR REPLACE TABLE `{BIGQUERY_PROJECT}.{DISRUPTION_DATASET}.paper_author_details` AS
-    """
 
+def create_all_paper_author_details():
+    """Write every year partition of paper_author_details with concurrent jobs."""
+    # Start all paper author details jobs concurrently
+    print("Starting all paper author details jobs...")
+    paper_author_detail_jobs = {}
     for year in range(MIN_YEAR, MAX_YEAR + 1):
-        if year == MIN_YEAR:
-            combine_author_details_query += f"""
-            SELECT * FROM `{BIGQUERY_PROJECT}.{DISRUPTION_DATASET}.paper_author_details_{year}`
-            """
-        else:
-            combine_author_details_query += f"""
-            UNION ALL
-            SELECT * FROM `{BIGQUERY_PROJECT}.{DISRUPTION_DATASET}.paper_author_details_{year}`
-            """
+        job = create_paper_author_details(year)
+        paper_author_detail_jobs[year] = job
+        print(f"Started paper author details job for year {year}")
+
+    # Wait for all paper author details jobs to complete
+    print("Waiting for all paper author details jobs to complete...")
+    for year, job in paper_author_detail_jobs.items():
+        job.result()  # Wait for completion
+        print(f"Paper author details job for year {year} completed")
 
-    print("Combining author details tables...")
-    combine_job = client.query(combine_author_details_query)
-    combine_job.result()
 
-    final_table_query = f"""
-    CREATE OR REPLACE TABLE `{BIGQUERY_PROJECT}.{DISRUPTION_DATASET}.disruption_analysis` AS
+def recompute_year(year):
+    """
+    Rewrite the `year` partitions of All_Yearly_Author_Profiles and paper_author_details.
+    The partitions are written unfiltered, so this is only valid before clean_data: after it,
+    the rewrite would bring back problematic authors and leave disruption_analysis out of sync.
+    Run the full pipeline (or an incremental update) instead once the data has been cleaned.
+    """
+    profiles_table = f"{BIGQUERY_PROJECT}.{DISRUPTION_DATASET}.All_Yearly_Author_Profiles"
+    try:
+        cleaned_at = client.get_table(PROBLEMATIC_AUTHORS_TABLE).modified
+    except Exception:
+        cleaned_at = None
+    # clean_data rewrites problematic_authors; the profiles table is re-created by every build
+    if cleaned_at is not None and cleaned_at >= client.get_table(profiles_table).created:
+        raise RuntimeError(
+            f"clean_data has already run on {profiles_table}, so year {year} cannot be recomputed "
+            "in place. Rerun prepare_disruption_tables.py instead."
+        )
+    create_author_profiles(year)[0].result()
+    create_paper_author_details(year).result()
+
+
+def _disruption_analysis_base_query(paper_filter=None):
+    """Paper-level columns of disruption_analysis, before the reference and field columns."""
+    return f"""
     SELECT
         p.paperid,
         p.doi,
@@ -316,10 +805,18 @@ def create_combined_data_table():
         a.mid_career_author_ratio,
         a.senior_author_ratio,
         a.affiliation_author_ratio,
+        a.max_institution_prior_paper_count,
+        a.avg_institution_prior_paper_count,
+        a.avg_institution_citation_count,
+        a.avg_institution_disruption,
+        a.max_institution_active_authors,
+        a.avg_institution_active_authors,
         a.avg_paper_count,
         a.avg_citation_count,
         a.avg_c5,
         a.avg_disruption,
+        a.avg_citation_count_as_of,
+        a.avg_c5_as_of,
         -- Add new columns for career stage-specific metrics
         a.early_author_avg_paper_count,
         a.early_author_avg_citation_count,
@@ -341,8 +838,15 @@ def create_combined_data_table():
         p.paperid = a.paperid
     WHERE is_retracted is False
     AND year between {MIN_YEAR} AND {MAX_YEAR}
+    AND {key_condition("p.paperid", paper_filter)}
     """
 
+
+def create_combined_data_table():
+    """Create disruption_analysis from SciSciNet_Papers and the paper_author_details partitions."""
+    final_table_query = f"""
+    CREATE OR REPLACE TABLE `{BIGQUERY_PROJECT}.{DISRUPTION_DATASET}.disruption_analysis` AS{_disruption_analysis_base_query()}"""
+
     print("Creating final disruption_analysis table...")
     final_job = client.query(final_table_query)
     final_job.result()
@@ -352,22 +856,14 @@ def create_combined_data_table():
     )
 
 
-def add_reference_metrics():
-    """
-    Add comprehensive reference metrics to the disruption_analysis table:
-    - avg_reference_age: Average age of references cited by a paper
-    - median_reference_age: Median age of references cited by a paper
-    - std_reference_age: Standard deviation of reference ages
-    - avg_reference_popularity: Average citations of references cited by a paper
-    - median_reference_popularity: Median citations of references cited by a paper
-    - std_reference_popularity: Standard deviation of reference citation counts
-    """
-    print("Adding comprehensive reference metrics to disruption_analysis table...")
+def _reference_metric_columns():
+    """disruption_analysis reference columns from paper_reference_metrics rm (0 without references)."""
+    return ",\n".join(f"      COALESCE(rm.{column}, 0) AS {column}" for column in REFERENCE_METRIC_COLUMNS)
 
-    # Create temporary table with reference metrics
-    reference_metrics_query = f"""
-    CREATE OR REPLACE TABLE `{BIGQUERY_PROJECT}.{DISRUPTION_DATASET}.paper_reference_metrics` AS
-    WITH CitationData AS (
+
+def _citation_data_cte(paper_filter=None):
+    """CitationData CTE: age and popularity of every reference of the filtered citing papers."""
+    return f"""CitationData AS (
       SELECT
         pr.citing_paperid,
         pr.year_diff AS reference_age,
@@ -382,7 +878,27 @@ def add_reference_metrics():
         pr.year_diff IS NOT NULL 
         AND pr.year_diff >= 0  -- Ensure positive reference age
         AND cited.citation_count IS NOT NULL
-    ),
+        AND {key_condition("pr.citing_paperid", paper_filter)}
+    )"""
+
+
+def _reference_metrics_query(approximate=APPROXIMATE, paper_filter=None):
+    # Both modes return FLOAT64 medians, so the column types do not depend on the mode
+    if approximate:
+        metrics_select = """
+    SELECT
+      citing_paperid,
+      AVG(reference_age) AS avg_reference_age,
+      CAST(APPROX_QUANTILES(reference_age, 2)[OFFSET(1)] AS FLOAT64) AS median_reference_age,
+      STDDEV(reference_age) AS std_reference_age,
+      AVG(citation_count) AS avg_reference_popularity,
+      CAST(APPROX_QUANTILES(citation_count, 2)[OFFSET(1)] AS FLOAT64) AS median_reference_popularity,
+      STDDEV(citation_count) AS std_reference_popularity
+    FROM CitationData
+    GROUP BY citing_paperid
+    """
+    else:
+        metrics_select = """,
     AggregatedMetrics AS (
       SELECT
         citing_paperid,
@@ -410,31 +926,51 @@ def add_reference_metrics():
       a.std_reference_popularity
     FROM AggregatedMetrics a
     JOIN MedianMetrics m
-    ON a.citing_paperid = m.citing_paperid;
+    ON a.citing_paperid = m.citing_paperid
+    """
+
+    return f"""
+    WITH {_citation_data_cte(paper_filter)}{metrics_select}"""
+
+
+def add_reference_metrics(approximate=APPROXIMATE):
+    """
+    Add comprehensive reference metrics to the disruption_analysis table:
+    - avg_reference_age: Average age of references cited by a paper
+    - median_reference_age: Median age of references cited by a paper
+    - std_reference_age: Standard deviation of reference ages
+    - avg_reference_popularity: Average citations of references cited by a paper
+    - median_reference_popularity: Median citations of references cited by a paper
+    - std_reference_popularity: Standard deviation of reference citation counts
+    With `approximate`, the medians come from APPROX_QUANTILES in the same GROUP BY instead of
+    PERCENTILE_CONT windows (the lower median rather than the interpolated one for even counts),
+    cast to FLOAT64 like the exact ones.
     """
+    print("Adding comprehensive reference metrics to disruption_analysis table...")
+
+    # Create temporary table with reference metrics
+    reference_metrics_query = f"""
+    CREATE OR REPLACE TABLE `{BIGQUERY_PROJECT}.{DISRUPTION_DATASET}.paper_reference_metrics` AS{_reference_metrics_query(approximate)}"""
 
     print("Creating paper_reference_metrics table...")
     reference_metrics_job = client.query(reference_metrics_query)
     reference_metrics_job.result()
     print("paper_reference_metrics table created successfully.")
 
+    fresh_table_entry(client, f"{BIGQUERY_PROJECT}.{DISRUPTION_DATASET}.paper_reference_metrics")
+
     # Now update the disruption_analysis table to include these metrics
     update_query = f"""
     CREATE OR REPLACE TABLE `{BIGQUERY_PROJECT}.{DISRUPTION_DATASET}.disruption_analysis` AS
     SELECT
       da.*,
-      COALESCE(rm.avg_reference_age, 0) AS avg_reference_age,
-      COALESCE(rm.median_reference_age, 0) AS median_reference_age,
-      COALESCE(rm.std_reference_age, 0) AS std_reference_age,
-      COALESCE(rm.avg_reference_popularity, 0) AS avg_reference_popularity,
-      COALESCE(rm.median_reference_popularity, 0) AS median_reference_popularity,
-      COALESCE(rm.std_reference_popularity, 0) AS std_reference_popularity
+{_reference_metric_columns()}
     FROM 
       `{BIGQUERY_PROJECT}.{DISRUPTION_DATASET}.disruption_analysis` da
     LEFT JOIN
       `{BIGQUERY_PROJECT}.{DISRUPTION_DATASET}.paper_reference_metrics` rm
     ON
-      da.paperid = rm.citing_paperid;
+      da.paperid = rm.citing_paperid
     """
 
     print("Updating disruption_analysis table with comprehensive reference metrics...")
@@ -445,233 +981,266 @@ def add_reference_metrics():
     )
 
 
-def add_field_name():
+def create_field_ancestor_index(rebuild=False):
     """
-    Add field_name column to the disruption_analysis table.
-    If a paper has multiple fields, only the first one (by fieldid) is kept.
+    Create the Field_Ancestors table, which maps every field to its level-0 and level-1 ancestors.
+    SciSciNet_Fields has no parent column, so each field's ancestor at a given level is the
+    field of that level it co-occurs with most often (weighted by score) on the same papers.
+    The index only depends on SciSciNet_Fields and SciSciNet_PaperFields, so it is reused
+    unless `rebuild` is set or either table was modified after the index was built.
     """
-    print("Adding field_name column to disruption_analysis table...")
-
-    # Create a temporary table with the first field for each paper
-    temp_paper_fields_query = f"""
-    CREATE OR REPLACE TABLE `{BIGQUERY_PROJECT}.{DISRUPTION_DATASET}.temp_paper_first_field` AS
-    WITH RankedFields AS (
+    index_table = f"{BIGQUERY_PROJECT}.{DISRUPTION_DATASET}.Field_Ancestors"
+    if not rebuild:
+        try:
+            index_modified = client.get_table(index_table).modified
+        except Exception:
+            index_modified = None
+            print(f"Field ancestor index {index_table} does not exist. Creating it...")
+        if index_modified is not None:
+            sources_modified = max(
+                client.get_table(f"{BIGQUERY_PROJECT}.{SCISCINET_DATASET}.{table}").modified
+                for table in ("SciSciNet_Fields", "SciSciNet_PaperFields")
+            )
+            if index_modified >= sources_modified:
+                print(f"Field ancestor index {index_table} is up to date. Reusing it.")
+                return
+            print(f"Field ancestor index {index_table} is older than the field tables. Rebuilding it...")
+
+    index_query = f"""
+    CREATE OR REPLACE TABLE `{index_table}` AS
+    WITH PaperFieldLevels AS (
         SELECT 
             pf.paperid,
-            f.display_name as field_name,
-            ROW_NUMBER() OVER (PARTITION BY pf.paperid ORDER BY pf.fieldid) as rn
+            pf.fieldid,
+            f.level,
+            pf.score_openalex
         FROM `{BIGQUERY_PROJECT}.{SCISCINET_DATASET}.SciSciNet_PaperFields` pf
         JOIN `{BIGQUERY_PROJECT}.{SCISCINET_DATASET}.SciSciNet_Fields` f
         ON pf.fieldid = f.fieldid
+    ),
+    CoOccurrence AS (
+        SELECT 
+            child.fieldid,
+            parent.level AS ancestor_level,
+            parent.fieldid AS ancestor_fieldid,
+            SUM(parent.score_openalex) AS weight
+        FROM PaperFieldLevels child
+        JOIN PaperFieldLevels parent
+        ON child.paperid = parent.paperid
+            AND parent.level < child.level
+            AND parent.level <= 1
+        GROUP BY child.fieldid, parent.level, parent.fieldid
+    ),
+    BestAncestor AS (
+        SELECT 
+            fieldid,
+            ancestor_level,
+            ARRAY_AGG(ancestor_fieldid ORDER BY weight DESC, ancestor_fieldid LIMIT 1)[OFFSET(0)] AS ancestor_fieldid
+        FROM CoOccurrence
+        GROUP BY fieldid, ancestor_level
+    ),
+    Ancestors AS (
+        SELECT 
+            f.fieldid,
+            f.display_name AS field_name,
+            f.level,
+            CASE WHEN f.level = 0 THEN f.fieldid ELSE a0.ancestor_fieldid END AS level0_fieldid,
+            CASE 
+                WHEN f.level = 1 THEN f.fieldid 
+                WHEN f.level > 1 THEN a1.ancestor_fieldid 
+                ELSE NULL 
+            END AS level1_fieldid
+        FROM `{BIGQUERY_PROJECT}.{SCISCINET_DATASET}.SciSciNet_Fields` f
+        LEFT JOIN BestAncestor a0
+            ON f.fieldid = a0.fieldid AND a0.ancestor_level = 0
+        LEFT JOIN BestAncestor a1
+            ON f.fieldid = a1.fieldid AND a1.ancestor_level = 1
     )
     SELECT 
-        paperid,
-        field_name
-    FROM RankedFields
-    WHERE rn = 1
+        a.*,
+        f0.display_name AS level0_name,
+        f1.display_name AS level1_name
+    FROM Ancestors a
+    LEFT JOIN `{BIGQUERY_PROJECT}.{SCISCINET_DATASET}.SciSciNet_Fields` f0
+        ON a.level0_fieldid = f0.fieldid
+    LEFT JOIN `{BIGQUERY_PROJECT}.{SCISCINET_DATASET}.SciSciNet_Fields` f1
+        ON a.level1_fieldid = f1.fieldid
     """
 
-    print("Creating temporary table with first field for each paper...")
-    temp_job = client.query(temp_paper_fields_query)
-    temp_job.result()
-    print("Temporary paper fields table created successfully.")
+    print("Creating field ancestor index...")
+    index_job = client.query(index_query)
+    index_job.result()
+    print(f"Field ancestor index {index_table} created successfully.")
 
-    # Update the disruption_analysis table to include field_name
-    update_query = f"""
-    CREATE OR REPLACE TABLE `{BIGQUERY_PROJECT}.{DISRUPTION_DATASET}.disruption_analysis` AS
-    SELECT
-        da.*,
-        COALESCE(tpf.field_name, 'Unknown') AS field_name
-    FROM 
-        `{BIGQUERY_PROJECT}.{DISRUPTION_DATASET}.disruption_analysis` da
-    LEFT JOIN
-        `{BIGQUERY_PROJECT}.{DISRUPTION_DATASET}.temp_paper_first_field` tpf
-    ON
-        da.paperid = tpf.paperid
-    """
 
-    print("Updating disruption_analysis table with field_name column...")
-    update_job = client.query(update_query)
-    update_job.result()
-    print("Added field_name column to disruption_analysis table successfully.")
+# Columns that add_field_name adds to disruption_analysis, from paper_top_fields ptf
+FIELD_COLUMNS = """
+        COALESCE(ptf.top_fields[SAFE_OFFSET(0)].field_name, 'Unknown') AS field_name,
+        COALESCE(ptf.top_fields[SAFE_OFFSET(0)].level0_name, 'Unknown') AS field_level0_name,
+        ptf.top_fields[SAFE_OFFSET(0)].level1_name AS field_level1_name"""
 
-    # Clean up the temporary table
-    print("Cleaning up temporary table...")
-    client.delete_table(
-        f"{BIGQUERY_PROJECT}.{DISRUPTION_DATASET}.temp_paper_first_field"
-    )
-    print("Temporary table deleted successfully.")
 
-    # Get a count of papers with and without field names for validation
-    validation_query = f"""
+def _top_fields_query(top_k=FIELD_TOP_K, paper_filter=None):
+    return f"""
     SELECT 
-        COUNT(*) as total_papers,
-        COUNTIF(field_name != 'Unknown') as papers_with_fields,
-        COUNTIF(field_name = 'Unknown') as papers_without_fields
-    FROM `{BIGQUERY_PROJECT}.{DISRUPTION_DATASET}.disruption_analysis`
+        pf.paperid,
+        ARRAY_AGG(
+            STRUCT(
+                pf.fieldid,
+                fa.field_name,
+                fa.level,
+                pf.score_openalex AS score,
+                fa.level0_name,
+                fa.level1_name
+            )
+            ORDER BY pf.score_openalex DESC, pf.fieldid
+            LIMIT {top_k}
+        ) AS top_fields
+    FROM `{BIGQUERY_PROJECT}.{SCISCINET_DATASET}.SciSciNet_PaperFields` pf
+    JOIN `{BIGQUERY_PROJECT}.{DISRUPTION_DATASET}.Field_Ancestors` fa
+    ON pf.fieldid = fa.fieldid
+    WHERE {key_condition("pf.paperid", paper_filter)}
+    GROUP BY pf.paperid
     """
 
-    validation_job = client.query(validation_query)
-    results = validation_job.result()
 
-    for row in results:
-        print(f"Validation results:")
-        print(f"  Total papers: {row.total_papers}")
-        print(f"  Papers with fields: {row.papers_with_fields}")
-        print(f"  Papers without fields: {row.papers_without_fields}")
+def add_field_name(top_k=FIELD_TOP_K):
+    """
+    Add field columns to the disruption_analysis table.
+    - field_name: the paper's highest-scoring field (by score_openalex)
+    - field_level0_name: level-0 discipline of that field
+    - field_level1_name: level-1 subfield of that field (NULL for level-0 fields)
+    The top_k fields per paper, with their rollups, are kept in the paper_top_fields table.
+    They are picked with one grouped ARRAY_AGG ... LIMIT pass instead of a window sort.
+    """
+    print("Adding field columns to disruption_analysis table...")
 
+    create_field_ancestor_index()
 
-def clean_data():
-    print("Starting comprehensive data cleaning...")
+    top_fields_query = f"""
+    CREATE OR REPLACE TABLE `{BIGQUERY_PROJECT}.{DISRUPTION_DATASET}.paper_top_fields` AS{_top_fields_query(top_k)}"""
 
-    # GET INITIAL COUNT
-    initial_count_query = f"""
-    SELECT COUNT(*) as initial_count 
-    FROM `{BIGQUERY_PROJECT}.{DISRUPTION_DATASET}.disruption_analysis`
-    """
-    initial_count_job = client.query(initial_count_query)
-    initial_results = initial_count_job.result()
-    initial_count = 0
-    for row in initial_results:
-        initial_count = row.initial_count
-        print(f"INITIAL COUNT: {initial_count:,} entries in disruption_analysis table")
-
-    # 1. Quality Filter
-    quality_filter_query = f"""
-    DELETE FROM `{BIGQUERY_PROJECT}.{DISRUPTION_DATASET}.disruption_analysis`
-    WHERE 
-        disruption IS NULL
-        OR doi IS NULL
-        OR team_size IS NULL
-        OR team_size = 0
-    """
-
-    print("Removing papers with missing critical data...")
-    quality_job = client.query(quality_filter_query)
-    quality_job.result()
-
-    # Count after quality filter
-    after_quality_query = f"""
-    SELECT COUNT(*) as count FROM `{BIGQUERY_PROJECT}.{DISRUPTION_DATASET}.disruption_analysis`
-    """
-    after_quality_job = client.query(after_quality_query)
-    after_quality_results = after_quality_job.result()
-    for row in after_quality_results:
-        quality_removed = initial_count - row.count
-        print(
-            f"After quality filter: {row.count:,} entries remaining ({quality_removed:,} removed)"
-        )
-        current_count = row.count
-
-    # 2. Author Count Validation
-    # This is needed because there are 182275783 records in the Paper Table where team_size is 0.
-    counts_query = f"""
-    DELETE FROM `{BIGQUERY_PROJECT}.{DISRUPTION_DATASET}.disruption_analysis`
-    WHERE first_time_author_count + early_career_author_count + mid_career_author_count + senior_author_count != team_size
-    """
-
-    print("Deleting entries where author category counts don't sum to team_size...")
-    counts_job = client.query(counts_query)
-    counts_job.result()
-
-    # Count after author count validation
-    after_counts_job = client.query(after_quality_query)
-    after_counts_results = after_counts_job.result()
-    for row in after_counts_results:
-        count_validation_removed = current_count - row.count
-        print(
-            f"After count validation: {row.count:,} entries remaining ({count_validation_removed:,} removed)"
-        )
-        current_count = row.count
+    print(f"Creating paper_top_fields table with the top {top_k} fields per paper...")
+    top_fields_job = client.query(top_fields_query)
+    top_fields_job.result()
+    print("paper_top_fields table created successfully.")
 
-    # 3. Author Ratio Validation
-    ratios_query = f"""
-    DELETE FROM `{BIGQUERY_PROJECT}.{DISRUPTION_DATASET}.disruption_analysis`
-    WHERE ABS((first_time_author_ratio + early_career_author_ratio + mid_career_author_ratio + senior_author_ratio) - 1.0) >= 0.001
+    # Update the disruption_analysis table to include the top field and its rollups
+    update_query = f"""
+    CREATE OR REPLACE TABLE `{BIGQUERY_PROJECT}.{DISRUPTION_DATASET}.disruption_analysis` AS
+    SELECT
+        da.*,{FIELD_COLUMNS}
+    FROM 
+        `{BIGQUERY_PROJECT}.{DISRUPTION_DATASET}.disruption_analysis` da
+    LEFT JOIN
+        `{BIGQUERY_PROJECT}.{DISRUPTION_DATASET}.paper_top_fields` ptf
+    ON
+        da.paperid = ptf.paperid
     """
 
-    print(
-        "Deleting entries where author category ratios don't sum to approximately 1..."
+    print("Updating disruption_analysis table with field columns...")
+    update_job = client.query(update_query)
+    update_job.result()
+    print("Added field columns to disruption_analysis table successfully.")
+
+    # Record statistics for validation; the cleaning rules and the columns of the quality
+    # estimate are tracked for clean_data
+    entry = fresh_table_entry(
+        client,
+        f"{BIGQUERY_PROJECT}.{DISRUPTION_DATASET}.disruption_analysis",
+        {"field_name_unknown": "field_name = 'Unknown'", **CLEANING_RULES},
+        QUALITY_ESTIMATE_COLUMNS,
     )
-    ratios_job = client.query(ratios_query)
-    ratios_job.result()
-
-    # Count after ratio validation
-    after_ratios_job = client.query(after_quality_query)
-    after_ratios_results = after_ratios_job.result()
-    for row in after_ratios_results:
-        ratio_validation_removed = current_count - row.count
-        print(
-            f"After ratio validation: {row.count:,} entries remaining ({ratio_validation_removed:,} removed)"
-        )
-        current_count = row.count
+    papers_without_fields = entry["predicates"]["field_name_unknown"]
+    print(f"Validation results:")
+    print(f"  Total papers: {entry['row_count']}")
+    print(f"  Papers with fields: {entry['row_count'] - papers_without_fields}")
+    print(f"  Papers without fields: {papers_without_fields}")
 
-    # 4. Create problematic authors table and remove their papers
-    print("Creating temporary table for problematic authors...")
-    temp_problematic_authors_table = (
-        f"{BIGQUERY_PROJECT}.{DISRUPTION_DATASET}.temp_problematic_authors"
-    )
 
-    # Drop table if exists
-    try:
-        client.get_table(temp_problematic_authors_table)
-        print(
-            f"Temporary table {temp_problematic_authors_table} already exists. Deleting it..."
-        )
-        client.delete_table(temp_problematic_authors_table)
-    except Exception:
-        print(
-            f"Temporary table {temp_problematic_authors_table} does not exist. Creating it..."
-        )
+def clean_data():
+    """
+    Apply CLEANING_RULES and remove papers by problematic authors.
+    Row counts come from the column statistics catalog recorded by add_field_name and from
+    the affected-row counts of the DELETE statements, so no COUNT(*) queries are needed.
+    Rules that matched no rows when the statistics were recorded are skipped; statistics
+    recorded before the table was last modified are re-collected first. The cleaned tables
+    are not scanned again here; the next fresh_table_entry call re-collects them when needed.
+    """
+    print("Starting comprehensive data cleaning...")
+    analysis_table = f"{BIGQUERY_PROJECT}.{DISRUPTION_DATASET}.disruption_analysis"
 
-    # Create problematic authors table
-    union_parts = []
-    for year in range(MIN_YEAR, MAX_YEAR + 1):
-        union_parts.extend(
-            [
-                f"""SELECT authorid FROM `{BIGQUERY_PROJECT}.{DISRUPTION_DATASET}.temp_author_profile_{year}`
-                WHERE is_new_author = TRUE AND paper_count_in_year > 10""",
-                f"""SELECT authorid FROM `{BIGQUERY_PROJECT}.{DISRUPTION_DATASET}.temp_author_profile_{year}`
-                WHERE paper_count_in_year > 50""",
-                f"""SELECT authorid FROM `{BIGQUERY_PROJECT}.{DISRUPTION_DATASET}.temp_author_profile_{year}`
-                WHERE career_age > 80""",
-                f"""SELECT authorid FROM `{BIGQUERY_PROJECT}.{DISRUPTION_DATASET}.temp_author_profile_{year}`
-                WHERE paper_count_in_prev_years > 1000""",
-            ]
-        )
+    # Re-collect the statistics if the table changed since they were recorded, so that a rule
+    # is only skipped when it really matches nothing
+    fresh_table_entry(client, analysis_table, CLEANING_RULES, QUALITY_ESTIMATE_COLUMNS)
 
+    # GET INITIAL COUNT
+    initial_count = catalog_row_count(analysis_table)
+    print(f"INITIAL COUNT: {initial_count:,} entries in disruption_analysis table")
+
+    # Cross-check the histogram-based estimate for the quality filter against its exact count
+    quality_estimate = estimate_selectivity(analysis_table, QUALITY_ESTIMATE_PREDICATES)
+    print(f"Estimated quality filter selectivity: {quality_estimate:.2%}")
+
+    # 1. Quality Filter, 2. Author Count Validation, 3. Author Ratio Validation
+    # The count validation is needed because there are 182275783 records in the Paper Table
+    # where team_size is 0.
+    descriptions = {
+        "quality": ("Removing papers with missing critical data...", "quality filter"),
+        "author_counts": (
+            "Deleting entries where author category counts don't sum to team_size...",
+            "count validation",
+        ),
+        "author_ratios": (
+            "Deleting entries where author category ratios don't sum to approximately 1...",
+            "ratio validation",
+        ),
+    }
+    current_count = initial_count
+    for rule, predicate in CLEANING_RULES.items():
+        message, label = descriptions[rule]
+        # Counted before the earlier rules ran, so this is an upper bound on the rows deleted
+        matching = tracked_count(analysis_table, rule)
+        print(f"{message} (at most {matching:,} matching entries)")
+        removed = 0
+        if matching > 0:
+            delete_job = client.query(f"DELETE FROM `{analysis_table}` WHERE {predicate}")
+            delete_job.result()
+            removed = delete_job.num_dml_affected_rows or 0
+        current_count -= removed
+        print(f"After {label}: {current_count:,} entries remaining ({removed:,} removed)")
+
+    # 4. Create problematic authors table and remove their papers. The table is kept, so that
+    # incremental updates can re-apply the filter to the rows they rewrite.
+    print("Creating table for problematic authors...")
+    problematic_condition = " OR ".join(f"({predicate})" for predicate in PROBLEMATIC_AUTHOR_RULES.values())
     create_problematic_authors_query = f"""
-    CREATE OR REPLACE TABLE `{temp_problematic_authors_table}` AS
-    SELECT DISTINCT authorid FROM ({' UNION ALL '.join(union_parts)})
+    CREATE OR REPLACE TABLE `{PROBLEMATIC_AUTHORS_TABLE}` AS
+    SELECT DISTINCT authorid 
+    FROM `{BIGQUERY_PROJECT}.{DISRUPTION_DATASET}.All_Yearly_Author_Profiles`
+    WHERE {problematic_condition}
     """
 
     create_job = client.query(create_problematic_authors_query)
     create_job.result()
 
-    # Count problematic authors
-    count_problematic_query = f"""
-    SELECT COUNT(*) as count FROM `{temp_problematic_authors_table}`
-    """
-    count_job = client.query(count_problematic_query)
-    count_result = count_job.result()
-    for row in count_result:
-        print(f"Found {row.count:,} unique problematic author IDs")
+    # Count problematic authors from table metadata
+    problematic_count = client.get_table(PROBLEMATIC_AUTHORS_TABLE).num_rows
+    print(f"Found {problematic_count:,} unique problematic author IDs")
 
     # Get initial count of All_Yearly_Author_Profiles for tracking
-    initial_profiles_count_query = f"""
-    SELECT COUNT(*) as count FROM `{BIGQUERY_PROJECT}.{DISRUPTION_DATASET}.All_Yearly_Author_Profiles`
-    """
-    initial_profiles_job = client.query(initial_profiles_count_query)
-    initial_profiles_results = initial_profiles_job.result()
-    for row in initial_profiles_results:
-        initial_profiles_count = row.count
-        print(f"Initial All_Yearly_Author_Profiles count: {initial_profiles_count:,}")
+    profiles_table = f"{BIGQUERY_PROJECT}.{DISRUPTION_DATASET}.All_Yearly_Author_Profiles"
+    fresh_table_entry(client, profiles_table, PROBLEMATIC_AUTHOR_RULES)
+    initial_profiles_count = catalog_row_count(profiles_table)
+    print(f"Initial All_Yearly_Author_Profiles count: {initial_profiles_count:,}")
+    for rule in PROBLEMATIC_AUTHOR_RULES:
+        print(f"  Profiles matching {rule}: {tracked_count(profiles_table, rule):,}")
 
     # Remove problematic authors from All_Yearly_Author_Profiles table
     delete_profiles_query = f"""
-    DELETE FROM `{BIGQUERY_PROJECT}.{DISRUPTION_DATASET}.All_Yearly_Author_Profiles`
+    DELETE FROM `{profiles_table}`
     WHERE authorid IN (
-        SELECT authorid FROM `{temp_problematic_authors_table}`
+        SELECT authorid FROM `{PROBLEMATIC_AUTHORS_TABLE}`
     )
     """
 
@@ -679,23 +1248,19 @@ def clean_data():
     delete_profiles_job = client.query(delete_profiles_query)
     delete_profiles_job.result()
 
-    # Count remaining profiles after cleanup
-    after_profiles_cleanup_job = client.query(initial_profiles_count_query)
-    after_profiles_results = after_profiles_cleanup_job.result()
-    for row in after_profiles_results:
-        profiles_removed = initial_profiles_count - row.count
-        print(
-            f"All_Yearly_Author_Profiles after cleanup: {row.count:,} entries remaining ({profiles_removed:,} removed)"
-        )
+    profiles_removed = delete_profiles_job.num_dml_affected_rows or 0
+    print(
+        f"All_Yearly_Author_Profiles after cleanup: {initial_profiles_count - profiles_removed:,} entries remaining ({profiles_removed:,} removed)"
+    )
 
     # Remove papers by problematic authors from disruption_analysis
     delete_papers_query = f"""
-    DELETE FROM `{BIGQUERY_PROJECT}.{DISRUPTION_DATASET}.disruption_analysis`
+    DELETE FROM `{analysis_table}`
     WHERE paperid IN (
-        SELECT DISTINCT pa.paperid
-        FROM `{BIGQUERY_PROJECT}.{SCISCINET_DATASET}.SciSciNet_PaperAuthorAffiliations` pa
-        INNER JOIN `{temp_problematic_authors_table}` prob
-        ON pa.authorid = prob.authorid
+        SELECT au.paperid
+        FROM `{BIGQUERY_PROJECT}.{DISRUPTION_DATASET}.Authorships` au
+        INNER JOIN `{PROBLEMATIC_AUTHORS_TABLE}` prob
+        ON au.authorid = prob.authorid
     )
     """
 
@@ -704,74 +1269,34 @@ def clean_data():
     delete_job.result()
 
     # FINAL COUNT
-    final_count_job = client.query(after_quality_query)
-    final_results = final_count_job.result()
-    for row in final_results:
-        problematic_authors_removed = current_count - row.count
-        total_removed = initial_count - row.count
-        print(
-            f"After problematic authors removal: {row.count:,} entries remaining ({problematic_authors_removed:,} removed)"
-        )
-        print(f"\n" + "=" * 60)
-        print(f"FINAL CLEANUP SUMMARY:")
-        print(f"Initial entries: {initial_count:,}")
-        print(f"Final entries: {row.count:,}")
-        print(
-            f"disruption_analysis - Total removed: {total_removed:,} ({(total_removed/initial_count)*100:.2f}%)"
-        )
-        print(f"All_Yearly_Author_Profiles - Problematic authors removed: {profiles_removed:,}")
-        print(f"=" * 60)
-
-    # Clean up temporary table
-    client.delete_table(temp_problematic_authors_table)
-    print("Temporary problematic authors table deleted.")
-
-
-def delete_temp_tables():
-    delete_query = ""
-    for year in range(MIN_YEAR, MAX_YEAR + 1):
-        delete_query += f"""
-        DROP TABLE IF EXISTS `{BIGQUERY_PROJECT}.{DISRUPTION_DATASET}.temp_author_profile_{year}`;
-        """
-        delete_query += f"DROP TABLE IF EXISTS `{BIGQUERY_PROJECT}.{DISRUPTION_DATASET}.paper_author_details_{year}`;\n"
-
-    delete_job = client.query(delete_query)
-    delete_job.result()
-    print("Temporary tables deleted successfully.")
+    problematic_authors_removed = delete_job.num_dml_affected_rows or 0
+    final_count = current_count - problematic_authors_removed
+    total_removed = initial_count - final_count
+    print(
+        f"After problematic authors removal: {final_count:,} entries remaining ({problematic_authors_removed:,} removed)"
+    )
+    print(f"\n" + "=" * 60)
+    print(f"FINAL CLEANUP SUMMARY:")
+    print(f"Initial entries: {initial_count:,}")
+    print(f"Final entries: {final_count:,}")
+    print(
+        f"disruption_analysis - Total removed: {total_removed:,} ({(total_removed/initial_count)*100:.2f}%)"
+    )
+    print(f"All_Yearly_Author_Profiles - Problematic authors removed: {profiles_removed:,}")
+    print(f"=" * 60)
 
 
 if __name__ == "__main__":
     start_time = time.time()
 
-    # Start all author profile creation jobs concurrently
-    print("Starting all author profile creation jobs...")
-    author_profile_jobs = {}
-    for year in range(MIN_YEAR, MAX_YEAR + 1):
-        job, temp_table_name = create_author_profiles(year)
-        author_profile_jobs[year] = (job, temp_table_name)
-        print(f"Started author profile job for year {year}")
-
-    # Wait for all author profile jobs to complete
-    print("Waiting for all author profile jobs to complete...")
-    for year, (job, temp_table_name) in author_profile_jobs.items():
-        job.result()  # Wait for completion
-        print(f"Author profile job for year {year} completed: {temp_table_name}")
-
-    create_all_yearly_author_profiles()
+    create_authorships_table()
+    create_citation_year_index()
+    create_author_prefix_sums()
+    create_institution_profiles()
 
-    # Start all paper author details jobs concurrently
-    print("Starting all paper author details jobs...")
-    paper_author_detail_jobs = {}
-    for year in range(MIN_YEAR, MAX_YEAR + 1):
-        job = create_paper_author_details(year)
-        paper_author_detail_jobs[year] = job
-        print(f"Started paper author details job for year {year}")
-
-    # Wait for all paper author details jobs to complete
-    print("Waiting for all paper author details jobs to complete...")
-    for year, job in paper_author_detail_jobs.items():
-        job.result()  # Wait for completion
-        print(f"Paper author details job for year {year} completed")
+    create_year_partitioned_tables()
+    create_all_author_profiles()
+    create_all_paper_author_details()
 
     create_combined_data_table()
     add_reference_metrics()
@@ -780,8 +1305,7 @@ if __name__ == "__main__":
     print("Cleaning Data")
     clean_data()
 
-    print("Deleting temporary tables...")
-    delete_temp_tables()
+    create_distribution_sketches()
 
     print(
         f"All tasks completed successfully in { round((time.time() - start_time) / 60, 2)} minutes."
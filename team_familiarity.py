@@ -0,0 +1,322 @@
+"""
+Team-familiarity features: how often a paper's authors have written together before.
+
+Papers are processed one publication year at a time while an index of author pairs maps
+each pair to the number of earlier papers they co-authored. For every paper in
+MIN_YEAR..MAX_YEAR the engine looks up its author pairs before adding that year's pairs to
+the index. So, as with the author profiles, only papers from earlier years count as prior
+collaboration.
+
+Teams with more than MAX_PAIRS_PER_PAPER pairs (more than FULL_PAIR_TEAM_LIMIT authors) are
+not expanded into all n*(n-1)/2 pairs. Instead, MAX_PAIRS_PER_PAPER distinct pairs are drawn
+uniformly without replacement, then evaluated and indexed, which keeps memory bounded for
+hyper-authored papers. A large team therefore adds one joint paper to each sampled pair only,
+and pairs that were not sampled are not counted as having collaborated on that paper.
+
+Output columns (table team_familiarity, joined into disruption_analysis):
+- collaboration_pair_count: author pairs evaluated for the paper, i.e. all n*(n-1)/2 pairs,
+  or MAX_PAIRS_PER_PAPER for sampled teams
+- prior_collaboration_pair_share: share of those pairs with at least one prior joint paper
+  (an unbiased estimate of the share over all pairs for sampled teams)
+- mean_prior_joint_papers: mean number of prior joint papers per pair (likewise an estimate)
+- max_prior_joint_papers: largest number of prior joint papers for any evaluated pair (a
+  lower bound for sampled teams)
+"""
+
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from config import BIGQUERY_PROJECT, DISRUPTION_DATASET, MAX_YEAR, MIN_YEAR
+from gcp_clients import lazy_bigquery_client
+
+FULL_PAIR_TEAM_LIMIT = 50  # teams up to this size are expanded into all pairs
+# Pairs of the largest fully expanded team; larger teams are sampled down to the same number
+MAX_PAIRS_PER_PAPER = FULL_PAIR_TEAM_LIMIT * (FULL_PAIR_TEAM_LIMIT - 1) // 2
+OUTPUT_PATH = "team_familiarity.parquet"
+# Columns that add_team_familiarity_metrics adds to disruption_analysis
+TEAM_FAMILIARITY_COLUMNS = (
+    "collaboration_pair_count",
+    "prior_collaboration_pair_share",
+    "mean_prior_joint_papers",
+    "max_prior_joint_papers",
+)
+
+client = lazy_bigquery_client(BIGQUERY_PROJECT)
+
+OUTPUT_SCHEMA = pa.schema(
+    [
+        ("paperid", pa.string()),
+        ("year", pa.int64()),
+        ("collaboration_pair_count", pa.int64()),
+        ("prior_collaboration_pair_share", pa.float64()),
+        ("mean_prior_joint_papers", pa.float64()),
+        ("max_prior_joint_papers", pa.int64()),
+    ]
+)
+
+
+def _mix64(x):
+    """SplitMix64 finalizer, used to hash an (author, author) pair into one 64-bit key."""
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+
+def pair_keys(author_a, author_b):
+    """Order-independent 64-bit key for each (author_a, author_b) pair of author hashes."""
+    low = np.minimum(author_a, author_b)
+    high = np.maximum(author_a, author_b)
+    return _mix64(low ^ _mix64(high))
+
+
+class CollaborationPairIndex:
+    """Sorted pair-key array with the number of joint papers per pair."""
+
+    def __init__(self):
+        self.keys = np.empty(0, np.uint64)
+        self.counts = np.empty(0, np.int32)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def lookup(self, keys):
+        """Return the number of prior joint papers for each pair key (0 if unseen)."""
+        if len(self.keys) == 0:
+            return np.zeros(len(keys), np.int32)
+        pos = np.minimum(np.searchsorted(self.keys, keys), len(self.keys) - 1)
+        found = self.keys[pos] == keys
+        return np.where(found, self.counts[pos], 0)
+
+    def add(self, keys):
+        """
+        Add one joint paper for every key (keys may repeat across papers). Called once per
+        year with all of that year's keys; pairs not yet in the index are merged into the
+        sorted arrays in a single pass.
+        """
+        new_keys, new_counts = np.unique(keys, return_counts=True)
+        new_counts = new_counts.astype(np.int32)
+        pos = np.searchsorted(self.keys, new_keys)
+        found = np.zeros(len(new_keys), bool)
+        in_range = pos < len(self.keys)
+        found[in_range] = self.keys[pos[in_range]] == new_keys[in_range]
+        self.counts[pos[found]] += new_counts[found]
+
+        unseen = ~found
+        if not unseen.any():
+            return
+        # Both sides are sorted, so each unseen key lands at its search position shifted by
+        # the number of unseen keys before it
+        merged_size = len(self.keys) + int(unseen.sum())
+        inserted_at = pos[unseen] + np.arange(int(unseen.sum()))
+        is_new = np.zeros(merged_size, bool)
+        is_new[inserted_at] = True
+        keys = np.empty(merged_size, np.uint64)
+        counts = np.empty(merged_size, np.int32)
+        keys[inserted_at] = new_keys[unseen]
+        counts[inserted_at] = new_counts[unseen]
+        keys[~is_new] = self.keys
+        counts[~is_new] = self.counts
+        self.keys = keys
+        self.counts = counts
+
+
+def _pair_from_index(k, n):
+    """
+    Map linear indices `k` of the upper triangle (row-major, i < j) of an n x n matrix to
+    (i, j), without materializing all n*(n-1)/2 pairs.
+    """
+    k = np.asarray(k, np.int64)
+    # Row i starts at offset(i) = i * (2n - i - 1) / 2; invert the quadratic, then correct
+    # the floating-point estimate by at most one row either way
+    b = 2 * n - 1
+    i = np.floor((b - np.sqrt(np.maximum(b * b - 8 * k, 0))) / 2).astype(np.int64)
+    i = np.clip(i, 0, n - 2)
+    i -= i * (b - i) // 2 > k
+    i += (i + 1) * (b - i - 1) // 2 <= k
+    j = k - i * (b - i) // 2 + i + 1
+    return i, j
+
+
+def team_pairs(paper_codes, author_hashes, rng):
+    """
+    Enumerate (or sample, for large teams) author pairs per paper.
+
+    Args:
+        paper_codes (np.ndarray): Dense paper index per authorship, sorted ascending
+        author_hashes (np.ndarray): uint64 author hash per authorship
+        rng (np.random.Generator): Random source for sampling pairs of large teams
+
+    Returns:
+        tuple: (paper code per pair, pair key per pair)
+    """
+    starts = np.flatnonzero(np.r_[True, paper_codes[1:] != paper_codes[:-1]])
+    sizes = np.diff(np.r_[starts, len(paper_codes)])
+    pair_papers, first, second = [], [], []
+
+    for size in np.unique(sizes[(sizes >= 2) & (sizes <= FULL_PAIR_TEAM_LIMIT)]):
+        team_starts = starts[sizes == size]
+        i, j = np.triu_indices(size, 1)
+        pair_papers.append(np.repeat(paper_codes[team_starts], len(i)))
+        first.append((team_starts[:, None] + i[None, :]).ravel())
+        second.append((team_starts[:, None] + j[None, :]).ravel())
+
+    # Large teams are rare, so they are sampled one at a time
+    for start, size in zip(starts[sizes > FULL_PAIR_TEAM_LIMIT], sizes[sizes > FULL_PAIR_TEAM_LIMIT]):
+        n_pairs = int(size) * (int(size) - 1) // 2
+        sampled = rng.choice(n_pairs, MAX_PAIRS_PER_PAPER, replace=False)
+        i, j = _pair_from_index(sampled, int(size))
+        pair_papers.append(np.full(MAX_PAIRS_PER_PAPER, paper_codes[start]))
+        first.append(start + i)
+        second.append(start + j)
+
+    if not pair_papers:
+        return np.empty(0, np.int64), np.empty(0, np.uint64)
+    first = np.concatenate(first)
+    second = np.concatenate(second)
+    keys = pair_keys(author_hashes[first], author_hashes[second])
+    return np.concatenate(pair_papers), keys
+
+
+def process_year(index, authorships, rng, emit=True):
+    """
+    Compute familiarity features for one year's papers, then add their pairs to `index`.
+
+    Args:
+        index (CollaborationPairIndex): Pair counts from all earlier years
+        authorships (pd.DataFrame): Columns paperid and author_hash (uint64), one row per authorship
+        rng (np.random.Generator): Random source for sampling pairs of large teams
+        emit (bool): Whether to return features (False when only seeding the index)
+
+    Returns:
+        pd.DataFrame or None: One row per paper with at least two authors
+    """
+    authorships = authorships.drop_duplicates(["paperid", "author_hash"])
+    paper_codes, paperids = pd.factorize(authorships["paperid"], sort=True)
+    order = np.argsort(paper_codes, kind="stable")
+    paper_codes = paper_codes[order]
+    author_hashes = authorships["author_hash"].to_numpy(np.uint64)[order]
+
+    pair_papers, keys = team_pairs(paper_codes, author_hashes, rng)
+
+    features = None
+    if emit and len(keys):
+        prior = index.lookup(keys)
+        n_papers = len(paperids)
+        pair_count = np.bincount(pair_papers, minlength=n_papers)
+        with_prior = np.bincount(pair_papers, weights=prior > 0, minlength=n_papers)
+        joint_papers = np.bincount(pair_papers, weights=prior, minlength=n_papers)
+        max_joint = np.zeros(n_papers, np.int64)
+        np.maximum.at(max_joint, pair_papers, prior)
+
+        has_pairs = pair_count > 0
+        features = pd.DataFrame(
+            {
+                "paperid": np.asarray(paperids)[has_pairs],
+                "collaboration_pair_count": pair_count[has_pairs],
+                "prior_collaboration_pair_share": with_prior[has_pairs] / pair_count[has_pairs],
+                "mean_prior_joint_papers": joint_papers[has_pairs] / pair_count[has_pairs],
+                "max_prior_joint_papers": max_joint[has_pairs],
+            }
+        )
+
+    index.add(keys)
+    return features
+
+
+def read_bigquery_authorships(year_condition):
+    """Download (paperid, author_hash) rows of the Authorships table matching `year_condition`."""
+    query = f"""
+    SELECT
+        paperid,
+        FARM_FINGERPRINT(authorid) AS author_hash
+    FROM `{BIGQUERY_PROJECT}.{DISRUPTION_DATASET}.Authorships`
+    WHERE {year_condition}
+    """
+    df = client.query(query).to_dataframe()
+    # FARM_FINGERPRINT is a signed INT64; reinterpret the bits as uint64
+    df["author_hash"] = df["author_hash"].to_numpy(np.int64).view(np.uint64)
+    return df
+
+
+def compute_team_familiarity(read_authorships=read_bigquery_authorships, output_path=OUTPUT_PATH, seed=0):
+    """
+    Run the engine over all years and stream the features to a local Parquet file.
+
+    Args:
+        read_authorships (callable): Takes a SQL condition on `year`, returns a DataFrame
+        output_path (str): Parquet file for the per-paper features
+        seed (int): Seed for the pair sampling of large teams
+
+    Returns:
+        str: Path of the written Parquet file
+    """
+    rng = np.random.default_rng(seed)
+    index = CollaborationPairIndex()
+
+    print(f"Seeding collaboration index with papers before {MIN_YEAR}...")
+    process_year(index, read_authorships(f"year < {MIN_YEAR}"), rng, emit=False)
+    print(f"Index holds {len(index):,} author pairs")
+
+    with pq.ParquetWriter(output_path, OUTPUT_SCHEMA) as writer:
+        for year in range(MIN_YEAR, MAX_YEAR + 1):
+            features = process_year(index, read_authorships(f"year = {year}"), rng)
+            if features is not None:
+                features.insert(1, "year", year)
+                writer.write_table(pa.Table.from_pandas(features, OUTPUT_SCHEMA, preserve_index=False))
+                print(f"Year {year}: {len(features):,} papers, index holds {len(index):,} author pairs")
+
+    return output_path
+
+
+def add_team_familiarity_metrics(parquet_path=OUTPUT_PATH):
+    """
+    Load the features into BigQuery and add them to the disruption_analysis table. Columns
+    from an earlier run are replaced, so the step can be re-run.
+    """
+    from google.cloud import bigquery
+
+    table_id = f"{BIGQUERY_PROJECT}.{DISRUPTION_DATASET}.team_familiarity"
+    analysis_table = f"{BIGQUERY_PROJECT}.{DISRUPTION_DATASET}.disruption_analysis"
+    job_config = bigquery.LoadJobConfig(
+        source_format=bigquery.SourceFormat.PARQUET,
+        write_disposition=bigquery.WriteDisposition.WRITE_TRUNCATE,
+    )
+    print(f"Loading {parquet_path} into {table_id}...")
+    with open(parquet_path, "rb") as source:
+        client.load_table_from_file(source, table_id, job_config=job_config).result()
+
+    existing = {field.name for field in client.get_table(analysis_table).schema}
+    replaced = [column for column in TEAM_FAMILIARITY_COLUMNS if column in existing]
+    analysis_columns = f"da.* EXCEPT ({', '.join(replaced)})" if replaced else "da.*"
+    team_familiarity_columns = "".join(f",\n        tf.{column}" for column in TEAM_FAMILIARITY_COLUMNS)
+
+    # Single-author papers have no pairs, so their features stay NULL
+    update_query = f"""
+    CREATE OR REPLACE TABLE `{analysis_table}` AS
+    SELECT
+        {analysis_columns}{team_familiarity_columns}
+    FROM
+        `{analysis_table}` da
+    LEFT JOIN
+        `{table_id}` tf
+    ON
+        da.paperid = tf.paperid
+    """
+
+    print("Updating disruption_analysis table with team familiarity metrics...")
+    update_job = client.query(update_query)
+    update_job.result()
+    print("Added team familiarity metrics to disruption_analysis table successfully.")
+
+
+if __name__ == "__main__":
+    start_time = time.time()
+    compute_team_familiarity()
+    add_team_familiarity_metrics()
+    os.remove(OUTPUT_PATH)
+    print(f"Team familiarity completed in {round((time.time() - start_time) / 60, 2)} minutes.")
@@ -0,0 +1,38 @@
+from types import SimpleNamespace
+
+import benchmark_pipeline
+
+
+def _job(job_type="query", bytes_processed=0, slot_millis=0, parent_job_id=None):
+    return SimpleNamespace(
+        job_type=job_type,
+        total_bytes_processed=bytes_processed,
+        slot_millis=slot_millis,
+        parent_job_id=parent_job_id,
+    )
+
+
+def test_job_statistics_skip_child_and_non_query_jobs():
+    jobs = [
+        _job(bytes_processed=100, slot_millis=10),
+        _job(bytes_processed=100, slot_millis=10, parent_job_id="script"),
+        _job(job_type="load", bytes_processed=1000),
+        _job(bytes_processed=None, slot_millis=None),
+    ]
+    client = SimpleNamespace(list_jobs=lambda min_creation_time: jobs)
+    assert benchmark_pipeline._job_statistics(client, None) == (100, 10)
+
+
+def test_compare_with_baseline_flags_server_side_regressions():
+    reference = {"wall_seconds": 10, "client_peak_rss_mb": 100, "bytes_processed": 1000, "slot_millis": 0}
+    measurement = {"wall_seconds": 11, "client_peak_rss_mb": 100, "bytes_processed": 2000, "slot_millis": 500}
+    regressions = benchmark_pipeline.compare_with_baseline(
+        {"0.01": {"clean_data": measurement}}, {"0.01": {"clean_data": reference}}, 0.2
+    )
+    assert regressions == ["SF 0.01 clean_data bytes_processed: 1000 -> 2000 (+100%)"]
+
+
+def test_compare_with_baseline_skips_metrics_missing_from_old_baselines():
+    reference = {"wall_seconds": 10, "peak_rss_mb": 100}
+    measurement = {"wall_seconds": 10, "client_peak_rss_mb": 500, "bytes_processed": 1, "slot_millis": 1}
+    assert benchmark_pipeline.compare_with_baseline({"1": {"export": measurement}}, {"1": {"export": reference}}, 0.2) == []
@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+from citation_index import CitationYearIndex
+
+
+@pytest.fixture
+def counts():
+    rng = np.random.default_rng(0)
+    # Hashes with the top bit set, as FARM_FINGERPRINT values reinterpreted as uint64 are
+    papers = rng.integers(0, 2**64, 50, dtype=np.uint64)
+    n = 2_000
+    return papers, papers[rng.integers(0, len(papers), n)], rng.integers(1990, 2021, n), rng.integers(1, 5, n)
+
+
+def _brute_force(paper_hashes, years, citations, query_hashes, query_years):
+    return np.array(
+        [
+            citations[(paper_hashes == paper) & (years <= year)].sum()
+            for paper, year in zip(query_hashes, query_years)
+        ]
+    )
+
+
+def test_as_of_matches_brute_force(counts):
+    papers, paper_hashes, years, citations = counts
+    index = CitationYearIndex.from_counts(paper_hashes, years, citations)
+    rng = np.random.default_rng(1)
+    unknown = np.array([1, 2, 3], np.uint64)
+    query_hashes = np.r_[papers[rng.integers(0, len(papers), 500)], unknown]
+    query_years = rng.integers(1980, 2030, len(query_hashes))
+
+    expected = _brute_force(paper_hashes, years, citations, query_hashes, query_years)
+    np.testing.assert_array_equal(index.as_of(query_hashes, query_years), expected)
+
+
+def test_duplicate_rows_are_merged(counts):
+    papers, paper_hashes, years, citations = counts
+    index = CitationYearIndex.from_counts(paper_hashes, years, citations)
+    assert len(index) == len(set(zip(paper_hashes.tolist(), years.tolist())))
+    assert len(index.paper_hashes) == len(np.unique(paper_hashes))
+    totals = index.as_of(index.paper_hashes, 2020)
+    assert totals.sum() == citations.sum()
+
+
+def test_scalar_year_and_save_load(counts, tmp_path):
+    papers, paper_hashes, years, citations = counts
+    index = CitationYearIndex.from_counts(paper_hashes, years, citations)
+    path = tmp_path / "index.npz"
+    index.save(path)
+    loaded = CitationYearIndex.load(path)
+    np.testing.assert_array_equal(loaded.as_of(papers, 2005), index.as_of(papers, np.full(len(papers), 2005)))
+    assert (loaded.first_year, loaded.year_span) == (index.first_year, index.year_span)
+
+
+def test_empty_index():
+    index = CitationYearIndex.from_counts([], [], [])
+    np.testing.assert_array_equal(index.as_of(np.array([5], np.uint64), 2000), [0])
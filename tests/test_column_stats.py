@@ -0,0 +1,141 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+import column_stats
+
+
+class FakeClient:
+    def __init__(self, modified):
+        self.modified = modified
+
+    def get_table(self, table_id):
+        return SimpleNamespace(modified=self.modified)
+
+
+@pytest.fixture
+def catalog_path(tmp_path, monkeypatch):
+    collected = []
+
+    def collect(client, table_id, tracked_predicates=None, columns=()):
+        collected.append(dict(tracked_predicates or {}))
+        return {
+            "row_count": 10,
+            "collected_at": "now",
+            "last_modified": str(client.get_table(table_id).modified),
+            "columns": {name: {"null_count": 0} for name in columns},
+            "predicates": {name: 0 for name in tracked_predicates or {}},
+        }
+
+    monkeypatch.setattr(column_stats, "collect_table_stats", collect)
+    path = str(tmp_path / "catalog.json")
+    return path, collected
+
+
+def test_fresh_entry_is_reused(catalog_path):
+    path, collected = catalog_path
+    client = FakeClient("2024-01-01")
+    column_stats.record_table_stats(client, "t", {"rule": "x > 0"}, path=path)
+    column_stats.fresh_table_entry(client, "t", {"rule": "x > 0"}, path=path)
+    assert len(collected) == 1
+
+
+def test_modified_table_is_recollected(catalog_path):
+    path, collected = catalog_path
+    column_stats.record_table_stats(FakeClient("2024-01-01"), "t", {"rule": "x > 0"}, path=path)
+    entry = column_stats.fresh_table_entry(FakeClient("2024-02-01"), "t", {"rule": "x > 0"}, path=path)
+    assert len(collected) == 2
+    assert entry["last_modified"] == "2024-02-01"
+
+
+def test_missing_predicate_is_recollected(catalog_path):
+    path, collected = catalog_path
+    client = FakeClient("2024-01-01")
+    column_stats.record_table_stats(client, "t", path=path)
+    with pytest.raises(KeyError):
+        column_stats.tracked_count("t", "rule", path=path)
+    column_stats.fresh_table_entry(client, "t", {"rule": "x > 0"}, path=path)
+    assert column_stats.tracked_count("t", "rule", path=path) == 0
+
+
+def test_fraction_at_most_interpolates_equi_depth_buckets():
+    boundaries = np.linspace(0, 100, 21)
+    assert column_stats._fraction_at_most(boundaries, -1) == 0.0
+    assert column_stats._fraction_at_most(boundaries, 100) == 1.0
+    assert column_stats._fraction_at_most(boundaries, 100, strict=True) == pytest.approx(1.0)
+    assert column_stats._fraction_at_most(boundaries, 37.5) == pytest.approx(0.375)
+
+
+def test_estimate_selectivity(tmp_path):
+    path = str(tmp_path / "catalog.json")
+    column_stats.save_catalog(
+        {
+            "t": {
+                "row_count": 100,
+                "predicates": {},
+                "columns": {
+                    "x": {"null_count": 20, "histogram": list(np.linspace(0, 100, 21)), "distinct_count": 50},
+                    "y": {"null_count": 0, "top_values": [[0, 25]], "distinct_count": 4},
+                },
+            }
+        },
+        path,
+    )
+    assert column_stats.estimate_selectivity("t", [("x", "is_null", None)], path=path) == pytest.approx(0.2)
+    assert column_stats.estimate_selectivity("t", [("x", "le", 50)], path=path) == pytest.approx(0.4)
+    assert column_stats.estimate_selectivity("t", [("y", "eq", 0)], path=path) == pytest.approx(0.25)
+    both = column_stats.estimate_selectivity("t", [("x", "is_null", None), ("y", "eq", 0)], path=path)
+    assert both == pytest.approx(1 - 0.8 * 0.75)
+
+
+class ScanClient:
+    def __init__(self):
+        self.queries = []
+        self.table = SimpleNamespace(
+            modified="2024-01-01",
+            num_rows=1234,
+            schema=[
+                SimpleNamespace(name="doi", field_type="STRING", mode="NULLABLE"),
+                SimpleNamespace(name="team_size", field_type="INTEGER", mode="NULLABLE"),
+                SimpleNamespace(name="title", field_type="STRING", mode="NULLABLE"),
+            ],
+        )
+
+    def get_table(self, table_id):
+        return self.table
+
+    def query(self, query):
+        self.queries.append(query)
+        row = {"predicate__rule": 7, "team_size__null_count": 2, "team_size__distinct_count": 5}
+        return SimpleNamespace(result=lambda: [row])
+
+
+def test_row_count_comes_from_metadata_without_a_query():
+    client = ScanClient()
+    entry = column_stats.collect_table_stats(client, "t")
+    assert entry["row_count"] == 1234
+    assert client.queries == []
+
+
+def test_scan_is_limited_to_requested_columns(monkeypatch):
+    monkeypatch.setattr(
+        column_stats,
+        "_column_expressions",
+        lambda name, field_type: {"null_count": f"COUNTIF({name} IS NULL)", "distinct_count": "1"},
+    )
+    client = ScanClient()
+    entry = column_stats.collect_table_stats(client, "t", {"rule": "team_size = 0"}, ["team_size"])
+    (query,) = client.queries
+    assert "team_size" in query and "doi" not in query and "title" not in query
+    assert "COUNT(*)" not in query
+    assert set(entry["columns"]) == {"team_size"}
+    assert entry["predicates"] == {"rule": 7}
+
+
+def test_entry_without_requested_column_is_recollected(catalog_path):
+    path, collected = catalog_path
+    client = FakeClient("2024-01-01")
+    column_stats.record_table_stats(client, "t", {"rule": "x > 0"}, path=path)
+    column_stats.fresh_table_entry(client, "t", {"rule": "x > 0"}, ["x"], path=path)
+    assert len(collected) == 2
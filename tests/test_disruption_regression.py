@@ -0,0 +1,113 @@
+import numpy as np
+import pandas as pd
+import pytest
+import statsmodels.formula.api as smf
+from scipy import stats
+
+import disruption_regression
+
+REGRESSORS = ("team_size", "avg_career_age")
+YEARS = [2000, 2001, 2002]
+
+
+@pytest.fixture(scope="module")
+def data(tmp_path_factory):
+    rng = np.random.default_rng(0)
+    n = 3_000
+    df = pd.DataFrame(
+        {
+            "field_name": rng.choice([f"field_{i}" for i in range(12)], n),
+            "year": rng.choice(YEARS, n),
+            "team_size": rng.poisson(4, n).astype(float),
+            "avg_career_age": rng.gamma(2.0, 4.0, n),
+        }
+    )
+    field_effect = df["field_name"].str[6:].astype(int) * 0.01
+    df["disruption"] = (
+        0.02 - 0.003 * df["team_size"] + 0.001 * df["avg_career_age"] + field_effect
+        + rng.standard_t(3, n) * 0.05 * (1 + df["team_size"] / 10)
+    )
+    # Missing values are dropped listwise, as in the streamed fit
+    df.loc[rng.choice(n, 50, replace=False), "avg_career_age"] = np.nan
+
+    # Several files, so the fit is split across read tasks
+    directory = tmp_path_factory.mktemp("disruption_analysis")
+    for i, start in enumerate(range(0, n, 1_000)):
+        df.iloc[start : start + 1_000].to_parquet(directory / f"part-{i}.parquet", index=False)
+    return str(directory), df.dropna()
+
+
+@pytest.fixture(scope="module")
+def reference(data):
+    _, df = data
+    return smf.ols("disruption ~ team_size + avg_career_age + C(year) + C(field_name)", df)
+
+
+def test_fixed_effects_fit_matches_statsmodels(data, reference):
+    source, df = data
+    result = disruption_regression.fit(
+        source, regressors=REGRESSORS, dummies={"year": YEARS}, workers=2
+    ).loc[list(REGRESSORS)]
+    classical = reference.fit()
+    robust = reference.fit(cov_type="HC1")
+
+    np.testing.assert_allclose(result["coef"], classical.params[list(REGRESSORS)], rtol=1e-8)
+    np.testing.assert_allclose(result["se"], classical.bse[list(REGRESSORS)], rtol=1e-8)
+    np.testing.assert_allclose(result["se_robust"], robust.bse[list(REGRESSORS)], rtol=1e-8)
+
+
+def test_cluster_se_matches_statsmodels(data, reference):
+    source, df = data
+    result = disruption_regression.fit(
+        source, regressors=REGRESSORS, dummies={"year": YEARS}, workers=1
+    ).loc[list(REGRESSORS)]
+    clustered = reference.fit(cov_type="cluster", cov_kwds={"groups": pd.factorize(df["field_name"])[0]})
+
+    # statsmodels counts the absorbed field effects in k for the CR1 correction; fit() does not,
+    # because they are nested in the clusters
+    n = len(df)
+    k_total = len(clustered.params)
+    k = len(REGRESSORS) + len(YEARS) - 1
+    expected = clustered.bse[list(REGRESSORS)] * np.sqrt((n - k_total) / (n - k))
+    np.testing.assert_allclose(result["se_cluster"], expected, rtol=1e-8)
+    n_clusters = df["field_name"].nunique()
+    expected_p = 2 * stats.t.sf(np.abs(result["coef"] / expected), n_clusters - 1)
+    np.testing.assert_allclose(result["p_cluster"], expected_p, rtol=1e-6)
+
+
+def test_intercept_without_absorbed_effects(data):
+    source, df = data
+    result = disruption_regression.fit(
+        source, regressors=REGRESSORS, absorb=None, dummies={}, cluster=None, workers=1
+    )
+    expected = smf.ols("disruption ~ team_size + avg_career_age", df).fit()
+    np.testing.assert_allclose(result.loc["const", "coef"], expected.params["Intercept"], rtol=1e-8)
+    np.testing.assert_allclose(result.loc[list(REGRESSORS), "se"], expected.bse[list(REGRESSORS)], rtol=1e-8)
+    assert "se_cluster" not in result
+
+
+def test_single_files_are_split_across_workers(data, tmp_path):
+    _, df = data
+    parquet_path = tmp_path / "disruption_analysis.parquet"
+    csv_path = tmp_path / "disruption_analysis.csv"
+    df.to_parquet(parquet_path, index=False, row_group_size=500)
+    df.to_csv(csv_path, index=False)
+    columns = ["disruption", "field_name"]
+
+    for path in (parquet_path, csv_path):
+        tasks = disruption_regression.source_tasks(str(path), columns, 4)
+        assert len(tasks) >= 4
+        batches = [batch for task in tasks for batch in disruption_regression.read_batches(task, columns)]
+        read = pd.concat(batches)
+        assert len(read) == len(df)
+        np.testing.assert_allclose(np.sort(read["disruption"]), np.sort(df["disruption"]))
+
+
+def test_csv_fit_matches_parquet_fit(data, tmp_path):
+    source, df = data
+    csv_path = tmp_path / "disruption_analysis.csv"
+    df.to_csv(csv_path, index=False)
+    kwargs = {"regressors": REGRESSORS, "dummies": {"year": YEARS}, "workers": 3}
+    from_csv = disruption_regression.fit(str(csv_path), **kwargs)
+    from_parquet = disruption_regression.fit(source, **kwargs)
+    pd.testing.assert_frame_equal(from_csv, from_parquet, rtol=1e-8)
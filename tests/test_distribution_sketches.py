@@ -0,0 +1,98 @@
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import stats
+
+from distribution_sketches import DistributionSketch, ks_test, mann_whitney, sketch
+
+
+@pytest.fixture
+def rng():
+    return np.random.default_rng(0)
+
+
+def _disruption(rng, n, scale=0.05):
+    return np.clip(rng.laplace(0.0, scale, n), -1.0, 0.999)
+
+
+def test_quantiles_and_cdf_are_within_one_bin(rng):
+    values = _disruption(rng, 20_000)
+    s = DistributionSketch.from_values("disruption", values)
+    qs = [0.1, 0.25, 0.5, 0.75, 0.9]
+    np.testing.assert_allclose(s.quantiles(qs), np.quantile(values, qs), atol=0.005)
+    points = np.array([-0.1, 0.0, 0.05])
+    np.testing.assert_allclose(s.cdf(points), [(values <= x).mean() for x in points], atol=0.01)
+
+
+def test_count_metric_cdf_is_exact_on_unit_bins(rng):
+    values = rng.poisson(5, 5_000)
+    s = DistributionSketch.from_values("citation_count", values)
+    for x in range(15):
+        assert s.cdf(x)[0] == pytest.approx((values <= x).mean())
+    np.testing.assert_array_equal(s.quantiles([0.5]), np.quantile(values, [0.5], method="inverted_cdf"))
+
+
+def test_mean_is_exact_and_merges(rng):
+    a = rng.negative_binomial(1, 0.015, 3_000)
+    b = rng.negative_binomial(1, 0.01, 2_000)
+    merged = DistributionSketch.from_values("citation_count", a) + DistributionSketch.from_values(
+        "citation_count", b
+    )
+    assert merged.n == len(a) + len(b)
+    assert merged.mean() == pytest.approx(np.r_[a, b].mean())
+
+
+def test_ks_matches_scipy(rng):
+    a = _disruption(rng, 4_000)
+    b = _disruption(rng, 3_000, scale=0.06) + 0.01
+    statistic, p_value = ks_test(
+        DistributionSketch.from_values("disruption", a), DistributionSketch.from_values("disruption", b)
+    )
+    expected = stats.ks_2samp(a, b, method="asymp")
+    assert statistic == pytest.approx(expected.statistic, abs=0.01)
+    assert p_value == pytest.approx(expected.pvalue, rel=0.5, abs=1e-6)
+
+
+def test_mann_whitney_matches_scipy_on_exact_bins(rng):
+    # Citation counts up to 20 have one bin per value, so the binned ties are the real ties
+    a = rng.poisson(6, 1_500)
+    b = rng.poisson(7, 1_000)
+    u, p_value, effect = mann_whitney(
+        DistributionSketch.from_values("citation_count", a), DistributionSketch.from_values("citation_count", b)
+    )
+    expected = stats.mannwhitneyu(
+        a, b, alternative="two-sided", use_continuity=False, method="asymptotic"
+    )
+    assert u == pytest.approx(expected.statistic)
+    assert p_value == pytest.approx(expected.pvalue)
+    assert effect == pytest.approx(expected.statistic / (len(a) * len(b)))
+
+
+def test_sketch_merges_local_histogram_rows(rng):
+    groups = {"First-Time": rng.poisson(3, 500), "Senior": rng.poisson(9, 700)}
+    rows = []
+    for stage, values in groups.items():
+        s = DistributionSketch.from_values("citation_count", values)
+        for bin_index in np.flatnonzero(s.counts):
+            in_bin = np.searchsorted(s.edges, values, side="right") == bin_index
+            rows.append(
+                {
+                    "year": 2000,
+                    "field_name": "Biology",
+                    "career_stage": stage,
+                    "team_size_bucket": "2",
+                    "metric": "citation_count",
+                    "bin": bin_index,
+                    "count": s.counts[bin_index],
+                    "value_sum": float(values[in_bin].sum()),
+                }
+            )
+    histograms = pd.DataFrame(rows)
+
+    senior = sketch("citation_count", histograms, career_stage="Senior", year=range(1990, 2010))
+    expected = DistributionSketch.from_values("citation_count", groups["Senior"])
+    np.testing.assert_array_equal(senior.counts, expected.counts)
+    assert senior.mean() == pytest.approx(groups["Senior"].mean())
+    assert sketch("citation_count", histograms).n == 1_200
+    with pytest.raises(ValueError):
+        sketch("citation_count", histograms, country="US")
@@ -0,0 +1,145 @@
+import base64
+import datetime
+import hashlib
+import os
+from types import SimpleNamespace
+
+import pytest
+
+import export_bq_table
+
+
+class FakeBlob:
+    def __init__(self, bucket, name, content=""):
+        self.bucket = bucket
+        self.name = name
+        self.content = content
+
+    @property
+    def md5_hash(self):
+        return base64.b64encode(hashlib.md5(self.content.encode()).digest()).decode()
+
+    def download_as_text(self, encoding="utf-8"):
+        return self.content
+
+    def download_to_filename(self, path):
+        with open(path, "w") as f:
+            f.write(self.content)
+
+    def upload_from_string(self, content, content_type=None):
+        self.content = content
+        self.bucket.blobs[self.name] = self
+
+    def reload(self):
+        pass
+
+    def delete(self):
+        del self.bucket.blobs[self.name]
+
+
+class FakeBucket:
+    def __init__(self):
+        self.blobs = {}
+
+    def blob(self, name):
+        return FakeBlob(self, name)
+
+    def get_blob(self, name):
+        return self.blobs.get(name)
+
+    def list_blobs(self, prefix):
+        return [blob for name, blob in self.blobs.items() if name.startswith(prefix)]
+
+
+class FakeBigQuery:
+    """One table whose rows are exported as two CSV shards; `write_during_extract` simulates
+    a concurrent write that lands while the extract job runs."""
+
+    def __init__(self, bucket):
+        self.bucket = bucket
+        self.extracts = 0
+        self.write_during_extract = False
+        self.table = self._table(datetime.datetime(2024, 1, 1), 2)
+
+    @staticmethod
+    def _table(modified, num_rows):
+        schema = [SimpleNamespace(name="paperid", field_type="INTEGER", mode="NULLABLE")]
+        return SimpleNamespace(modified=modified, num_rows=num_rows, schema=schema)
+
+    def write(self):
+        self.table = self._table(self.table.modified + datetime.timedelta(days=1), self.table.num_rows + 1)
+
+    def get_table(self, table_id):
+        return self.table
+
+    def extract_table(self, table_id, uri, location=None):
+        self.extracts += 1
+        prefix = "intermediate/t/"
+        FakeBlob(self.bucket, f"{prefix}000.csv").upload_from_string("paperid\n1\n")
+        FakeBlob(self.bucket, f"{prefix}001.csv").upload_from_string(f"paperid\n{self.table.num_rows}\n")
+        if self.write_during_extract:
+            self.write()
+        return SimpleNamespace(result=lambda: None)
+
+
+@pytest.fixture
+def export(tmp_path, monkeypatch):
+    bucket = FakeBucket()
+    bq = FakeBigQuery(bucket)
+    monkeypatch.setattr(export_bq_table, "bigquery_client", lambda project_id: bq)
+    monkeypatch.setattr(export_bq_table, "storage_client", lambda: SimpleNamespace(bucket=lambda name: bucket))
+    manifest_path = str(tmp_path / "manifest.json")
+
+    def run(**kwargs):
+        return export_bq_table.export_bq_table_to_csv(
+            "t", local_mirror=False, manifest_path=manifest_path, **kwargs
+        )
+
+    return bq, bucket, manifest_path, run
+
+
+def test_unchanged_table_is_served_from_the_manifest(export):
+    bq, bucket, manifest_path, run = export
+    uri = run()
+    assert uri == "gs://sciscinet-data/exported_data/t.csv"
+    assert bucket.get_blob("exported_data/t.csv").content == "paperid\n1\n2\n"
+    assert run() == uri
+    assert bq.extracts == 1
+
+
+def test_version_change_misses_the_manifest(export):
+    bq, bucket, manifest_path, run = export
+    run()
+    bq.write()
+    run()
+    assert bq.extracts == 2
+    assert bucket.get_blob("exported_data/t.csv").content == "paperid\n1\n3\n"
+    entry = export_bq_table.load_manifest(manifest_path)["scisci-cssai-usf.Disruption.t"]
+    assert entry["num_rows"] == 3
+
+
+def test_table_changed_during_extract_is_not_cached(export):
+    bq, bucket, manifest_path, run = export
+    run()
+    bq.write_during_extract = True
+    run(force=True)
+    assert "scisci-cssai-usf.Disruption.t" not in export_bq_table.load_manifest(manifest_path)
+    bq.write_during_extract = False
+    run()
+    assert bq.extracts == 3
+
+
+def test_eviction_removes_least_recently_used_files_first(tmp_path):
+    cache_dir = str(tmp_path)
+    for i, name in enumerate(["old.csv", "middle.csv", "recent.csv", "kept.csv"]):
+        path = os.path.join(cache_dir, name)
+        with open(path, "w") as f:
+            f.write("x" * 100)
+        os.utime(path, (1_000_000 + i * 10 if name != "kept.csv" else 0, 1_000_000))
+    keep = (os.path.join(cache_dir, "kept.csv"),)
+
+    export_bq_table.evict_local_cache(cache_dir, max_bytes=250, keep=keep)
+
+    remaining = sorted(os.listdir(cache_dir))
+    assert remaining == ["kept.csv", "recent.csv"]
+    assert sum(os.path.getsize(os.path.join(cache_dir, name)) for name in remaining) <= 250
@@ -0,0 +1,45 @@
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+import pytest
+
+import generate_synthetic_sciscinet
+
+
+@pytest.fixture(scope="module")
+def release(tmp_path_factory):
+    output_dir = tmp_path_factory.mktemp("release")
+    generate_synthetic_sciscinet.generate(0.002, str(output_dir), workers=1, chunk_size=500)
+    return output_dir
+
+
+def _read(release, name):
+    return pq.read_table(release / generate_synthetic_sciscinet.TABLE_FILES[name]).to_pandas()
+
+
+def test_tables_follow_raw_release_schemas(release):
+    for name, filename in generate_synthetic_sciscinet.TABLE_FILES.items():
+        assert pq.read_schema(release / filename).equals(generate_synthetic_sciscinet.SCHEMAS[name])
+    authors = pq.read_schema(release / generate_synthetic_sciscinet.TABLE_FILES["authors"])
+    assert "P_gf_" in authors.names
+    assert "P_gf" not in authors.names
+    assert "debut_year" not in authors.names
+
+
+def test_citation_counts_match_generated_references(release):
+    papers = _read(release, "papers").set_index("paperid")
+    refs = _read(release, "paperrefs")
+
+    in_degree = refs.groupby("cited_paperid").size().reindex(papers.index, fill_value=0)
+    assert (papers["citation_count"] == in_degree).all()
+    assert (papers["cited_by_count"] >= papers["citation_count"]).all()
+    for column, window in generate_synthetic_sciscinet.CITATION_WINDOWS.items():
+        windowed = refs[refs["year_diff"] <= window].groupby("cited_paperid").size()
+        assert (papers[column] == windowed.reindex(papers.index, fill_value=0)).all()
+
+
+def test_citation_masks_follow_citation_counts(release):
+    papers = pq.read_table(release / generate_synthetic_sciscinet.TABLE_FILES["papers"])
+    no_disruption = pc.or_(pc.equal(papers["citation_count"], 0), pc.equal(papers["reference_count"], 0))
+    assert pc.all(pc.equal(pc.is_null(papers["disruption"]), no_disruption)).as_py()
+    assert pc.all(pc.equal(pc.is_null(papers["SB_B"]), pc.equal(papers["citation_count"], 0))).as_py()
+    assert pc.all(pc.equal(pc.is_null(papers["WSB_mu"]), pc.less(papers["citation_count"], 5))).as_py()
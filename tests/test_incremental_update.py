@@ -0,0 +1,53 @@
+import pytest
+
+import incremental_update
+
+
+class FakeClient:
+    def __init__(self):
+        self.deleted = []
+
+    def create_dataset(self, dataset, exists_ok=False):
+        pass
+
+    def delete_table(self, table_id, not_found_ok=False):
+        self.deleted.append(table_id)
+
+
+@pytest.fixture
+def queries(monkeypatch):
+    run = []
+    monkeypatch.setattr(incremental_update, "client", FakeClient())
+    monkeypatch.setattr(incremental_update, "_run", run.append)
+    return run
+
+
+def test_replace_rows_keeps_inserts_out_of_the_transaction(queries):
+    inserts = [f"\n    SELECT {year} AS year" for year in range(1961, 2021)]
+    incremental_update._replace_rows("p.Disruption.All_Yearly_Author_Profiles", "authorid = 1", inserts)
+
+    scratch = incremental_update._delta_table("All_Yearly_Author_Profiles_new_rows")
+    assert f"CREATE OR REPLACE TABLE `{scratch}`" in queries[0]
+    assert all(query.startswith(f"INSERT INTO `{scratch}`") for query in queries[1:-1])
+    assert len(queries) == len(inserts) + 2
+    transaction = queries[-1]
+    assert transaction.count("INSERT INTO") == 1
+    assert "DELETE FROM `p.Disruption.All_Yearly_Author_Profiles` WHERE authorid = 1;" in transaction
+    assert incremental_update.client.deleted == [scratch]
+
+
+def test_fields_change_is_not_merged(queries, monkeypatch):
+    tables = {"sciscinet_fields.parquet": "SciSciNet_Fields", "sciscinet_papers.parquet": "SciSciNet_Papers"}
+    merged = []
+    monkeypatch.setattr(incremental_update, "stage_release", lambda bucket_path, tables: None)
+    monkeypatch.setattr(
+        incremental_update,
+        "diff_table",
+        lambda table: {"insert": 0, "update": 1 if table == "SciSciNet_Fields" else 2, "delete": 0},
+    )
+    monkeypatch.setattr(incremental_update, "merge_changes", merged.append)
+
+    with pytest.raises(ValueError, match="full rebuild"):
+        incremental_update.ingest_release("gs://bucket/release", tables)
+    assert merged == []
+    assert incremental_update._derived_table("Field_Ancestors") in incremental_update.client.deleted
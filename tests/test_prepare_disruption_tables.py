@@ -0,0 +1,69 @@
+import datetime
+from types import SimpleNamespace
+
+import pytest
+
+import prepare_disruption_tables as pipeline
+
+
+class FakeClient:
+    def __init__(self, modified):
+        self.modified = modified
+        self.queries = []
+
+    def get_table(self, table_id):
+        name = table_id.split(".")[-1]
+        if name not in self.modified:
+            raise Exception(f"Not found: {table_id}")
+        return SimpleNamespace(modified=self.modified[name])
+
+    def query(self, query):
+        self.queries.append(query)
+        return SimpleNamespace(result=lambda: None)
+
+
+def _day(day):
+    return datetime.datetime(2026, 1, day, tzinfo=datetime.timezone.utc)
+
+
+@pytest.mark.parametrize(
+    "modified, rebuilt",
+    [
+        ({"SciSciNet_Fields": _day(1), "SciSciNet_PaperFields": _day(1)}, True),
+        ({"Field_Ancestors": _day(2), "SciSciNet_Fields": _day(1), "SciSciNet_PaperFields": _day(1)}, False),
+        ({"Field_Ancestors": _day(2), "SciSciNet_Fields": _day(1), "SciSciNet_PaperFields": _day(3)}, True),
+        ({"Field_Ancestors": _day(2), "SciSciNet_Fields": _day(3), "SciSciNet_PaperFields": _day(1)}, True),
+    ],
+)
+def test_field_ancestor_index_is_rebuilt_when_field_tables_change(monkeypatch, modified, rebuilt):
+    client = FakeClient(modified)
+    monkeypatch.setattr(pipeline, "client", client)
+    pipeline.create_field_ancestor_index()
+    assert bool(client.queries) == rebuilt
+
+
+@pytest.mark.parametrize("cleaned_day, allowed", [(None, True), (1, True), (3, False)])
+def test_recompute_year_refuses_after_clean_data(monkeypatch, cleaned_day, allowed):
+    tables = {"All_Yearly_Author_Profiles": SimpleNamespace(created=_day(2))}
+    if cleaned_day is not None:
+        tables["problematic_authors"] = SimpleNamespace(modified=_day(cleaned_day))
+
+    def get_table(table_id):
+        name = table_id.split(".")[-1]
+        if name not in tables:
+            raise Exception(f"Not found: {table_id}")
+        return tables[name]
+
+    recomputed = []
+    monkeypatch.setattr(pipeline, "client", SimpleNamespace(get_table=get_table))
+    monkeypatch.setattr(pipeline, "create_author_profiles", lambda year: [SimpleNamespace(result=lambda: None)])
+    monkeypatch.setattr(
+        pipeline, "create_paper_author_details", lambda year: SimpleNamespace(result=lambda: recomputed.append(year))
+    )
+    if allowed:
+        pipeline.recompute_year(2000)
+        assert recomputed == [2000]
+    else:
+        with pytest.raises(RuntimeError, match="clean_data"):
+            pipeline.recompute_year(2000)
+        assert recomputed == []
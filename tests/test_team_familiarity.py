@@ -0,0 +1,123 @@
+import itertools
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+
+import team_familiarity
+from team_familiarity import (
+    MAX_PAIRS_PER_PAPER,
+    TEAM_FAMILIARITY_COLUMNS,
+    CollaborationPairIndex,
+    _pair_from_index,
+    pair_keys,
+    process_year,
+    team_pairs,
+)
+
+
+def _authorships(teams):
+    rows = [(paperid, np.uint64(author)) for paperid, authors in teams.items() for author in authors]
+    return pd.DataFrame(rows, columns=["paperid", "author_hash"]).astype({"author_hash": np.uint64})
+
+
+def test_pair_from_index_matches_triu_indices():
+    for n in (2, 3, 10, 51, 400):
+        i, j = _pair_from_index(np.arange(n * (n - 1) // 2), n)
+        expected_i, expected_j = np.triu_indices(n, 1)
+        np.testing.assert_array_equal(i, expected_i)
+        np.testing.assert_array_equal(j, expected_j)
+
+
+def test_large_team_samples_distinct_pairs():
+    size = 51
+    paper_codes = np.zeros(size, np.int64)
+    author_hashes = np.arange(1, size + 1, dtype=np.uint64)
+    _, keys = team_pairs(paper_codes, author_hashes, np.random.default_rng(0))
+    assert len(keys) == MAX_PAIRS_PER_PAPER
+    assert len(np.unique(keys)) == MAX_PAIRS_PER_PAPER
+
+
+def test_large_team_adds_at_most_one_joint_paper_per_pair():
+    index = CollaborationPairIndex()
+    process_year(index, _authorships({"big": range(1, 300)}), np.random.default_rng(1), emit=False)
+    assert len(index) == MAX_PAIRS_PER_PAPER
+    assert index.counts.max() == 1
+
+
+def test_features_match_brute_force():
+    rng = np.random.default_rng(2)
+    index = CollaborationPairIndex()
+    history = {}
+    for year in range(3):
+        teams = {
+            f"{year}-{p}": rng.choice(12, size=rng.integers(1, 6), replace=False) + 1 for p in range(20)
+        }
+        features = process_year(index, _authorships(teams), rng)
+        for paperid, authors in teams.items():
+            pairs = [tuple(sorted(pair)) for pair in itertools.combinations(authors, 2)]
+            if not pairs:
+                assert paperid not in set(features["paperid"])
+                continue
+            prior = np.array([history.get(pair, 0) for pair in pairs])
+            row = features.set_index("paperid").loc[paperid]
+            assert row["collaboration_pair_count"] == len(pairs)
+            assert row["prior_collaboration_pair_share"] == np.mean(prior > 0)
+            assert np.isclose(row["mean_prior_joint_papers"], prior.mean())
+            assert row["max_prior_joint_papers"] == prior.max()
+        for authors in teams.values():
+            for pair in itertools.combinations(authors, 2):
+                pair = tuple(sorted(pair))
+                history[pair] = history.get(pair, 0) + 1
+
+
+def test_pair_keys_are_order_independent():
+    a = np.array([1, 5, 9], np.uint64)
+    b = np.array([7, 2, 9], np.uint64)
+    np.testing.assert_array_equal(pair_keys(a, b), pair_keys(b, a))
+
+
+def test_index_add_merges_batches_like_a_counter():
+    rng = np.random.default_rng(3)
+    index = CollaborationPairIndex()
+    expected = {}
+    for _ in range(5):
+        keys = rng.integers(0, 200, 300).astype(np.uint64)
+        index.add(keys)
+        for key in keys.tolist():
+            expected[key] = expected.get(key, 0) + 1
+    assert np.all(np.diff(index.keys.astype(np.float64)) > 0)
+    assert dict(zip(index.keys.tolist(), index.counts.tolist())) == expected
+    probe = np.arange(250, dtype=np.uint64)
+    assert index.lookup(probe).tolist() == [expected.get(key, 0) for key in range(250)]
+
+
+def test_rerun_replaces_team_familiarity_columns(tmp_path, monkeypatch):
+    class FakeClient:
+        def __init__(self, columns):
+            self.columns = columns
+            self.queries = []
+
+        def load_table_from_file(self, source, table_id, job_config=None):
+            return SimpleNamespace(result=lambda: None)
+
+        def get_table(self, table_id):
+            return SimpleNamespace(schema=[SimpleNamespace(name=name) for name in self.columns])
+
+        def query(self, query):
+            self.queries.append(query)
+            return SimpleNamespace(result=lambda: None)
+
+    parquet_path = tmp_path / "team_familiarity.parquet"
+    parquet_path.write_bytes(b"")
+    first = FakeClient(["paperid", "disruption"])
+    monkeypatch.setattr(team_familiarity, "client", first)
+    team_familiarity.add_team_familiarity_metrics(str(parquet_path))
+    assert "EXCEPT" not in first.queries[0]
+
+    second = FakeClient(["paperid", "disruption", *TEAM_FAMILIARITY_COLUMNS])
+    monkeypatch.setattr(team_familiarity, "client", second)
+    team_familiarity.add_team_familiarity_metrics(str(parquet_path))
+    assert f"da.* EXCEPT ({', '.join(TEAM_FAMILIARITY_COLUMNS)})" in second.queries[0]
+    for column in TEAM_FAMILIARITY_COLUMNS:
+        assert f"tf.{column}" in second.queries[0]